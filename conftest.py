@@ -0,0 +1,149 @@
+import os
+
+import pytest
+from tools.chain_lifecycle import CHAIN_LIFECYCLE
+from tools.rpc_profiler import RPC_PROFILER
+from tools.standby_pool import STANDBY_POOL, inject_urls
+from tools.parallel_workers import PARALLEL, GLOBAL_CONFIG_LOCK, WORKER_FUNDS, worker_keypairs
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, funds
+
+# Default report file of --rpc-profile without a path
+RPC_PROFILE_PATH = 'rpc_profile.json'
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--rpc-profile', nargs='?', const=RPC_PROFILE_PATH, default=os.environ.get('RPC_PROFILE'),
+        help='Count the RPC calls per method and test, and dump them to this json file')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'pristine_chain(per_class=False): the test needs the genesis state, restart the chain if it is dirty')
+    config.addinivalue_line(
+        'markers', 'dirties_chain(*changes): the test changes the chain configuration, e.g. BlockReward')
+    if config.getoption('--rpc-profile'):
+        RPC_PROFILER.install()
+
+
+def _lifecycle_group(item):
+    pristine = item.get_closest_marker('pristine_chain')
+    dirties = item.get_closest_marker('dirties_chain')
+    if pristine and not dirties:
+        return 0
+    if not pristine:
+        return 1
+    return 2
+
+
+def _standby_group(item):
+    return 0 if item.get_closest_marker('pristine_chain') is None else 1
+
+
+def pytest_collection_modifyitems(session, config, items):
+    if STANDBY_POOL.enabled:
+        # Pristine tests run on standby stacks, which boot while the other tests run.
+        # A pytest-xdist worker runs only some of the collected tests, so it boots its
+        # stacks on its first pristine test, see STANDBY_POOL.acquire()
+        items.sort(key=_standby_group)
+        if not PARALLEL and any(_standby_group(item) for item in items):
+            STANDBY_POOL.start()
+        return
+    # Tests which only read the genesis state run first and share one restart,
+    # tests which need the genesis state but change it run last
+    items.sort(key=_lifecycle_group)
+
+
+def pytest_sessionstart(session):
+    if PARALLEL:
+        # The workers' own copies of the dev accounts, see worker_keypair()
+        funds(get_substrate(WS_URL), [kp.ss58_address for kp in worker_keypairs()], WORKER_FUNDS)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    STANDBY_POOL.shutdown()
+
+
+@pytest.fixture(scope='session')
+def chain_lifecycle():
+    return CHAIN_LIFECYCLE
+
+
+# Classes with pristine_chain(per_class=True), which already had their pristine chain
+_PRISTINE_CLASSES = set()
+# The standby stack of the running pristine test (or class), and its URL injection
+_STANDBY = {}
+# Tests which hold the GLOBAL_CONFIG_LOCK
+_GLOBAL_CONFIG_HELD = set()
+
+
+def _shares_standby(item, nextitem):
+    pristine = item.get_closest_marker('pristine_chain')
+    return nextitem is not None and pristine.kwargs.get('per_class') and nextitem.cls is item.cls
+
+
+def _setup_standby(item):
+    if _STANDBY:
+        return
+    stack = STANDBY_POOL.acquire()
+    injection = inject_urls(stack.url_mapping(), [item.module])
+    injection.__enter__()
+    _STANDBY.update(stack=stack, injection=injection)
+
+
+def _teardown_standby(item, nextitem):
+    if not _STANDBY or _shares_standby(item, nextitem):
+        return
+    _STANDBY['injection'].__exit__(None, None, None)
+    STANDBY_POOL.recycle(_STANDBY['stack'])
+    _STANDBY.clear()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    RPC_PROFILER.current_test = item.nodeid
+    pristine = item.get_closest_marker('pristine_chain')
+    if pristine is None:
+        if PARALLEL and item.get_closest_marker('dirties_chain'):
+            # Changes of the global configuration on the shared chain run one at a time
+            GLOBAL_CONFIG_LOCK.acquire()
+            _GLOBAL_CONFIG_HELD.add(item.nodeid)
+        return
+    if STANDBY_POOL.enabled:
+        _setup_standby(item)
+        return
+    if pristine.kwargs.get('per_class'):
+        if item.cls in _PRISTINE_CLASSES:
+            return
+        _PRISTINE_CLASSES.add(item.cls)
+    CHAIN_LIFECYCLE.require_pristine(item.nodeid)
+
+
+def pytest_runtest_teardown(item, nextitem):
+    if item.nodeid in _GLOBAL_CONFIG_HELD:
+        _GLOBAL_CONFIG_HELD.remove(item.nodeid)
+        GLOBAL_CONFIG_LOCK.release()
+    if _STANDBY:
+        # The standby stack is thrown away, the default chain stays as it is
+        _teardown_standby(item, nextitem)
+        return
+    dirties = item.get_closest_marker('dirties_chain')
+    if dirties is not None:
+        CHAIN_LIFECYCLE.declare(*dirties.args)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if CHAIN_LIFECYCLE.restarts or CHAIN_LIFECYCLE.reuses:
+        terminalreporter.section('Chain lifecycle')
+        terminalreporter.write_line(CHAIN_LIFECYCLE.summary())
+    if STANDBY_POOL.acquired:
+        terminalreporter.section('Standby stacks')
+        terminalreporter.write_line(STANDBY_POOL.summary())
+    path = config.getoption('--rpc-profile')
+    if not path or not RPC_PROFILER.installed:
+        return
+    RPC_PROFILER.dump(path)
+    terminalreporter.section('RPC profile')
+    terminalreporter.write_line(RPC_PROFILER.report())
+    terminalreporter.write_line(f'Full profile: {path}')
@@ -2,13 +2,13 @@ import sys
 sys.path.append('./')
 
 from behave import given, when, then
-from substrateinterface import Keypair
+from tools.keypair_pool import dev_keypair
 from tools.utils import calculate_multi_sig, TOKEN_NUM_BASE
 from tools.utils import transfer
 import random
 from tools.utils import show_account
 from tools.utils import send_proposal, send_approval, get_as_multi_extrinsic_id
-from tools.block_creation_utils import get_block_creation_times
+from tools.block_creation_utils import get_recent_block_times
 
 THRESHOLD = 2
 BLOCK_TRAVERSE = 20
@@ -18,12 +18,12 @@ BLOCK_TOLERATE_PERCENTAGE = 10
 
 @given('Use the Alice keypair')
 def get_alice_keypair(context):
-    context._sender = Keypair.create_from_uri('//Alice')
+    context._sender = dev_keypair('//Alice')
 
 
 @given('Use the Bob keypair')
 def get_bob_keypair(context):
-    context._receiver = Keypair.create_from_uri('//Bob')
+    context._receiver = dev_keypair('//Bob')
 
 
 @given('Create a multisig wallet from Alice and Bob')
@@ -87,7 +87,9 @@ def check_token_back_to_bob(context):
 
 @when('Get all block creation time')
 def get_block_creation_time(context):
-    context._ave_time = get_block_creation_times(context._substrate, BLOCK_TRAVERSE)
+    block_times = get_recent_block_times(context._substrate, BLOCK_TRAVERSE)
+    block_times.show()
+    context._ave_time = block_times.mean
 
 
 @then('Check block create time')
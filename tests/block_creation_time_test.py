@@ -1,8 +1,8 @@
 import unittest
 
-from substrateinterface import SubstrateInterface
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, get_block_height, wait_for_n_blocks
-from tools.block_creation_utils import get_block_creation_times
+from tools.block_creation_utils import get_recent_block_times, get_block_times
 
 BLOCK_TRAVERSE = 10
 BLOCK_CREATION_MS = 12000
@@ -17,10 +17,25 @@ class TestBlockCreationTime(unittest.TestCase):
         wait_for_n_blocks(substrate, block_number - now_block + 1)
 
     def test_block_creation_time(self):
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
 
-        self.wait_block(substrate, BLOCK_TRAVERSE)
+        self.wait_block(substrate, BLOCK_TRAVERSE + 1)
 
-        ave_time = get_block_creation_times(substrate, BLOCK_TRAVERSE)
-        self.assertLess(abs(ave_time - BLOCK_CREATION_MS) / float(BLOCK_CREATION_MS) * 100.,
+        block_times = get_recent_block_times(substrate, BLOCK_TRAVERSE)
+        block_times.show()
+        self.assertLess(abs(block_times.mean - BLOCK_CREATION_MS) / float(BLOCK_CREATION_MS) * 100.,
                         BLOCK_TOLERATE_PERCENTAGE)
+
+    def test_timestamp_same_as_block(self):
+        substrate = get_substrate(WS_URL)
+        self.wait_block(substrate, BLOCK_TRAVERSE)
+
+        block_times = get_block_times(substrate, 1, BLOCK_TRAVERSE)
+        self.assertEqual(len(block_times.timestamps), BLOCK_TRAVERSE)
+        for number, timestamp in zip(block_times.block_numbers, block_times.timestamps):
+            block = substrate.get_block(block_number=int(number))
+            self.assertEqual(timestamp, int(str(block['extrinsics'][0]['call']['call_args'][0]['value'])))
+
+    def test_genesis_has_no_timestamp(self):
+        with self.assertRaises(ValueError):
+            get_block_times(get_substrate(WS_URL), 0, BLOCK_TRAVERSE)
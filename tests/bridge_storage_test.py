@@ -1,4 +1,6 @@
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import transfer, calculate_evm_account, calculate_evm_addr, calculate_evm_account_hex
 from tools.utils import WS_URL, ETH_URL, get_eth_chain_id
 from tools.peaq_eth_utils import call_eth_transfer_a_lot, get_contract, generate_random_hex
@@ -16,7 +18,7 @@ GAS_LIMIT = 4294967
 ITEM_TYPE = generate_random_hex()
 ITEM = '0x01'
 NEW_ITEM = '0x10'
-KP_SRC = Keypair.create_from_uri('//Alice')
+KP_SRC = dev_keypair('//Alice')
 STORAGE_ADDRESS = '0x0000000000000000000000000000000000000801'
 ETH_PRIVATE_KEY = '0xa2899b053679427c8c446dc990c8990c75052fd3009e563c6a613d982d6842fe'
 ABI_FILE = 'ETH/storage/storage.sol.json'
@@ -61,7 +63,7 @@ class TestBridgeStorage(unittest.TestCase):
     def setUp(self):
         self._eth_src = calculate_evm_addr(KP_SRC.ss58_address)
         self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         self._eth_kp_src = Keypair.create_from_private_key(ETH_PRIVATE_KEY, crypto_type=KeypairType.ECDSA)
         self._account = calculate_evm_account_hex(self._eth_kp_src.ss58_address)
 
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+from tools.keypair_pool import fresh_keypair
+from tools.utils import WS_URL, KP_GLOBAL_SUDO, KP_COLLATOR
+from tools.substrate_pool import get_substrate
+from tools.utils import get_block_height, transfer, wait_for_n_blocks
+from tools.bulk_balance import get_account_balances, get_account_balances_at, EMPTY_BALANCE
+from tools.balance_history import get_balance_history
+from tools.account_info import has_fixed_layout
+
+
+class FakeSubstrate:
+    """Records the RPC methods, the loaded runtime has spec version 1"""
+    metadata = object()
+    runtime_version = 1
+
+    def __init__(self):
+        self.methods = []
+        self.init_runtime = mock.Mock()
+
+    def get_block_runtime_version(self, block_hash):
+        self.methods.append('state_getRuntimeVersion')
+        return {'specVersion': 2 if block_hash == '0x02' else 1}
+
+    def rpc_request(self, method, params):
+        self.methods.append(method)
+        return {'result': [{'block': '0x01', 'changes': []}]}
+
+
+class TestBulkBalanceRequests(unittest.TestCase):
+    def setUp(self):
+        self.substrate = FakeSubstrate()
+        self.patches = [
+            mock.patch('tools.bulk_balance.create_balance_storage_keys', return_value={}),
+            mock.patch('tools.bulk_balance.is_fixed_layout', return_value=True)]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_head_without_block_hash(self):
+        balances = get_account_balances(self.substrate, ['addr'])
+        self.assertEqual(balances, {'addr': EMPTY_BALANCE})
+        self.assertEqual(self.substrate.methods, ['state_getRuntimeVersion', 'state_queryStorageAt'])
+        self.substrate.init_runtime.assert_not_called()
+
+    def test_init_runtime_on_other_version(self):
+        get_account_balances_at(self.substrate, ['addr'], ['0x01', '0x02'])
+        self.substrate.init_runtime.assert_called_once_with(block_hash='0x02')
+
+
+class TestBulkBalance(unittest.TestCase):
+    def setUp(self):
+        self.substrate = get_substrate(WS_URL)
+        self.addrs = [KP_GLOBAL_SUDO.ss58_address, KP_COLLATOR.ss58_address]
+
+    def test_same_as_query(self):
+        block_hash = self.substrate.get_block_hash()
+        balances = get_account_balances(self.substrate, self.addrs, block_hash)
+        for addr in self.addrs:
+            data = self.substrate.query('System', 'Account', [addr], block_hash=block_hash)['data']
+            self.assertEqual(balances[addr].free, int(data['free'].value))
+            self.assertEqual(balances[addr].reserved, int(data['reserved'].value))
+            self.assertEqual(balances[addr].frozen, int(data['frozen'].value))
+
+    def test_fixed_layout(self):
+        self.substrate.init_runtime()
+        self.assertTrue(has_fixed_layout(self.substrate, 'System', 'Account'))
+
+    def test_unknown_account(self):
+        addr = fresh_keypair().ss58_address
+        balances = get_account_balances(self.substrate, self.addrs + [addr])
+        self.assertEqual(balances[addr], EMPTY_BALANCE)
+        self.assertGreater(balances[KP_GLOBAL_SUDO.ss58_address].free, 0)
+
+    def test_many_blocks(self):
+        block_hashes = [self.substrate.get_block_hash(0), self.substrate.get_block_hash()]
+        balances = get_account_balances_at(self.substrate, self.addrs, block_hashes)
+        self.assertEqual(set(balances.keys()), set(block_hashes))
+        for block_hash in block_hashes:
+            self.assertEqual(set(balances[block_hash].keys()), set(self.addrs))
+
+    def test_history_matches_block_reads(self):
+        kp_dst = fresh_keypair()
+        start_height = get_block_height(self.substrate)
+        receipt = transfer(self.substrate, KP_GLOBAL_SUDO, kp_dst.ss58_address, 10 ** 18)
+        self.assertTrue(receipt.is_success, f'Failed to transfer: {receipt.error_message}')
+        wait_for_n_blocks(self.substrate)
+
+        addrs = self.addrs + [kp_dst.ss58_address]
+        history = get_balance_history(self.substrate, addrs, start_height, get_block_height(self.substrate))
+        self.assertEqual(sum(history.deltas_of(kp_dst.ss58_address)), 10 ** 18)
+
+        balances = get_account_balances_at(self.substrate, addrs, history.block_hashes)
+        for column, block_hash in enumerate(history.block_hashes):
+            for addr in addrs:
+                self.assertEqual(history.free_of(addr)[column], balances[block_hash][addr].free)
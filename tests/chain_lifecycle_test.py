@@ -0,0 +1,35 @@
+import unittest
+
+from tools.chain_lifecycle import ChainLifecycle
+
+
+class TestChainLifecycle(unittest.TestCase):
+    def setUp(self):
+        self._restarts = []
+        self._lifecycle = ChainLifecycle(restart=lambda: self._restarts.append(True))
+
+    def test_restart_unknown_chain(self):
+        self._lifecycle.require_pristine('first')
+        self.assertEqual(len(self._restarts), 1)
+        self.assertEqual(self._lifecycle.dirty, set())
+
+    def test_reuse_clean_chain(self):
+        self._lifecycle.require_pristine('first')
+        self._lifecycle.require_pristine('second')
+        self._lifecycle.require_pristine('third')
+        self.assertEqual(len(self._restarts), 1)
+        self.assertEqual((self._lifecycle.restarts, self._lifecycle.reuses), (1, 2))
+
+    def test_restart_dirty_chain(self):
+        self._lifecycle.require_pristine('first')
+        self._lifecycle.declare('BlockReward', 'ParachainStaking')
+        self.assertEqual(self._lifecycle.dirty, {'BlockReward', 'ParachainStaking'})
+        self._lifecycle.require_pristine('second')
+        self.assertEqual(len(self._restarts), 2)
+        self.assertEqual(self._lifecycle.dirty, set())
+        self.assertEqual(self._lifecycle.summary(), '2 chain restarts, 0 pristine chains reused')
+
+    def test_explicit_restart(self):
+        self._lifecycle.restart()
+        self._lifecycle.require_pristine('first')
+        self.assertEqual((self._lifecycle.restarts, self._lifecycle.reuses), (1, 1))
@@ -0,0 +1,51 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from tools.utils import WS_URL
+from tools.chain_readiness import wait_for_chains_ready, compose_chain_services, probe_service, CHAIN_SERVICES
+
+
+class TestChainReadiness(unittest.TestCase):
+    def test_running_chain_is_ready(self):
+        report = wait_for_chains_ready({'parachain': WS_URL}, timeout=30)
+        self.assertTrue(report.ready)
+        self.assertGreaterEqual(report.services['parachain'].height, 1)
+
+    def test_unreachable_chain(self):
+        with self.assertRaises(IOError):
+            wait_for_chains_ready({'nothing': 'ws://127.0.0.1:1'}, timeout=1)
+
+    def test_compose_chain_services(self):
+        config = {'services': {
+            'peaq': {'ports': [{'target': 9944, 'published': '10044'}]},
+            'other': {'ports': [{'target': 80, 'published': '8080'}]},
+        }}
+        self.assertEqual(list(compose_chain_services(config).keys()), ['parachain'])
+        self.assertEqual(compose_chain_services({}), {})
+        self.assertEqual(len(CHAIN_SERVICES), 3)
+
+    def test_probe_skips_unexpected_frames(self):
+        frames = [
+            {'jsonrpc': '2.0', 'method': 'chain_newHead', 'params': {}},
+            {'jsonrpc': '2.0', 'id': 1, 'result': None},
+            {'jsonrpc': '2.0', 'id': 1, 'result': {'number': '0x2'}},
+            {'jsonrpc': '2.0', 'id': 1, 'result': {'peers': 3}},
+        ]
+
+        class FakeConnection:
+            def send(self, data):
+                pass
+
+            def recv(self):
+                return json.dumps(frames.pop(0))
+
+            def close(self):
+                pass
+
+        with mock.patch('websocket.create_connection', return_value=FakeConnection()), \
+                mock.patch('tools.chain_readiness.PROBE_BACKOFF', 0.01):
+            service = probe_service('ws://127.0.0.1:1', time.time(), timeout=5)
+        self.assertTrue(service.ready)
+        self.assertEqual((service.height, service.peers, service.attempts), (2, 3, 3))
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from python_on_whales import DockerClient
+from tools.chain_snapshot import ChainSnapshot, snapshot_key
+
+
+class TestChainSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._compose_file = os.path.join(self._dir.name, 'docker-compose.yml')
+        self._runtime = os.path.join(self._dir.name, 'runtime.wasm')
+        with open(self._compose_file, 'w') as f:
+            f.write('services: {}\n')
+        with open(self._runtime, 'wb') as f:
+            f.write(b'\x00asm')
+        self._docker = DockerClient(compose_files=[self._compose_file])
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_key_follows_setup(self):
+        key = snapshot_key(self._docker)
+        self.assertEqual(key, snapshot_key(self._docker))
+        self.assertNotEqual(key, snapshot_key(self._docker, self._runtime))
+        self.assertNotEqual(key, snapshot_key(self._docker, image_ids=['sha256:1234']))
+        self.assertNotEqual(
+            snapshot_key(self._docker, image_ids=['sha256:1234']),
+            snapshot_key(self._docker, image_ids=['sha256:5678']))
+        with open(self._compose_file, 'a') as f:
+            f.write('volumes: {}\n')
+        self.assertNotEqual(key, snapshot_key(self._docker))
+
+    def test_no_snapshot(self):
+        snapshot = ChainSnapshot(
+            self._docker, snapshot_root=os.path.join(self._dir.name, 'snapshots'), image_ids=['sha256:1234'])
+        self.assertFalse(snapshot.exists())
+        snapshot.clear()
@@ -1,21 +1,25 @@
 import unittest
 import time
+import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
-from tools.utils import WS_URL, get_chain, get_collators, get_block_height, get_account_balance, get_block_hash
+from tools.keypair_pool import fresh_keypairs
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, get_chain, get_collators, get_block_height, get_block_hash
+from tools.bulk_balance import get_account_balances_at
+from tools.balance_history import get_balance_history
 from tools.utils import KP_GLOBAL_SUDO, exist_pallet, KP_COLLATOR
 from tools.payload import sudo_call_compose, sudo_extrinsic_send, user_extrinsic_send
-from tools.utils import ExtrinsicBatch
-from tests.utils_func import restart_parachain_and_runtime_upgrade
+from tools.utils import ExtrinsicBatch, compose_fund_calls
+from tools.multi_signer import MultiSignerBatch
 import warnings
 
 
-@user_extrinsic_send
-def add_delegator(substrate, kp_delegator, addr_collator, stake_number):
-    return substrate.compose_call(
-        call_module='ParachainStaking',
-        call_function='join_delegators',
-        call_params={
+def compose_add_delegator(batch, kp_delegator, addr_collator, stake_number):
+    batch.compose_call(
+        kp_delegator,
+        'ParachainStaking',
+        'join_delegators',
+        {
             'collator': addr_collator,
             'amount': stake_number,
         })
@@ -68,30 +72,25 @@ def set_reward_rate(substrate, collator, delegator):
     )
 
 
+@pytest.mark.pristine_chain
+@pytest.mark.dirties_chain('StakingFixedRewardCalculator', 'ParachainStaking')
 class TestDelegator(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(
-            url=WS_URL,
-        )
+        self.substrate = get_substrate(WS_URL)
         self.chain_name = get_chain(self.substrate)
         self.collator = [KP_COLLATOR]
-        self.delegators = [
-            Keypair.create_from_mnemonic(Keypair.generate_mnemonic()),
-            Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
-        ]
-
-    def tearDown(self):
-        restart_parachain_and_runtime_upgrade()
+        self.delegators = fresh_keypairs(2)
 
-    def get_balance_difference(self, addr):
+    def get_balance_differences(self, addrs):
         current_height = get_block_height(self.substrate)
         current_block_hash = get_block_hash(self.substrate, current_height)
-        now_balance = get_account_balance(self.substrate, addr, current_block_hash)
-
-        previous_height = current_height - 1
-        previous_block_hash = get_block_hash(self.substrate, previous_height)
-        pre_balance = get_account_balance(self.substrate, addr, previous_block_hash)
-        return now_balance - pre_balance
+        previous_block_hash = get_block_hash(self.substrate, current_height - 1)
+        balances = get_account_balances_at(
+            self.substrate, addrs, [previous_block_hash, current_block_hash])
+        return [
+            balances[current_block_hash][addr].free - balances[previous_block_hash][addr].free
+            for addr in addrs
+        ]
 
     def get_one_collator_without_delegator(self, keys):
         for key in keys:
@@ -100,26 +99,28 @@ class TestDelegator(unittest.TestCase):
                 return collator
         return None
 
+    def add_delegators(self, addr_collator, stake_number):
+        batch = MultiSignerBatch(self.substrate)
+        for delegator in self.delegators:
+            compose_add_delegator(batch, delegator, addr_collator, stake_number)
+        for result in batch.execute().values():
+            self.assertTrue(result.receipt.is_success, f'Add delegator failed: {result.error_events}')
+
     def wait_get_reward(self, addr):
         time.sleep(12 * 2)
+        # Only balance changes after the wait count as reward
+        start_height = get_block_height(self.substrate)
         count_down = 0
         wait_time = 120
-        prev_balance = get_account_balance(self.substrate, addr)
         while count_down < wait_time:
-            if prev_balance != get_account_balance(self.substrate, addr):
+            history = get_balance_history(self.substrate, [addr], start_height, get_block_height(self.substrate))
+            if history.deltas_of(addr).any():
                 return True
             print(f'already wait about {count_down} seconds')
             count_down += 12
             time.sleep(12)
         return False
 
-    def batch_fund(self, batch, kp, amount):
-        batch.compose_sudo_call('Balances', 'force_set_balance', {
-            'who': kp.ss58_address,
-            'new_free': amount,
-            'new_reserved': 0
-        })
-
     def test_issue_fixed_precentage(self):
         if not exist_pallet(self.substrate, 'StakingFixedRewardCalculator'):
             warnings.warn('StakingFixedRewardCalculator pallet not exist, skip the test')
@@ -135,8 +136,7 @@ class TestDelegator(unittest.TestCase):
             'collator_rate': collator_percentage,
             'delegator_rate': delegator_percentage,
         })
-        self.batch_fund(batch, self.delegators[0], 10000 * 10 ** 18)
-        self.batch_fund(batch, self.delegators[1], 10000 * 10 ** 18)
+        compose_fund_calls(batch, {kp.ss58_address: 10000 * 10 ** 18 for kp in self.delegators})
         batch.execute_n_clear()
 
         # setup
@@ -145,16 +145,13 @@ class TestDelegator(unittest.TestCase):
         self.assertNotEqual(collator, None)
 
         # Add the delegator
-        receipt = add_delegator(self.substrate, self.delegators[0], str(collator['id']), int(str(collator['stake'])))
-        self.assertTrue(receipt.is_success, 'Add delegator failed')
-        receipt = add_delegator(self.substrate, self.delegators[1], str(collator['id']), int(str(collator['stake'])))
-        self.assertTrue(receipt.is_success, 'Add delegator failed')
+        self.add_delegators(str(collator['id']), int(str(collator['stake'])))
 
         print('Wait for delegator get reward')
         self.assertTrue(self.wait_get_reward(self.delegators[0].ss58_address))
 
-        delegators_reward = [self.get_balance_difference(delegator.ss58_address) for delegator in self.delegators]
-        collator_reward = self.get_balance_difference(str(collator['id']))
+        *delegators_reward, collator_reward = self.get_balance_differences(
+            [delegator.ss58_address for delegator in self.delegators] + [str(collator['id'])])
         self.assertEqual(delegators_reward[0], delegators_reward[1], 'The reward is not equal')
         self.assertEqual(collator_percentage / delegators_reward * sum(delegators_reward),
                          collator_reward, 'The reward is not equal')
@@ -180,9 +177,10 @@ class TestDelegator(unittest.TestCase):
         batch.compose_sudo_call('StakingCoefficientRewardCalculator', 'set_coefficient', {
             'coefficient': 2,
         })
-        self.batch_fund(batch, KP_COLLATOR, 20 * mega_tokens)
-        self.batch_fund(batch, self.delegators[0], 10 * mega_tokens)
-        self.batch_fund(batch, self.delegators[1], 10 * mega_tokens)
+        compose_fund_calls(batch, [
+            (KP_COLLATOR.ss58_address, 20 * mega_tokens),
+            (self.delegators[0].ss58_address, 10 * mega_tokens),
+            (self.delegators[1].ss58_address, 10 * mega_tokens)])
         bl_hash = batch.execute()
         self.assertTrue(bl_hash, 'Batch failed')
 
@@ -195,16 +193,13 @@ class TestDelegator(unittest.TestCase):
         self.assertNotEqual(collator, None)
 
         # Add the delegator
-        receipt = add_delegator(self.substrate, self.delegators[0], str(collator['id']), int(str(collator['stake'])))
-        self.assertTrue(receipt.is_success, 'Add delegator failed')
-        receipt = add_delegator(self.substrate, self.delegators[1], str(collator['id']), int(str(collator['stake'])))
-        self.assertTrue(receipt.is_success, 'Add delegator failed')
+        self.add_delegators(str(collator['id']), int(str(collator['stake'])))
 
         print('Wait for delegator get reward')
         self.assertTrue(self.wait_get_reward(self.delegators[0].ss58_address))
 
-        delegators_reward = [self.get_balance_difference(delegator.ss58_address) for delegator in self.delegators]
-        collator_reward = self.get_balance_difference(str(collator['id']))
+        *delegators_reward, collator_reward = self.get_balance_differences(
+            [delegator.ss58_address for delegator in self.delegators] + [str(collator['id'])])
         self.assertEqual(delegators_reward[0], delegators_reward[1], 'The reward is not equal')
         self.assertAlmostEqual(
             sum(delegators_reward) / collator_reward,
@@ -1,6 +1,8 @@
 import json
 
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import transfer, calculate_evm_account, calculate_evm_addr
 from tools.utils import WS_URL, ETH_URL, get_eth_chain_id
 from tools.peaq_eth_utils import call_eth_transfer_a_lot
@@ -98,9 +100,9 @@ def call_copy(w3, address, kp_src, eth_chain_id, file_name, data):
 
 class TestEVMEthRPC(unittest.TestCase):
     def setUp(self):
-        self._conn = SubstrateInterface(url=WS_URL)
+        self._conn = get_substrate(WS_URL)
         self._eth_chain_id = get_eth_chain_id(self._conn)
-        self._kp_src = Keypair.create_from_uri('//Alice')
+        self._kp_src = dev_keypair('//Alice')
         self._eth_src = calculate_evm_addr(self._kp_src.ss58_address)
         self._kp_eth_src = Keypair.create_from_mnemonic(MNEMONIC[0], crypto_type=KeypairType.ECDSA)
         self._kp_eth_dst = Keypair.create_from_mnemonic(MNEMONIC[1], crypto_type=KeypairType.ECDSA)
@@ -1,4 +1,5 @@
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, funds
 from tools.utils import calculate_evm_account, calculate_evm_addr
 from tools.peaq_eth_utils import get_eth_balance
@@ -95,8 +96,8 @@ def get_eth_contract_code(conn, contract_addr):
 
 class TestEVMSubstrateExtrinsic(unittest.TestCase):
     def setUp(self):
-        self._conn = SubstrateInterface(url=WS_URL)
-        self._kp_src = Keypair.create_from_uri('//Alice')
+        self._conn = get_substrate(WS_URL)
+        self._kp_src = dev_keypair('//Alice')
         self._eth_src = calculate_evm_addr(self._kp_src.ss58_address)
         self._eth_deposited_src = calculate_evm_account(self._eth_src)
 
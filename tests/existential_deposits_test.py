@@ -1,5 +1,6 @@
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair, fresh_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, RELAYCHAIN_WS_URL
 from tools.utils import transfer, TOKEN_NUM_BASE
 from tools.payload import user_extrinsic_send
@@ -92,15 +93,15 @@ class TestExitentialDeposits(unittest.TestCase):
         return result.value['free']
 
     def send_relaychain_token(self, kp):
-        relay_substrate = SubstrateInterface(url=RELAYCHAIN_WS_URL, type_registry_preset='rococo')
+        relay_substrate = get_substrate(RELAYCHAIN_WS_URL, type_registry_preset='rococo')
         parachain_id = get_parachain_id(self.substrate)
         receipt = send_from_xcm(relay_substrate, kp, parachain_id)
         return receipt
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL,)
-        self.alice = Keypair.create_from_uri('//Alice')
-        self.kp = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
+        self.substrate = get_substrate(WS_URL)
+        self.alice = dev_keypair('//Alice')
+        self.kp = fresh_keypair()
 
     def test_local_token(self):
         token = self.get_existential_deposit()
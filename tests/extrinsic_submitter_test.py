@@ -0,0 +1,46 @@
+import unittest
+
+from tools.keypair_pool import fresh_keypair
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, KP_GLOBAL_SUDO, TOKEN_NUM_BASE_DEV
+from tools.utils import get_account_balance
+from tools.extrinsic_submitter import ExtrinsicSubmitter
+
+TX_NUM = 10
+WAIT_TIMEOUT = 12 * 6
+
+
+class TestExtrinsicSubmitter(unittest.TestCase):
+    def setUp(self):
+        self.substrate = get_substrate(WS_URL)
+        self.kp_dst = fresh_keypair()
+
+    def compose_transfer(self, amount):
+        return self.substrate.compose_call(
+            call_module='Balances',
+            call_function='transfer',
+            call_params={
+                'dest': self.kp_dst.ss58_address,
+                'value': amount,
+            })
+
+    def test_submit_many(self):
+        with ExtrinsicSubmitter(WS_URL) as submitter:
+            futures = [
+                submitter.submit_call(KP_GLOBAL_SUDO, self.compose_transfer(TOKEN_NUM_BASE_DEV))
+                for _ in range(TX_NUM)]
+            receipts = submitter.wait_all(futures, WAIT_TIMEOUT)
+
+        for receipt in receipts:
+            self.assertTrue(receipt.is_success, f'transfer failed: {receipt.error_message}')
+        self.assertLessEqual(len(set(receipt.block_hash for receipt in receipts)), 2)
+        self.assertEqual(
+            get_account_balance(self.substrate, self.kp_dst.ss58_address),
+            TX_NUM * TOKEN_NUM_BASE_DEV)
+
+    def test_submit_finalized(self):
+        with ExtrinsicSubmitter(WS_URL) as submitter:
+            future = submitter.submit_batch(KP_GLOBAL_SUDO, [self.compose_transfer(TOKEN_NUM_BASE_DEV)], True)
+            receipt = future.result(WAIT_TIMEOUT)
+        self.assertTrue(receipt.finalized)
+        self.assertTrue(receipt.is_success, f'transfer failed: {receipt.error_message}')
@@ -0,0 +1,105 @@
+import csv
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from websocket import WebSocketTimeoutException
+from tools.keypair_pool import fresh_keypair
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, KP_GLOBAL_SUDO, transfer_with_tip, wait_for_n_blocks
+from tools.extrinsic_timeline import TIMELINE, PHASES, ExtrinsicStatusError
+
+
+class FakeSubstrate:
+    """Replays status updates of author_submitAndWatchExtrinsic, and times out after the last one"""
+    url = 'ws://127.0.0.1:1'
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.unwatched = []
+        self.websocket = mock.Mock()
+
+    def rpc_request(self, method, params, result_handler=None):
+        if method == 'author_unwatchExtrinsic':
+            self.unwatched.extend(params)
+            return {'result': True}
+        for nr, status in enumerate(self.statuses):
+            result = result_handler({'params': {'result': status, 'subscription': 'sub'}}, nr, 'sub')
+            if result is not None:
+                return result
+        raise WebSocketTimeoutException('timed out')
+
+
+class TestExtrinsicTimeline(unittest.TestCase):
+    def setUp(self):
+        self.substrate = get_substrate(WS_URL)
+        TIMELINE.clear()
+        TIMELINE.enable()
+
+    def tearDown(self):
+        TIMELINE.disable()
+        TIMELINE.clear()
+
+    def test_phases(self):
+        kp_dst = fresh_keypair()
+        receipt = transfer_with_tip(self.substrate, KP_GLOBAL_SUDO, kp_dst.ss58_address, 10, 1)
+        self.assertTrue(receipt.is_success, f'Failed to transfer: {receipt.error_message}')
+        transfer_with_tip(self.substrate, KP_GLOBAL_SUDO, kp_dst.ss58_address, 10, 1, wait_for_inclusion=False)
+        # Inclusion of the second and finalization are followed by the block subscription
+        wait_for_n_blocks(self.substrate, 6)
+
+        path = os.path.join(tempfile.mkdtemp(), 'timeline.csv')
+        TIMELINE.export(path)
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2)
+        for row in rows:
+            self.assertEqual(row['description'], 'Balances.transfer')
+            self.assertEqual(row['error'], '')
+            self.assertNotEqual(row['block_number'], '')
+            self.assertNotEqual(row['extrinsic_idx'], '')
+            times = [float(row[phase]) for phase in PHASES]
+            self.assertEqual(times, sorted(times))
+        self.assertEqual(rows[0]['block_hash'], receipt.block_hash)
+        self.assertEqual(len(TIMELINE.summary()['started->in_block']), 2)
+
+
+class TestExtrinsicStatus(unittest.TestCase):
+    def setUp(self):
+        self.extrinsic = types.SimpleNamespace(data='0x00', extrinsic_hash=bytes(32), value={'nonce': 0})
+        TIMELINE.clear()
+        TIMELINE.enable()
+
+    def tearDown(self):
+        TIMELINE.disable()
+        TIMELINE.clear()
+
+    def _submit(self, substrate, record=None):
+        return TIMELINE.submit_extrinsic(substrate, self.extrinsic, record, True, record is not None)
+
+    def test_in_block(self):
+        substrate = FakeSubstrate(['ready', {'inBlock': '0x01'}])
+        receipt = self._submit(substrate)
+        self.assertEqual(receipt.block_hash, '0x01')
+        self.assertFalse(receipt.finalized)
+        self.assertEqual(substrate.unwatched, ['sub'])
+
+    def test_failed_status(self):
+        for status, unwatched in [('future', ['sub']), ('invalid', []), ('dropped', []), ({'usurped': '0x02'}, [])]:
+            substrate = FakeSubstrate(['ready', status, {'inBlock': '0x01'}])
+            record = TIMELINE.start(substrate, types.SimpleNamespace(ss58_address='addr'), mock.Mock())
+            with self.assertRaises(ExtrinsicStatusError) as context:
+                self._submit(substrate, record)
+            name = status if isinstance(status, str) else 'usurped'
+            self.assertEqual(context.exception.status, name)
+            self.assertEqual(record['error'], name)
+            self.assertEqual(substrate.unwatched, unwatched)
+
+    def test_timeout(self):
+        substrate = FakeSubstrate(['ready'])
+        with self.assertRaises(ExtrinsicStatusError) as context:
+            self._submit(substrate)
+        self.assertEqual(context.exception.status, 'timeout')
+        substrate.websocket.close.assert_called_once_with()
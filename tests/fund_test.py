@@ -1,13 +1,43 @@
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
-from tools.utils import WS_URL, TOKEN_NUM_BASE
-from tools.utils import fund, get_account_balance
+from tools.keypair_pool import dev_keypair, fresh_keypairs
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, TOKEN_NUM_BASE, TOKEN_NUM_BASE_DEV, KP_GLOBAL_SUDO
+from tools.utils import fund, funds, get_account_balance, fund_accounts, compose_fund_calls, ExtrinsicBatch
+from tools.bulk_balance import get_account_balances
 
 
 class TestFund(unittest.TestCase):
     def test_fund(self):
-        substrate = SubstrateInterface(url=WS_URL)
-        kp_dst = Keypair.create_from_uri('//Bob')
+        substrate = get_substrate(WS_URL)
+        kp_dst = dev_keypair('//Bob')
         receipt = fund(substrate, kp_dst, 500)
         self.assertTrue(receipt.is_success, f'fund failed: {receipt.error_message}')
         self.assertEqual(get_account_balance(substrate, kp_dst.ss58_address), 500 * TOKEN_NUM_BASE)
+
+    def test_fund_accounts(self):
+        substrate = get_substrate(WS_URL)
+        addrs = [kp.ss58_address for kp in fresh_keypairs(200)]
+        targets = [(addr, TOKEN_NUM_BASE_DEV) for addr in addrs]
+        # Duplicates take the highest target
+        targets.append((addrs[0], 2 * TOKEN_NUM_BASE_DEV))
+        self.assertTrue(fund_accounts(substrate, targets))
+
+        balances = get_account_balances(substrate, addrs)
+        self.assertEqual(balances[addrs[0]].free, 2 * TOKEN_NUM_BASE_DEV)
+        for addr in addrs[1:]:
+            self.assertEqual(balances[addr].free, TOKEN_NUM_BASE_DEV)
+
+        # Funded accounts are skipped
+        batch = ExtrinsicBatch(substrate, KP_GLOBAL_SUDO)
+        self.assertEqual(compose_fund_calls(batch, targets), 0)
+        self.assertEqual(fund_accounts(substrate, targets), '')
+
+    def test_funds_exact(self):
+        substrate = get_substrate(WS_URL)
+        addrs = [kp.ss58_address for kp in fresh_keypairs(2)]
+        self.assertTrue(fund_accounts(substrate, {addrs[0]: 2 * TOKEN_NUM_BASE_DEV}))
+        # funds() also sets the balance of accounts with more
+        self.assertTrue(funds(substrate, addrs, TOKEN_NUM_BASE_DEV))
+        balances = get_account_balances(substrate, addrs)
+        for addr in addrs:
+            self.assertEqual(balances[addr].free, TOKEN_NUM_BASE_DEV)
@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from substrateinterface import Keypair, KeypairType
+from tools.keypair_pool import KeypairPool
+
+
+def _take_fresh(cache_dir):
+    return [kp.ss58_address for kp in KeypairPool(cache_dir, batch_size=8).fresh_many(8)]
+
+
+class TestKeypairPool(unittest.TestCase):
+    def setUp(self):
+        self._cache_dir = tempfile.mkdtemp()
+        self._pool = KeypairPool(self._cache_dir, batch_size=8)
+
+    def test_dev_same_as_uri(self):
+        for uri in ['//Alice', '//Bob//stash']:
+            kp = self._pool.dev(uri)
+            self.assertEqual(kp.ss58_address, Keypair.create_from_uri(uri).ss58_address)
+            # Another process rebuilds the keypair from the disk cache
+            cached = KeypairPool(self._cache_dir).dev(uri)
+            self.assertEqual(cached.ss58_address, kp.ss58_address)
+            self.assertTrue(kp.verify('peaq', cached.sign('peaq')))
+
+    def test_fresh_from_seed(self):
+        kp = self._pool.fresh()
+        self.assertEqual(kp.ss58_address, Keypair.create_from_seed(kp.seed_hex).ss58_address)
+        kp = self._pool.fresh(KeypairType.ECDSA)
+        self.assertEqual(
+            kp.ss58_address,
+            Keypair(private_key=kp.seed_hex, crypto_type=KeypairType.ECDSA).ss58_address)
+
+    def test_fresh_unique_across_processes(self):
+        with ProcessPoolExecutor(4) as executor:
+            addrs = sum(executor.map(_take_fresh, [self._cache_dir] * 8), [])
+        addrs += [kp.ss58_address for kp in self._pool.fresh_many(20)]
+        self.assertEqual(len(addrs), len(set(addrs)))
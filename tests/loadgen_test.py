@@ -0,0 +1,25 @@
+import unittest
+
+from tools.utils import WS_URL
+from tools.loadgen import LoadGenerator
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def _run(self, workload):
+        generator = LoadGenerator(WS_URL, workload, senders=4)
+        generator.prepare()
+        report = generator.run(rate=5, duration=4)
+        report.show()
+        self.assertEqual(len(report.samples), 20)
+        self.assertEqual(len(report.included), 20, f'Not all extrinsics included: {report.rejected}')
+        self.assertEqual(report.failed, 0)
+        self.assertEqual(sum(report.block_counts.values()), 20)
+        self.assertGreater(report.achieved_tps, 0)
+        return report
+
+    def test_transfer(self):
+        self._run('transfer')
+
+    def test_mixed(self):
+        report = self._run('mixed')
+        self.assertEqual({s.workload for s in report.samples}, {'transfer', 'did', 'evm'})
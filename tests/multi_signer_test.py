@@ -0,0 +1,74 @@
+import types
+import unittest
+from unittest import mock
+
+from tools.extrinsic_submitter import ExtrinsicSubmitter
+from tools.keypair_pool import fresh_keypair
+from tools.multi_signer import MultiSignerBatch
+from tools.substrate_pool import SUBSTRATE_POOL
+
+FAKE_URL = 'ws://127.0.0.1:1'
+
+
+class FakeSubstrate:
+    """Answers the nonce and submission requests, and composes calls as plain values"""
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.websocket = types.SimpleNamespace(connected=True)
+        self.submitted = []
+
+    def compose_call(self, call_module, call_function, call_params):
+        return types.SimpleNamespace(value={
+            'call_module': call_module, 'call_function': call_function, 'call_args': call_params})
+
+    def rpc_request(self, method, params, result_handler=None):
+        if method == 'author_submitExtrinsic':
+            self.submitted.append(params[0])
+        return {'result': 0}
+
+    def close(self):
+        self.websocket.connected = False
+
+
+def _sign(substrate, keypair, call, nonce, **kwargs):
+    return types.SimpleNamespace(data=f'0x{keypair.public_key.hex()}', extrinsic_hash=keypair.public_key)
+
+
+def _receipts(futures, timeout=None):
+    return [mock.Mock(block_hash=None) for _ in futures]
+
+
+class TestMultiSignerBatch(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            mock.patch('tools.substrate_pool.SubstrateInterface', FakeSubstrate),
+            mock.patch('tools.substrate_pool.attach_metadata_cache', lambda substrate: substrate),
+            mock.patch('tools.extrinsic_submitter.get_block_subscription'),
+            mock.patch('tools.nonce_manager.OFFLINE_SIGNER.sign', _sign),
+            mock.patch.object(ExtrinsicSubmitter, 'wait_all', staticmethod(_receipts)),
+            mock.patch('tools.multi_signer.cached_get_events', return_value=[]),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        SUBSTRATE_POOL.reset([FAKE_URL])
+
+    def _execute(self, keypairs):
+        batch = MultiSignerBatch(FAKE_URL)
+        for keypair in keypairs:
+            batch.add(keypair, [{'call_module': 'System', 'call_function': 'remark', 'call_args': {'remark': '0x'}}])
+        return batch.execute()
+
+    def test_connections_returned_to_pool(self):
+        keypairs = [fresh_keypair() for _ in range(3)]
+        self._execute(keypairs)
+        connections = list(SUBSTRATE_POOL._connections)
+        results = self._execute(keypairs)
+        self.assertEqual(SUBSTRATE_POOL._connections, connections)
+        self.assertEqual(set(results.keys()), {keypair.ss58_address for keypair in keypairs})
+        submitted = [data for substrate in connections for data in substrate.submitted]
+        self.assertEqual(sorted(submitted), sorted([f'0x{keypair.public_key.hex()}' for keypair in keypairs] * 2))
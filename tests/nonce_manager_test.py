@@ -0,0 +1,105 @@
+import types
+import unittest
+from unittest import mock
+
+from tools.extrinsic_timeline import ExtrinsicStatusError
+from tools.keypair_pool import fresh_keypair
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, KP_GLOBAL_SUDO, TOKEN_NUM_BASE_DEV
+from tools.utils import fund, transfer, wait_for_n_blocks
+from tools.nonce_manager import NONCE_MANAGER, submit_with_nonce
+
+PIPELINED_TX_NUM = 5
+
+
+class FakeSubstrate:
+    url = 'ws://127.0.0.1:1'
+
+    def __init__(self, chain_nonce):
+        self.chain_nonce = chain_nonce
+
+    def rpc_request(self, method, params, result_handler=None):
+        return {'result': self.chain_nonce}
+
+
+class TestNonceManager(unittest.TestCase):
+    def setUp(self):
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = fresh_keypair()
+        self.kp_dst = fresh_keypair()
+        receipt = fund(self.substrate, self.kp_src, 1000 * TOKEN_NUM_BASE_DEV)
+        self.assertTrue(receipt.is_success, f'fund failed: {receipt.error_message}')
+
+    def test_pipelined_transfers(self):
+        start_nonce = self.substrate.get_account_nonce(self.kp_src.ss58_address)
+        for _ in range(PIPELINED_TX_NUM):
+            receipt = transfer(self.substrate, self.kp_src, self.kp_dst.ss58_address, 1,
+                               TOKEN_NUM_BASE_DEV, wait_for_inclusion=False)
+            self.assertIsNone(receipt.block_hash)
+            self.assertTrue(receipt.extrinsic_hash)
+
+        wait_for_n_blocks(self.substrate, 2)
+        self.assertEqual(
+            self.substrate.get_account_nonce(self.kp_src.ss58_address),
+            start_nonce + PIPELINED_TX_NUM)
+
+    def test_resync_after_external_submission(self):
+        transfer(self.substrate, KP_GLOBAL_SUDO, self.kp_dst.ss58_address, 1, TOKEN_NUM_BASE_DEV)
+        # Bypass the manager, so that its local nonce is stale
+        extrinsic = self.substrate.create_signed_extrinsic(
+            call=self.substrate.compose_call('Balances', 'transfer', {
+                'dest': self.kp_dst.ss58_address,
+                'value': TOKEN_NUM_BASE_DEV,
+            }),
+            keypair=KP_GLOBAL_SUDO)
+        self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+
+        receipt = transfer(self.substrate, KP_GLOBAL_SUDO, self.kp_dst.ss58_address, 1, TOKEN_NUM_BASE_DEV)
+        self.assertTrue(receipt.is_success, f'transfer failed: {receipt.error_message}')
+        self.assertEqual(
+            NONCE_MANAGER.resync(self.substrate, KP_GLOBAL_SUDO),
+            self.substrate.get_account_nonce(KP_GLOBAL_SUDO.ss58_address))
+
+
+class TestNonceRecovery(unittest.TestCase):
+    def setUp(self):
+        self.substrate = FakeSubstrate(5)
+        self.keypair = fresh_keypair()
+        self.sign = mock.patch('tools.nonce_manager.OFFLINE_SIGNER.sign', side_effect=self._sign)
+        self.sign.start()
+
+    def tearDown(self):
+        self.sign.stop()
+        NONCE_MANAGER.reset([self.substrate.url])
+
+    @staticmethod
+    def _sign(substrate, keypair, call, nonce, **kwargs):
+        return types.SimpleNamespace(nonce=nonce)
+
+    def test_resubmit_dropped(self):
+        submitted = []
+
+        def submit(extrinsic):
+            submitted.append(extrinsic.nonce)
+            if len(submitted) == 1:
+                raise ExtrinsicStatusError('dropped', '0x00')
+            return extrinsic.nonce
+
+        self.assertEqual(submit_with_nonce(self.substrate, self.keypair, None, submit=submit), 5)
+        self.assertEqual(submitted, [5, 5])
+        self.assertEqual(NONCE_MANAGER.next_nonce(self.substrate, self.keypair), 6)
+
+    def test_future_raises_after_resync(self):
+        submit = mock.Mock(side_effect=ExtrinsicStatusError('future', '0x00'))
+        self.assertEqual(NONCE_MANAGER.next_nonce(self.substrate, self.keypair), 5)
+        with self.assertRaises(ExtrinsicStatusError):
+            submit_with_nonce(self.substrate, self.keypair, None, submit=submit)
+        submit.assert_called_once()
+        self.assertEqual(NONCE_MANAGER.next_nonce(self.substrate, self.keypair), 5)
+
+    def test_forget_after_other_error(self):
+        submit = mock.Mock(side_effect=ConnectionError('closed'))
+        with self.assertRaises(ConnectionError):
+            submit_with_nonce(self.substrate, self.keypair, None, submit=submit)
+        self.substrate.chain_nonce = 6
+        self.assertEqual(NONCE_MANAGER.next_nonce(self.substrate, self.keypair), 6)
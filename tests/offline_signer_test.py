@@ -0,0 +1,59 @@
+import unittest
+
+from scalecodec.base import ScaleBytes
+from tools.keypair_pool import fresh_keypair
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, KP_GLOBAL_SUDO, TOKEN_NUM_BASE_DEV, fund
+from tools.nonce_manager import NONCE_MANAGER
+from tools.offline_signer import OFFLINE_SIGNER
+from tools.bulk_balance import get_account_balances
+
+
+class TestOfflineSigner(unittest.TestCase):
+    def setUp(self):
+        self.substrate = get_substrate(WS_URL)
+
+    def _transfer_call(self, addr, value):
+        return self.substrate.compose_call(
+            call_module='Balances',
+            call_function='transfer',
+            call_params={'dest': addr, 'value': value})
+
+    def test_same_as_online(self):
+        kp_dst = fresh_keypair()
+        call = self._transfer_call(kp_dst.ss58_address, 1)
+        context = OFFLINE_SIGNER.context(self.substrate)
+        offline = OFFLINE_SIGNER.sign(self.substrate, KP_GLOBAL_SUDO, call, 0)
+        online = self.substrate.create_signed_extrinsic(
+            call=call, keypair=KP_GLOBAL_SUDO, nonce=0,
+            era={'period': context.era_period, 'current': context.era_current})
+        # sr25519 signatures are randomized, everything else is the same
+        for key in ['account_id', 'era', 'nonce', 'tip', 'call_module', 'call_function']:
+            self.assertEqual(offline.value[key], online.value[key])
+
+    def test_submit(self):
+        kp_src, kp_dst = fresh_keypair(), fresh_keypair()
+        fund(self.substrate, kp_src, TOKEN_NUM_BASE_DEV)
+        call = self._transfer_call(kp_dst.ss58_address, 10 ** 15)
+        extrinsic = OFFLINE_SIGNER.sign(
+            self.substrate, kp_src, call, NONCE_MANAGER.next_nonce(self.substrate, kp_src))
+        receipt = self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+        self.assertTrue(receipt.is_success, f'Offline signed extrinsic failed: {receipt.error_message}')
+
+    def test_sign_many(self):
+        kp_src = fresh_keypair()
+        fund(self.substrate, kp_src, TOKEN_NUM_BASE_DEV)
+        kp_dsts = [fresh_keypair() for _ in range(8)]
+        calls = [self._transfer_call(kp.ss58_address, 10 ** 15) for kp in kp_dsts]
+        nonces = [NONCE_MANAGER.next_nonce(self.substrate, kp_src) for _ in calls]
+        hex_extrinsics = OFFLINE_SIGNER.sign_many(WS_URL, kp_src, calls, nonces, processes=2)
+        self.assertEqual(len(hex_extrinsics), len(calls))
+
+        for data in hex_extrinsics[:-1]:
+            self.substrate.rpc_request('author_submitExtrinsic', [data])
+        extrinsic = self.substrate.create_scale_object('Extrinsic', metadata=self.substrate.metadata)
+        extrinsic.decode(data=ScaleBytes(hex_extrinsics[-1]))
+        receipt = self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+        self.assertTrue(receipt.is_success, f'Offline signed extrinsic failed: {receipt.error_message}')
+        balances = get_account_balances(self.substrate, [kp.ss58_address for kp in kp_dsts])
+        self.assertTrue(all(balance.free == 10 ** 15 for balance in balances.values()))
@@ -1,19 +1,22 @@
 import time
 
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL
 from tools.utils import set_max_currency_supply, set_block_reward_configuration
 import unittest
+import pytest
 
 COLLATOR_REWARD_RATE = 0.1
 WAIT_TIME_PERIOD = 12 * 3
 
 
+@pytest.mark.dirties_chain('BlockReward')
 class TestPalletBlockReward(unittest.TestCase):
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
-        self.kp_src = Keypair.create_from_uri('//Alice')
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = dev_keypair('//Alice')
 
     def test_config(self):
         set_value = {
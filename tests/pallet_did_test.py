@@ -1,7 +1,8 @@
 import unittest
 import time
 
-from substrateinterface import SubstrateInterface, Keypair
+from tools.parallel_workers import worker_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL
 from tools.utils import ExtrinsicBatch
 
@@ -39,8 +40,8 @@ def did_remove(batch, kp_src, name):
 
 class TestPalletDid(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
-        self.kp_src = Keypair.create_from_uri('//Alice')
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = worker_keypair('//Alice')
 
     def did_rpc_read(self, substrate, kp_src, name):
         bl_hsh = substrate.get_block_hash(None)
@@ -1,5 +1,6 @@
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from tools.parallel_workers import worker_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import TOKEN_NUM_BASE, calculate_multi_sig, WS_URL
 from tools.utils import transfer, show_account, send_approval, send_proposal, get_as_multi_extrinsic_id
 import random
@@ -8,9 +9,9 @@ import random
 class PalletMultisig(unittest.TestCase):
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL,)
-        self.kp_src = Keypair.create_from_uri('//Alice')
-        self.kp_dst = Keypair.create_from_uri('//Bob//stash')
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = worker_keypair('//Alice')
+        self.kp_dst = worker_keypair('//Bob//stash')
 
     def test_multisig(self):
         threshold = 2
@@ -1,12 +1,13 @@
 import traceback
 import sys
 
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import fresh_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, fund
 from tools.payload import user_extrinsic_send
 import unittest
 
-KP_TEST = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
+KP_TEST = fresh_keypair()
 RANDOM_PREFIX = KP_TEST.public_key.hex()[2:26]
 
 ##############################################################################
@@ -489,7 +490,7 @@ class TestPalletRBAC(unittest.TestCase):
         show_success_msg('verify_rpc_fail_disabled_id')
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
 
     def test_pallet_rbac(self):
         print('---- pallet_rbac_test!! ----')
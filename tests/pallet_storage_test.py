@@ -1,6 +1,7 @@
 import time
+from tools.parallel_workers import worker_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL
-from substrateinterface import SubstrateInterface, Keypair
 from tools.utils import ExtrinsicBatch
 
 import unittest
@@ -21,10 +22,10 @@ def storage_rpc_read(substrate, kp_src, item_type):
 class TestPalletStorage(unittest.TestCase):
 
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
 
     def test_storage(self):
-        kp_src = Keypair.create_from_uri('//Alice')
+        kp_src = worker_keypair('//Alice')
         batch = ExtrinsicBatch(self._substrate, kp_src)
         item_type = f'0x{int(time.time())}'
         item = '0x032132'
@@ -42,7 +43,7 @@ class TestPalletStorage(unittest.TestCase):
         self.assertEqual(storage_rpc_read(self._substrate, kp_src, item_type), item)
 
     def test_storage_update(self):
-        kp_src = Keypair.create_from_uri('//Alice')
+        kp_src = worker_keypair('//Alice')
         batch = ExtrinsicBatch(self._substrate, kp_src)
         item_type = f'0x{int(time.time())}'
         item = '0x032132'
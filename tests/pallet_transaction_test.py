@@ -1,5 +1,6 @@
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL
 from tools.payload import user_extrinsic_send
 
@@ -47,9 +48,9 @@ def service_deliver(substrate, kp_src, kp_dst, receipt, call):
 
 class TestPalletTransaction(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
-        self.kp_src = Keypair.create_from_uri('//Alice')
-        self.kp_dst = Keypair.create_from_uri('//Bob//stash')
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = dev_keypair('//Alice')
+        self.kp_dst = dev_keypair('//Bob//stash')
 
     def test_transaction(self):
         # fund(substrate, kp_src, 500)
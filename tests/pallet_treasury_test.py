@@ -1,8 +1,11 @@
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import show_extrinsic, WS_URL, TOKEN_NUM_BASE_DEV, KP_GLOBAL_SUDO
-from tools.utils import ExtrinsicBatch
+from tools.utils import ExtrinsicBatch, compose_fund_calls
+from tools.multi_signer import MultiSignerBatch
 from tools.payload import sudo_call_compose, sudo_extrinsic_send, user_extrinsic_send
 import unittest
+import pytest
 
 # Assumptions
 # 1. Treasury address is:'5EYCAe5ijiYfyeZ2JJCGq56LmPyNRAKzpG4QkoQkkQNB5e6Z'
@@ -10,10 +13,10 @@ import unittest
 # Global Constants
 
 # accounts to carty out diffirent transactions
-KP_USER = Keypair.create_from_uri('//Alice')
-KP_COUNCIL_FIRST_MEMBER = Keypair.create_from_uri('//Bob')
-KP_COUNCIL_SECOND_MEMBER = Keypair.create_from_uri('//Eve')
-KP_BENEFICIARY = Keypair.create_from_uri('//Dave')
+KP_USER = dev_keypair('//Alice')
+KP_COUNCIL_FIRST_MEMBER = dev_keypair('//Bob')
+KP_COUNCIL_SECOND_MEMBER = dev_keypair('//Eve')
+KP_BENEFICIARY = dev_keypair('//Dave')
 KP_TREASURY = '5EYCAe5ijiYfyeZ2JJCGq56LmPyNRAKzpG4QkoQkkQNB5e6Z'
 
 WEIGHT_BOND = {
@@ -27,12 +30,12 @@ TOTAL_AMOUNT = 20 ** 5 * 10 ** 18
 DIVISION_FACTOR = pow(10, 7)
 
 
-@user_extrinsic_send
-def cast_vote(substrate, kp_member, proposal_hash, proposal_index, vote):
-    return substrate.compose_call(
-        call_module='Council',
-        call_function='vote',
-        call_params={
+def compose_vote(batch, kp_member, proposal_hash, proposal_index, vote):
+    batch.compose_call(
+        kp_member,
+        'Council',
+        'vote',
+        {
             'proposal': proposal_hash,
             'index': proposal_index,
             'approve': vote
@@ -77,9 +80,10 @@ def spend(substrate, value, beneficiary):
         })
 
 
+@pytest.mark.dirties_chain('Council')
 class TestTreasury(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
 
     # To submit a spend proposal
     def propose_spend(self, value, beneficiary, kp_member):
@@ -135,24 +139,15 @@ class TestTreasury(unittest.TestCase):
                                                            KP_USER)
 
         # To submit votes by all council member to APPORVE the motion
-        receipt = cast_vote(self.substrate, KP_USER, proposal_hash, proposal_index, True)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
-
-        receipt = cast_vote(self.substrate, KP_COUNCIL_FIRST_MEMBER, proposal_hash,
-                            proposal_index,
-                            True)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
-
-        receipt = cast_vote(self.substrate, KP_COUNCIL_SECOND_MEMBER, proposal_hash,
-                            proposal_index,
-                            False)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
+        # All council members vote in the same block
+        batch = MultiSignerBatch(self.substrate)
+        compose_vote(batch, KP_USER, proposal_hash, proposal_index, True)
+        compose_vote(batch, KP_COUNCIL_FIRST_MEMBER, proposal_hash, proposal_index, True)
+        compose_vote(batch, KP_COUNCIL_SECOND_MEMBER, proposal_hash, proposal_index, False)
+        for result in batch.execute().values():
+            self.assertTrue(result.receipt.is_success,
+                            f'Extrinsic Failed: {result.receipt.error_message}' +
+                            f'{result.error_events}')
 
         # To close voting processes
         receipt = close_vote(self.substrate, KP_COUNCIL_FIRST_MEMBER, proposal_hash,
@@ -171,26 +166,15 @@ class TestTreasury(unittest.TestCase):
                                                            KP_USER)
 
         # To submit votes by all council member to REJECT the proposal
-        receipt = cast_vote(self.substrate, KP_USER, proposal_hash,
-                            proposal_index,
-                            True)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
-
-        receipt = cast_vote(self.substrate, KP_COUNCIL_FIRST_MEMBER, proposal_hash,
-                            proposal_index,
-                            False)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
-
-        receipt = cast_vote(self.substrate, KP_COUNCIL_SECOND_MEMBER, proposal_hash,
-                            proposal_index,
-                            False)
-        self.assertTrue(receipt.is_success,
-                        f'Extrinsic Failed: {receipt.error_message}' +
-                        f'{self.substrate.get_events(receipt.block_hash)}')
+        # All council members vote in the same block
+        batch = MultiSignerBatch(self.substrate)
+        compose_vote(batch, KP_USER, proposal_hash, proposal_index, True)
+        compose_vote(batch, KP_COUNCIL_FIRST_MEMBER, proposal_hash, proposal_index, False)
+        compose_vote(batch, KP_COUNCIL_SECOND_MEMBER, proposal_hash, proposal_index, False)
+        for result in batch.execute().values():
+            self.assertTrue(result.receipt.is_success,
+                            f'Extrinsic Failed: {result.receipt.error_message}' +
+                            f'{result.error_events}')
 
         # To close voting processes
         receipt = close_vote(self.substrate, KP_COUNCIL_SECOND_MEMBER, proposal_hash,
@@ -240,21 +224,14 @@ class TestTreasury(unittest.TestCase):
 
         print('✅ Reward distributed to treasury as expected')
 
-    def batch_fund(self, batch, kp, amount):
-        batch.compose_sudo_call('Balances', 'force_set_balance', {
-            'who': kp.ss58_address,
-            'new_free': amount,
-            'new_reserved': 0
-        })
-
     def test_tresury_approve(self):
         print('----Start of pallet_treasury_test!! ----')
         print()
 
         batch = ExtrinsicBatch(self.substrate, KP_GLOBAL_SUDO)
-        self.batch_fund(batch, KP_USER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_FIRST_MEMBER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_SECOND_MEMBER, TOTAL_AMOUNT)
+        compose_fund_calls(batch, {
+            kp.ss58_address: TOTAL_AMOUNT
+            for kp in [KP_USER, KP_COUNCIL_FIRST_MEMBER, KP_COUNCIL_SECOND_MEMBER]})
 
         print("--set member test started---")
         council_members = [KP_USER.ss58_address,
@@ -282,9 +259,9 @@ class TestTreasury(unittest.TestCase):
         print()
 
         batch = ExtrinsicBatch(self.substrate, KP_GLOBAL_SUDO)
-        self.batch_fund(batch, KP_USER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_FIRST_MEMBER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_SECOND_MEMBER, TOTAL_AMOUNT)
+        compose_fund_calls(batch, {
+            kp.ss58_address: TOTAL_AMOUNT
+            for kp in [KP_USER, KP_COUNCIL_FIRST_MEMBER, KP_COUNCIL_SECOND_MEMBER]})
 
         print("--set member test started---")
         council_members = [KP_USER.ss58_address,
@@ -309,9 +286,9 @@ class TestTreasury(unittest.TestCase):
         print()
 
         batch = ExtrinsicBatch(self.substrate, KP_GLOBAL_SUDO)
-        self.batch_fund(batch, KP_USER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_FIRST_MEMBER, TOTAL_AMOUNT)
-        self.batch_fund(batch, KP_COUNCIL_SECOND_MEMBER, TOTAL_AMOUNT)
+        compose_fund_calls(batch, {
+            kp.ss58_address: TOTAL_AMOUNT
+            for kp in [KP_USER, KP_COUNCIL_FIRST_MEMBER, KP_COUNCIL_SECOND_MEMBER]})
 
         print("--set member test started---")
         council_members = [KP_USER.ss58_address,
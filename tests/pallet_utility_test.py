@@ -1,10 +1,18 @@
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import fresh_keypairs
+from tools.parallel_workers import worker_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import show_extrinsic, WS_URL, TOKEN_NUM_BASE
-from tools.utils import show_account
+from tools.utils import show_account, KP_GLOBAL_SUDO, ExtrinsicBatch, TOKEN_NUM_BASE_DEV
+from tools.utils import split_batch, get_batch_limits, estimate_call_weight, SPLIT_MIN_CALLS
+from tools.bulk_balance import get_account_balances
+import types
 import unittest
+from unittest import mock
 
 # An arbitrary amount to be transfered from source to destination
 AMOUNT_TO_BE_TRANSFERED = 1
+# Accounts funded by one ExtrinsicBatch, which may be split into several batch_all
+SPLIT_ACCOUNT_NUM = 1000
 
 # a valid funds transfer transaction from src to dest with batch
 # after transaction, dest will be credited twice as AMOUNT_TO_BE_TRANSFERED
@@ -13,15 +21,13 @@ AMOUNT_TO_BE_TRANSFERED = 1
 class TestPalletUtility(unittest.TestCase):
 
     # source account
-    kp_src = Keypair.create_from_uri('//Alice')
+    kp_src = worker_keypair('//Alice')
     # destination account
-    kp_dst = Keypair.create_from_uri('//Eve')
+    kp_dst = worker_keypair('//Eve')
 
     def setUp(self):
         # deinfe a conneciton with a peaq-network node
-        self.substrate = SubstrateInterface(
-                url=WS_URL
-            )
+        self.substrate = get_substrate(WS_URL)
 
     def test_all_valid_extrinsics_bath(self):
         substrate = self.substrate
@@ -230,3 +236,53 @@ class TestPalletUtility(unittest.TestCase):
         show_extrinsic(receipt, 'batch')
         # since due to an invalid transation, all transactions will be reverted
         self.assertEqual(bal_dst_before, bal_dst_after)
+
+    def test_extrinsic_batch_split(self):
+        substrate = self.substrate
+        addrs = [kp.ss58_address for kp in fresh_keypairs(SPLIT_ACCOUNT_NUM)]
+        batch = ExtrinsicBatch(substrate, KP_GLOBAL_SUDO)
+        for addr in addrs:
+            batch.compose_sudo_call('Balances', 'force_set_balance', {
+                'who': addr,
+                'new_free': TOKEN_NUM_BASE_DEV,
+                'new_reserved': 0
+            })
+
+        max_ref_time, _, max_length = get_batch_limits(substrate)
+        chunks = split_batch(substrate, KP_GLOBAL_SUDO, batch.batch)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), SPLIT_ACCOUNT_NUM)
+        for chunk in chunks:
+            self.assertLessEqual(sum(estimate_call_weight(substrate, KP_GLOBAL_SUDO, c)[0] for c in chunk), max_ref_time)
+            self.assertLessEqual(sum(len(c.data) for c in chunk), max_length)
+
+        self.assertTrue(batch.execute_n_clear())
+        balances = get_account_balances(substrate, addrs)
+        for addr in addrs:
+            self.assertEqual(balances[addr].free, TOKEN_NUM_BASE_DEV)
+
+
+class TestSplitBatch(unittest.TestCase):
+    def setUp(self):
+        self.substrate = mock.Mock(url='ws://127.0.0.1:1', runtime_version=1)
+        self.substrate.get_payment_info.return_value = {'weight': {'ref_time': 10, 'proof_size': 0}}
+        self.limits = mock.patch('tools.utils.get_batch_limits', return_value=(100, 0, 10 ** 6))
+        self.limits.start()
+
+    def tearDown(self):
+        self.limits.stop()
+
+    @staticmethod
+    def _calls(num):
+        return [types.SimpleNamespace(data=bytes(num), value={'call_module': 'System', 'call_function': 'remark'})
+                for _ in range(num)]
+
+    def test_small_batch_without_estimates(self):
+        batch = self._calls(SPLIT_MIN_CALLS - 1)
+        self.assertEqual(split_batch(self.substrate, KP_GLOBAL_SUDO, batch), [batch])
+        self.substrate.get_payment_info.assert_not_called()
+
+    def test_large_batch_split_by_weight(self):
+        batch = self._calls(SPLIT_MIN_CALLS)
+        chunks = split_batch(self.substrate, KP_GLOBAL_SUDO, batch)
+        self.assertEqual([len(chunk) for chunk in chunks], [10] * (SPLIT_MIN_CALLS // 10))
+        self.assertEqual(self.substrate.get_payment_info.call_count, 1)
@@ -1,5 +1,6 @@
 import math
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import fresh_keypairs
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, TOKEN_NUM_BASE_DEV, KP_GLOBAL_SUDO
 from tools.utils import get_account_balance, get_account_balance_locked
 from tools.utils import funds
@@ -90,11 +91,8 @@ def get_schedule_index(substrate, kp_target):
 
 class TestPalletVesting(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._kp_user = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
-        self._kp_source = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
-        self._kp_target = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
-        self._kp_target_second = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
+        self._substrate = get_substrate(WS_URL)
+        self._kp_user, self._kp_source, self._kp_target, self._kp_target_second = fresh_keypairs(4)
 
     def vested_transfer_test(self, substrate, kp_user, kp_target):
 
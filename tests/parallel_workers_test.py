@@ -0,0 +1,39 @@
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from tools.keypair_pool import dev_keypair, fresh_keypair
+from tools.parallel_workers import WorkerLock, worker_uri, is_shared_keypair, PARALLEL
+
+
+def _hold_lock(lock_dir):
+    with WorkerLock('test', lock_dir):
+        started = time.time()
+        time.sleep(0.2)
+        return started, time.time()
+
+
+class TestParallelWorkers(unittest.TestCase):
+    def setUp(self):
+        self._lock_dir = tempfile.mkdtemp()
+
+    def test_lock_across_processes(self):
+        with ProcessPoolExecutor(3) as executor:
+            spans = sorted(executor.map(_hold_lock, [self._lock_dir] * 3))
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            self.assertLessEqual(end, start)
+
+    def test_lock_reentrant(self):
+        lock = WorkerLock('test', self._lock_dir)
+        with lock:
+            with lock:
+                pass
+            self.assertIsNotNone(lock._file)
+        self.assertIsNone(lock._file)
+
+    @unittest.skipIf(PARALLEL, 'Runs serially only')
+    def test_serial_accounts(self):
+        self.assertEqual(worker_uri('//Alice'), '//Alice')
+        self.assertTrue(is_shared_keypair(dev_keypair('//Alice')))
+        self.assertFalse(is_shared_keypair(fresh_keypair()))
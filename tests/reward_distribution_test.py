@@ -1,13 +1,15 @@
 import time
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import WS_URL, transfer_with_tip, TOKEN_NUM_BASE, get_account_balance, transfer
 from tools.utils import KP_COLLATOR, KP_GLOBAL_SUDO
 from tools.utils import setup_block_reward
-from tools.utils import ExtrinsicBatch
+from tools.utils import ExtrinsicBatch, get_block_height, wait_until_block_heights
+from tools.balance_history import get_balance_history
+from tools.pinned_cache import cached_get_events, cached_get_block
 import unittest
-from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tests import utils_func as TestUtils
 
 WAIT_BLOCK_NUMBER = 10
@@ -58,16 +60,14 @@ def batch_extend_max_supply(substrate, batch):
     })
 
 
+@pytest.mark.pristine_chain(per_class=True)
+@pytest.mark.dirties_chain('BlockReward')
 class TestRewardDistribution(unittest.TestCase):
-    _kp_bob = Keypair.create_from_uri('//Bob')
-    _kp_eve = Keypair.create_from_uri('//Eve')
-
-    @classmethod
-    def setUpClass(cls):
-        restart_parachain_and_runtime_upgrade()
+    _kp_bob = dev_keypair('//Bob')
+    _kp_eve = dev_keypair('//Eve')
 
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
 
     def get_block_issue_reward(self):
         block_reward = self._substrate.query(
@@ -95,7 +95,7 @@ class TestRewardDistribution(unittest.TestCase):
         return int(str(event[1][1]))
 
     def _get_event(self, block_hash, pallet, event_name):
-        for event in self._substrate.get_events(block_hash):
+        for event in cached_get_events(self._substrate, block_hash):
             if event.value['module_id'] != pallet or \
                event.value['event_id'] != event_name:
                 continue
@@ -168,12 +168,10 @@ class TestRewardDistribution(unittest.TestCase):
             rewards_wo_tip, FEE_MAX_LIMIT,
             f'The transaction fee w/o tip is out of limit: {rewards_wo_tip} < {FEE_MAX_LIMIT}')
 
-    def _check_block_reward_in_event(self, kp_src, block_reward):
-        for i in range(0, WAIT_BLOCK_NUMBER):
-            block_info = self._substrate.get_block_header()
-            now_hash = block_info['header']['hash']
-            prev_hash = block_info['header']['parentHash']
-            extrinsic = self._substrate.get_block(prev_hash)['extrinsics']
+    def _find_block_reward(self, history, kp_src, block_reward):
+        block_deltas = zip(history.block_hashes, history.block_hashes[1:], history.deltas_of(kp_src.ss58_address))
+        for prev_hash, now_hash, delta in block_deltas:
+            extrinsic = cached_get_block(self._substrate, prev_hash)['extrinsics']
 
             self.assertNotEqual(len(extrinsic), 0, 'Extrinsic list shouldn\'t be zero, maybe in the genesis block')
             # The fee of extrinsic in the previous block becomes the reward of this block,
@@ -181,23 +179,34 @@ class TestRewardDistribution(unittest.TestCase):
             #   timestamp.set
             #   dynamicFee.noteMinGasPriceTarget
             #   parachainSystem.setValidationData)
-            if len(self._substrate.get_block(prev_hash)['extrinsics']) != 3:
-                time.sleep(WAIT_ONLY_ONE_BLOCK_PERIOD)
+            if len(extrinsic) != 3:
                 continue
             event = self._get_event(now_hash, 'Balances', 'Transfer')
             if event is None or str(event[1][1]['to']) != kp_src.ss58_address:
                 print(f'The event is {event}, or the receiver is not {kp_src.ss58_address}')
-                time.sleep(WAIT_ONLY_ONE_BLOCK_PERIOD)
                 continue
 
-            now_balance = get_account_balance(self._substrate, kp_src.ss58_address, block_hash=now_hash)
-            previous_balance = get_account_balance(self._substrate, kp_src.ss58_address, block_hash=prev_hash)
-            self.assertEqual(now_balance - previous_balance, block_reward * COLLATOR_REWARD_RATE,
-                             f'The block reward {now_balance - previous_balance} is '
+            self.assertEqual(delta, block_reward * COLLATOR_REWARD_RATE,
+                             f'The block reward {delta} is '
                              f'not the same as {block_reward * COLLATOR_REWARD_RATE}')
             return True
         return False
 
+    def _check_block_reward_in_event(self, kp_src, block_reward):
+        # Checks each new block as soon as it is created, from the latest block on
+        checked_height = get_block_height(self._substrate) - 1
+        end_height = checked_height + WAIT_BLOCK_NUMBER
+        while checked_height < end_height:
+            height = min(get_block_height(self._substrate), end_height)
+            if height > checked_height:
+                history = get_balance_history(self._substrate, [kp_src.ss58_address], checked_height, height)
+                if self._find_block_reward(history, kp_src, block_reward):
+                    return True
+                checked_height = height
+            if checked_height < end_height:
+                wait_until_block_heights({self._substrate: checked_height + 1})
+        return False
+
     def test_block_reward(self):
         # Setup
         batch = ExtrinsicBatch(self._substrate, KP_GLOBAL_SUDO)
@@ -0,0 +1,44 @@
+import unittest
+
+from substrateinterface import SubstrateInterface
+from tools.rpc_profiler import RpcProfiler
+
+
+def _fake_rpc_request(self, method, params, result_handler=None):
+    if method == 'fail':
+        return {'error': {'message': 'failed'}}
+    return {'result': '0x' + '00' * 32}
+
+
+class TestRpcProfiler(unittest.TestCase):
+    def setUp(self):
+        self._profiler = RpcProfiler()
+        self._original = SubstrateInterface.rpc_request
+        SubstrateInterface.rpc_request = _fake_rpc_request
+        self._profiler.install()
+        self._substrate = object.__new__(SubstrateInterface)
+
+    def tearDown(self):
+        self._profiler.uninstall()
+        SubstrateInterface.rpc_request = self._original
+
+    def test_count_per_method_and_test(self):
+        self._profiler.current_test = 'test_a'
+        self._substrate.rpc_request('chain_getHeader', [])
+        self._substrate.rpc_request('chain_getHeader', [])
+        self._profiler.current_test = 'test_b'
+        self._substrate.rpc_request('fail', [])
+
+        by_method = self._profiler.by_method()
+        self.assertEqual(by_method[('substrate', 'chain_getHeader')].calls, 2)
+        self.assertEqual(by_method[('substrate', 'chain_getHeader')].errors, 0)
+        self.assertGreater(by_method[('substrate', 'chain_getHeader')].bytes_received, 64)
+        self.assertEqual(by_method[('substrate', 'fail')].errors, 1)
+        self.assertEqual(self._profiler.by_test()['test_a'].calls, 2)
+        self.assertIn('substrate:chain_getHeader', self._profiler.report())
+
+    def test_uninstall(self):
+        self._profiler.uninstall()
+        self.assertIs(SubstrateInterface.rpc_request, _fake_rpc_request)
+        self._substrate.rpc_request('chain_getHeader', [])
+        self.assertEqual(self._profiler.stats(), {})
@@ -0,0 +1,96 @@
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+from tools import utils
+from tools.substrate_pool import SUBSTRATE_POOL
+from tools.standby_pool import shift_url, shift_compose_config, inject_urls, StandbyPool, StandbyStack
+
+
+class FakeSubstrate:
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.websocket = types.SimpleNamespace(connected=True)
+
+    def close(self):
+        self.websocket.connected = False
+
+
+class TestStandbyPool(unittest.TestCase):
+    def test_shift_url(self):
+        self.assertEqual(shift_url('ws://127.0.0.1:10044', 1000), 'ws://127.0.0.1:11044')
+        self.assertEqual(shift_url('https://rpc.peaq.network', 1000), 'https://rpc.peaq.network')
+
+    def test_shift_compose_config(self):
+        config = {
+            'name': 'parachain-launch',
+            'services': {'peaq': {
+                'container_name': 'peaq',
+                'ports': [{'target': 9944, 'published': '10044'}, {'target': 30333}],
+            }},
+            'volumes': {'peaq-data': {'name': 'parachain-launch_peaq-data'}, 'shared': {'name': 'shared', 'external': True}},
+            'networks': {'default': {'name': 'parachain-launch_default'}},
+        }
+        shifted = shift_compose_config(config, 2000)
+        self.assertNotIn('name', shifted)
+        self.assertNotIn('container_name', shifted['services']['peaq'])
+        self.assertEqual(shifted['services']['peaq']['ports'][0]['published'], '12044')
+        self.assertNotIn('published', shifted['services']['peaq']['ports'][1])
+        self.assertEqual(shifted['volumes'], {'peaq-data': {}, 'shared': {'name': 'shared', 'external': True}})
+        self.assertEqual(shifted['networks'], {'default': {}})
+        self.assertEqual(config['services']['peaq']['ports'][0]['published'], '10044')
+
+    def test_inject_urls(self):
+        ws_url = utils.WS_URL
+        with inject_urls({ws_url: shift_url(ws_url, 1000)}):
+            self.assertEqual(utils.WS_URL, shift_url(ws_url, 1000))
+            self.assertEqual(utils.PARACHAIN_WS_URL, shift_url(ws_url, 1000))
+        self.assertEqual(utils.WS_URL, ws_url)
+        self.assertEqual(utils.PARACHAIN_WS_URL, ws_url)
+
+    def test_acquire_while_other_stack_boots(self):
+        booting = threading.Event()
+        booted = threading.Event()
+        kept_connection = []
+
+        def boot(stack, runtime_upgrade_path=None):
+            if stack.offset == 2000:
+                # The second stack uses its connection across the acquire() of the first one
+                substrate = SUBSTRATE_POOL.get(stack.urls['WS_URL'])
+                booting.set()
+                booted.wait(5)
+                kept_connection.append(SUBSTRATE_POOL.get(stack.urls['WS_URL']) is substrate)
+
+        with mock.patch.object(StandbyStack, 'boot', boot), \
+                mock.patch('tools.substrate_pool.SubstrateInterface', FakeSubstrate), \
+                mock.patch('tools.substrate_pool.attach_metadata_cache', lambda substrate: substrate):
+            pool = StandbyPool(size=2, first_index=0, root=tempfile.mkdtemp())
+            pool.start({'name': 'parachain-launch', 'services': {}})
+            self.assertTrue(booting.wait(5))
+            first = pool.acquire(timeout=5)
+            booted.set()
+            second = pool.acquire(timeout=5)
+            pool._executor.shutdown()
+        self.assertEqual((first.offset, second.offset), (1000, 2000))
+        self.assertEqual(kept_connection, [True])
+        SUBSTRATE_POOL.reset()
+
+    def test_shutdown_cancels_queued_boots(self):
+        release = threading.Event()
+        booted = []
+
+        def boot(stack, runtime_upgrade_path=None):
+            release.wait(5)
+            booted.append(stack.name)
+
+        with mock.patch.object(StandbyStack, 'boot', boot), mock.patch.object(StandbyStack, 'down'):
+            pool = StandbyPool(size=1, first_index=0, root=tempfile.mkdtemp())
+            pool.start({'name': 'parachain-launch', 'services': {}})
+            pool.recycle(pool.stacks[0])
+            # The first boot runs until the queued one is cancelled
+            threading.Timer(0.5, release.set).start()
+            pool.shutdown()
+        self.assertEqual(booted, ['peaq-standby-0'])
+        self.assertFalse(pool.started)
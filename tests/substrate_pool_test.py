@@ -0,0 +1,39 @@
+import threading
+import unittest
+
+from tools.utils import WS_URL
+from tools.substrate_pool import SubstratePool
+
+
+class TestSubstratePool(unittest.TestCase):
+    def setUp(self):
+        self._pool = SubstratePool()
+
+    def tearDown(self):
+        self._pool.reset()
+
+    def test_same_connection_per_thread(self):
+        substrate = self._pool.get(WS_URL)
+        self.assertIs(substrate, self._pool.get(WS_URL))
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(self._pool.get(WS_URL)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(substrate, others[0])
+
+    def test_lease_is_exclusive(self):
+        with self._pool.lease(WS_URL) as first:
+            with self._pool.lease(WS_URL) as second:
+                self.assertIsNot(first, second)
+        with self._pool.lease(WS_URL) as again:
+            self.assertIn(again, [first, second])
+
+    def test_reconnect_after_reset(self):
+        substrate = self._pool.get(WS_URL)
+        self._pool.reset()
+        self.assertFalse(self._pool.is_healthy(substrate))
+
+        reconnected = self._pool.get(WS_URL)
+        self.assertIsNot(substrate, reconnected)
+        self.assertTrue(reconnected.get_block_hash())
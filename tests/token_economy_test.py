@@ -1,9 +1,9 @@
 import unittest
+import pytest
 
-from substrateinterface import SubstrateInterface
-from tools.utils import WS_URL, get_chain, get_block_hash, get_block_height, PARACHAIN_WS_URL
-from tests.utils_func import restart_parachain_and_runtime_upgrade
-from tools.runtime_upgrade import wait_until_block_height
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, get_chain, get_block_hash, get_block_height
+from tools.pinned_cache import cached_query, cached_get_constant
 
 
 import pprint
@@ -166,6 +166,7 @@ CONSTANT_INFOS = [{
 }]
 
 
+@pytest.mark.pristine_chain
 class TokenEconomyTest(unittest.TestCase):
 
     def get_modified_chain_spec(self):
@@ -183,9 +184,7 @@ class TokenEconomyTest(unittest.TestCase):
             return test_type[self._chain_spec]
 
     def setUp(self):
-        restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         current_height = get_block_height(self._substrate)
         self._block_hash = get_block_hash(self._substrate, current_height)
         self._chain_spec = get_chain(self._substrate)
@@ -194,9 +193,10 @@ class TokenEconomyTest(unittest.TestCase):
         for test in STATE_INFOS:
             module = test['module']
             storage_function = test['storage_function']
-            result = self._substrate.query(
-                module=module,
-                storage_function=storage_function,
+            result = cached_query(
+                self._substrate,
+                module,
+                storage_function,
                 params=[],
                 block_hash=self._block_hash,
             )
@@ -215,7 +215,8 @@ class TokenEconomyTest(unittest.TestCase):
         for test in CONSTANT_INFOS:
             module = test['module']
             storage_function = test['storage_function']
-            result = self._substrate.get_constant(
+            result = cached_get_constant(
+                self._substrate,
                 module,
                 storage_function,
                 self._block_hash,
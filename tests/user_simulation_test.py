@@ -4,7 +4,8 @@ sys.path.append('./')
 import sys
 import time
 import json
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import SubstrateInterface
+from tools.keypair_pool import dev_keypair
 from tools.utils import fund, send_service_request, WS_URL
 from tools.utils import deposit_money_to_multsig_wallet
 from tools.utils import _approve_token
@@ -28,7 +29,7 @@ def user_simulation_test(kp_consumer):
         print("⚠️ No local Substrate node running, try running 'start_local_substrate_node.sh' first")
         sys.exit()
 
-    kp_provider = Keypair.create_from_uri('//Alice')
+    kp_provider = dev_keypair('//Alice')
     # Fund first
     fund(substrate, kp_consumer, 500)
 
@@ -78,7 +79,7 @@ class SubstrateMonitor():
 
 
 if __name__ == '__main__':
-    kp_consumer = Keypair.create_from_uri('//Alice/stash')
+    kp_consumer = dev_keypair('//Alice/stash')
     monitor = SubstrateMonitor(kp_consumer, 2)
     monitor_thread = Thread(target=monitor.run_substrate_monitor)
     monitor_thread.start()
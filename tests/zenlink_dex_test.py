@@ -5,20 +5,22 @@ import pytest
 
 sys.path.append('./')
 
-from substrateinterface import SubstrateInterface, Keypair
+from tools.keypair_pool import dev_keypair
+from tools.substrate_pool import get_substrate
 from tools.utils import RELAYCHAIN_WS_URL, PARACHAIN_WS_URL, BIFROST_WS_URL, KP_GLOBAL_SUDO, URI_GLOBAL_SUDO
 from tools.utils import show_test, show_title, show_subtitle, wait_for_event, get_account_balance
 from tools.utils import get_parachain_id, get_relay_token_symbol
-from tools.utils import ExtrinsicBatch, into_keypair, get_relay_token_id
+from tools.utils import ExtrinsicBatch, into_keypair, get_relay_token_id, wait_until_block_heights
 from tools.currency import peaq, dot, bnc
-from tests.utils_func import restart_parachain_and_runtime_upgrade
-from tools.runtime_upgrade import wait_until_block_height
+from tools.bulk_balance import get_account_balances
+from tools.multi_signer import MultiSignerBatch
+from tools.pinned_cache import cached_get_events
 from tests import utils_func as TestUtils
 
 
 # Technical constants
-PARACHAIN_ID = get_parachain_id(SubstrateInterface(url=PARACHAIN_WS_URL))
-RELAY_TOKEN_SYMBOL = get_relay_token_symbol(SubstrateInterface(url=PARACHAIN_WS_URL))
+PARACHAIN_ID = get_parachain_id(get_substrate(PARACHAIN_WS_URL))
+RELAY_TOKEN_SYMBOL = get_relay_token_symbol(get_substrate(PARACHAIN_WS_URL))
 XCM_VER = 'V3'  # So far not tested with V2!
 XCM_RTA_TO = 45  # timeout for xcm-rta
 DOT_IDX = get_relay_token_id(RELAY_TOKEN_SYMBOL)  # u8 value for DOT-token (CurrencyId/TokenSymbol)
@@ -328,6 +330,16 @@ def wait_n_check_swap_event(substrate, min_tokens):
     assert event['attributes'][3][1] > min_tokens
 
 
+def check_swap_event(substrate, result, min_tokens):
+    assert result.receipt.is_success, f'Swap failed: {result.error_events}'
+    events = cached_get_events(substrate, result.receipt.block_hash)
+    event = next(
+        e.value['event'] for e in events
+        if e.value['extrinsic_idx'] == result.receipt.extrinsic_idx
+        and (e.value['module_id'], e.value['event_id']) == ('ZenlinkProtocol', 'AssetSwap'))
+    assert event['attributes'][3][1] > min_tokens
+
+
 def relay2para_transfer(si_relay, si_peaq, sender, tos, amnts):
     """
     This is a commong test-setup function to provide liquidity transactions from
@@ -357,7 +369,7 @@ def bifrost2para_transfer(si_bifrost, si_peaq, sender, tos, amnts):
 
     kp_recipi = list()
     for to in tos:
-        kp_recipi.append(Keypair.create_from_uri(to))
+        kp_recipi.append(dev_keypair(to))
 
     bt_sender = ExtrinsicBatch(si_bifrost, sender)
     for i, recipi in enumerate(kp_recipi):
@@ -389,11 +401,14 @@ def create_pair_n_swap_test(si_relay, si_peaq):
     amount = relay_amount_w_fees(dot(TOK_LIQUIDITY))
     relay2para_transfer(si_relay, si_peaq, '//Alice', ['//Alice', '//Dave'], [amount, amount])
 
+    dot_balances = get_account_balances(
+        si_peaq, [kp_para_sudo.ss58_address, kp_beneficiary.ss58_address],
+        currency_id={'Token': RELAY_TOKEN_SYMBOL})
     # Check that DOT tokens for liquidity have been transfered succesfully
-    dot_liquidity = state_tokens_accounts(si_peaq, kp_para_sudo, RELAY_TOKEN_SYMBOL)
+    dot_liquidity = dot_balances[kp_para_sudo.ss58_address].free
     assert dot_liquidity >= dot(TOK_LIQUIDITY)
     # Check that beneficiary has DOT and PEAQ tokens available
-    dot_balance = state_tokens_accounts(si_peaq, kp_beneficiary, RELAY_TOKEN_SYMBOL)
+    dot_balance = dot_balances[kp_beneficiary.ss58_address].free
     assert dot_balance > dot(TOK_SWAP)
 
     # 1.) Create a liquidity pair and add liquidity on pallet Zenlink-Protocol
@@ -416,14 +431,16 @@ def create_pair_n_swap_test(si_relay, si_peaq):
         [asset0, asset1, bl_hsh])
     assert not data['result'] is None
 
-    # 2.) Swap liquidity pair on Zenlink-DEX
+    # 2.) Swap liquidity pair on Zenlink-DEX, both users swap in the same block
     compose_zdex_swap_exact_for(bt_para_bene, DOT_IDX, amount_in1=dot(TOK_SWAP))
-    bt_para_bene.execute_n_clear()
-    wait_n_check_swap_event(si_peaq, dot(TOK_SWAP))
-
     compose_zdex_swap_exact_for(bt_para_bob, DOT_IDX, amount_in0=peaq(TOK_SWAP))
-    bt_para_bob.execute_n_clear()
-    wait_n_check_swap_event(si_peaq, dot(TOK_SWAP))
+    swaps = MultiSignerBatch(si_peaq)
+    swaps.add_batch(bt_para_bene)
+    swaps.add_batch(bt_para_bob)
+    for result in swaps.execute().values():
+        check_swap_event(si_peaq, result, dot(TOK_SWAP))
+    bt_para_bene.clear()
+    bt_para_bob.clear()
 
     # 3.) Remove some liquidity
     compose_zdex_remove_liquidity(bt_para_sudo, DOT_IDX, int(dot_liquidity / 4))
@@ -552,15 +569,18 @@ def zenlink_empty_lp_swap_test(si_relay, si_peaq):
     bt_usr2.execute_n_clear()
 
 
+@pytest.mark.pristine_chain
+@pytest.mark.dirties_chain('ZenlinkProtocol')
 class TestZenlinkDex(unittest.TestCase):
     def setUp(self):
-        restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=BIFROST_WS_URL), 1)
+        wait_until_block_heights({
+            get_substrate(PARACHAIN_WS_URL): 1,
+            get_substrate(BIFROST_WS_URL): 1,
+        })
         show_title('Zenlink-DEX-Protocol Test')
-        self.si_relay = SubstrateInterface(url=RELAYCHAIN_WS_URL)
-        self.si_peaq = SubstrateInterface(url=PARACHAIN_WS_URL)
-        self.si_bifrost = SubstrateInterface(url=BIFROST_WS_URL)
+        self.si_relay = get_substrate(RELAYCHAIN_WS_URL)
+        self.si_peaq = get_substrate(PARACHAIN_WS_URL)
+        self.si_bifrost = get_substrate(BIFROST_WS_URL)
 
     @pytest.mark.skipif(TestUtils.is_not_dev_chain() is True, reason='Skip for runtime upgrade test')
     def test_zenlink_dex(self):
@@ -0,0 +1,89 @@
+import sys
+sys.path.append('.')
+
+import struct
+import threading
+from collections import namedtuple
+
+AccountInfo = namedtuple(
+    'AccountInfo',
+    ['nonce', 'consumers', 'providers', 'sufficients', 'free', 'reserved', 'frozen', 'flags'])
+
+# System.Account: nonce, consumers, providers, sufficients as u32, then the
+# AccountData free, reserved, frozen, flags as u128
+ACCOUNT_INFO_SIZE = 4 * 4 + 4 * 16
+# Tokens.Accounts: free, reserved, frozen as u128
+TOKENS_ACCOUNT_SIZE = 3 * 16
+
+_SAMPLES = {
+    ('System', 'Account'): {
+        'nonce': 1, 'consumers': 2, 'providers': 3, 'sufficients': 4,
+        'data': {'free': 2 ** 127 + 5, 'reserved': 6, 'frozen': 7, 'flags': 2 ** 127},
+    },
+    ('Tokens', 'Accounts'): {'free': 2 ** 127 + 5, 'reserved': 6, 'frozen': 7},
+}
+
+# (url, runtime version, pallet, storage function) -> the fixed layout matches the metadata
+_VALIDATED = {}
+_VALIDATED_LOCK = threading.Lock()
+
+
+def _u128(data, offset):
+    return int.from_bytes(data[offset:offset + 16], 'little')
+
+
+def decode_account_info(data: bytes) -> AccountInfo:
+    """Decodes a raw System.Account value without scalecodec"""
+    if len(data) != ACCOUNT_INFO_SIZE:
+        raise ValueError(f'AccountInfo has {ACCOUNT_INFO_SIZE} bytes, not {len(data)}')
+    nonce, consumers, providers, sufficients = struct.unpack_from('<4I', data)
+    return AccountInfo(
+        nonce, consumers, providers, sufficients,
+        _u128(data, 16), _u128(data, 32), _u128(data, 48), _u128(data, 64))
+
+
+def decode_tokens_account(data: bytes) -> tuple:
+    """Decodes a raw Tokens.Accounts value into (free, reserved, frozen) without scalecodec"""
+    if len(data) != TOKENS_ACCOUNT_SIZE:
+        raise ValueError(f'Tokens AccountData has {TOKENS_ACCOUNT_SIZE} bytes, not {len(data)}')
+    return _u128(data, 0), _u128(data, 16), _u128(data, 32)
+
+
+def _matches_sample(pallet, storage_function, data, sample):
+    if (pallet, storage_function) == ('System', 'Account'):
+        info = decode_account_info(data)
+        return info == AccountInfo(
+            sample['nonce'], sample['consumers'], sample['providers'], sample['sufficients'],
+            *[sample['data'][k] for k in ['free', 'reserved', 'frozen', 'flags']])
+    return decode_tokens_account(data) == (sample['free'], sample['reserved'], sample['frozen'])
+
+
+def _validate(substrate, pallet, storage_function):
+    value_type = substrate.metadata.get_metadata_pallet(pallet) \
+        .get_storage_function(storage_function).get_value_type_string()
+    sample = _SAMPLES[(pallet, storage_function)]
+    try:
+        scale_obj = substrate.runtime_config.create_scale_object(value_type, metadata=substrate.metadata)
+        data = bytes(scale_obj.encode(sample).data)
+        return _matches_sample(pallet, storage_function, data, sample)
+    except Exception as e:
+        print(f'{pallet}.{storage_function} does not have the fixed layout, use scalecodec: {e}')
+        return False
+
+
+def has_fixed_layout(substrate, pallet, storage_function) -> bool:
+    """
+    Checks once per runtime version that the metadata type of System.Account or
+    Tokens.Accounts is the fixed layout, by encoding a sample value with scalecodec.
+    The runtime of the substrate must be initialised.
+    """
+    if (pallet, storage_function) not in _SAMPLES:
+        return False
+    key = (substrate.url, substrate.runtime_version, pallet, storage_function)
+    with _VALIDATED_LOCK:
+        if key in _VALIDATED:
+            return _VALIDATED[key]
+    valid = _validate(substrate, pallet, storage_function)
+    with _VALIDATED_LOCK:
+        _VALIDATED[key] = valid
+    return valid
@@ -0,0 +1,83 @@
+import sys
+sys.path.append('.')
+
+from collections import namedtuple
+
+import numpy as np
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.bulk_balance import create_balance_storage_keys, decode_balance, is_fixed_layout
+
+# Blocks per state_queryStorage request, the node walks all of them in one call
+HISTORY_CHUNK_SIZE = 256
+
+
+class BalanceHistory(namedtuple('BalanceHistory', ['addrs', 'block_numbers', 'block_hashes', 'free', 'deltas'])):
+    """
+    Free balances of some accounts over a block range
+    - free:     array of shape (len(addrs), blocks), free[i, j] is the free balance
+                of addrs[i] at block_numbers[j]
+    - deltas:   array of shape (len(addrs), blocks - 1), deltas[i, j] is the change of
+                the free balance of addrs[i] from block_numbers[j] to block_numbers[j + 1]
+    The arrays hold python ints (dtype object), because u128 balances overflow int64.
+    """
+
+    def free_of(self, addr):
+        return self.free[self.addrs.index(addr)]
+
+    def deltas_of(self, addr):
+        return self.deltas[self.addrs.index(addr)]
+
+
+def _rpc(substrate, method, params):
+    response = substrate.rpc_request(method, params)
+    if 'error' in response:
+        raise SubstrateRequestException(response['error']['message'])
+    return response['result']
+
+
+def get_block_hashes(substrate, start_block, end_block) -> list:
+    """Returns the block hashes of [start_block, end_block] with one chain_getBlockHash"""
+    block_hashes = _rpc(substrate, 'chain_getBlockHash', [list(range(start_block, end_block + 1))])
+    if None in block_hashes:
+        raise ValueError(f'Block {start_block + block_hashes.index(None)} does not exist yet')
+    return block_hashes
+
+
+def get_balance_history(substrate, addrs, start_block, end_block, currency_id=None) -> BalanceHistory:
+    """
+    Reads the free balances of many accounts over [start_block, end_block] from the
+    state_queryStorage change-sets, i.e. with a few RPCs for hundreds of blocks
+    Parameters:
+    - addrs:        list of ss58 addresses
+    - currency_id:  read Tokens.Accounts of this currency instead of System.Account,
+                    e.g. {'Token': 'DOT'}
+    Values are decoded with the runtime of end_block.
+    """
+    block_hashes = get_block_hashes(substrate, start_block, end_block)
+    columns = {block_hash: column for column, block_hash in enumerate(block_hashes)}
+    rows = {addr: row for row, addr in enumerate(addrs)}
+    substrate.init_runtime(block_hash=block_hashes[-1])
+    storage_keys = create_balance_storage_keys(substrate, addrs, currency_id)
+    fixed_layout = is_fixed_layout(substrate, currency_id)
+
+    # The node reports all values at the first block of a request, and only the
+    # changed values afterwards, so the gaps are filled forward
+    free = np.zeros((len(addrs), len(block_hashes)), dtype=object)
+    changed = np.zeros(free.shape, dtype=bool)
+    for start in range(0, len(block_hashes), HISTORY_CHUNK_SIZE):
+        chunk = block_hashes[start:start + HISTORY_CHUNK_SIZE]
+        change_sets = _rpc(substrate, 'state_queryStorage', [list(storage_keys.keys()), chunk[0], chunk[-1]])
+        for change_set in change_sets:
+            column = columns[change_set['block']]
+            for key_hex, data in change_set['changes']:
+                addr, storage_key = storage_keys[key_hex]
+                free[rows[addr], column] = decode_balance(storage_key, data, fixed_layout).free
+                changed[rows[addr], column] = True
+
+    for column in range(1, len(block_hashes)):
+        unchanged = ~changed[:, column]
+        free[unchanged, column] = free[unchanged, column - 1]
+
+    return BalanceHistory(
+        list(addrs), np.arange(start_block, end_block + 1), block_hashes,
+        free, np.diff(free, axis=1))
@@ -1,22 +1,117 @@
 import sys
 sys.path.append('.')
 
+from collections import namedtuple
 
+import numpy as np
+from substrateinterface.storage import StorageKey
+from substrateinterface.exceptions import SubstrateRequestException
 from tools.utils import get_block_height
+from tools.balance_history import get_block_hashes
+
+# Blocks per state_queryStorage request, Timestamp.Now changes in every block
+BLOCK_TIME_CHUNK_SIZE = 256
+# Timestamp.Now is a u64 of milliseconds
+TIMESTAMP_SIZE = 8
+
+
+class BlockTimes(namedtuple('BlockTimes', ['block_numbers', 'timestamps', 'intervals'])):
+    """
+    Creation times of a block range, read from Timestamp.Now
+    - timestamps:   milliseconds, timestamps[i] is the time of block_numbers[i]
+    - intervals:    milliseconds, intervals[i] is the time from block_numbers[i] to block_numbers[i + 1]
+    """
+
+    @property
+    def mean(self) -> float:
+        return float(np.mean(self.intervals))
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the block intervals in milliseconds"""
+        return float(np.std(self.intervals))
+
+    def percentiles(self, percentiles=(50, 90, 99)) -> dict:
+        return dict(zip(percentiles, np.percentile(self.intervals, percentiles)))
+
+    def longest_gaps(self, n=5) -> list:
+        """Returns [(block number, interval to the previous block)] of the n longest intervals"""
+        idxs = np.argsort(self.intervals)[::-1][:n]
+        return [(int(self.block_numbers[i + 1]), int(self.intervals[i])) for i in idxs]
+
+    def window(self, start_block, end_block):
+        """Returns the BlockTimes of the sub range [start_block, end_block]"""
+        mask = (self.block_numbers >= start_block) & (self.block_numbers <= end_block)
+        timestamps = self.timestamps[mask]
+        return BlockTimes(self.block_numbers[mask], timestamps, np.diff(timestamps))
+
+    def show(self):
+        print(f'Blocks {self.block_numbers[0]} - {self.block_numbers[-1]}: '
+              f'mean {self.mean:.0f} ms, jitter {self.jitter:.0f} ms')
+        for percentile, interval in self.percentiles().items():
+            print(f'p{percentile}: {interval:.0f} ms')
+        for number, interval in self.longest_gaps():
+            print(f'Gap before block {number}: {interval} ms')
+
+
+def _timestamp_storage_key(substrate, block_hash):
+    substrate.init_runtime(block_hash=block_hash)
+    return StorageKey.create_from_storage_function(
+        'Timestamp', 'Now', [], runtime_config=substrate.runtime_config, metadata=substrate.metadata).to_hex()
+
+
+def _decode_timestamp(data) -> int:
+    data = bytes.fromhex(data[2:])
+    if len(data) != TIMESTAMP_SIZE:
+        raise ValueError(f'Timestamp.Now has {TIMESTAMP_SIZE} bytes, not {len(data)}')
+    return int.from_bytes(data, 'little')
+
+
+def get_block_times(substrate, start_block, end_block) -> BlockTimes:
+    """
+    Reads Timestamp.Now of every block in [start_block, end_block], with one
+    chain_getBlockHash and one state_queryStorage per BLOCK_TIME_CHUNK_SIZE blocks.
+    The genesis block has no timestamp, so the range has to start at block 1 at the earliest.
+    """
+    if start_block < 1:
+        raise ValueError(f'Block {start_block} has no timestamp, the range has to start at block 1')
+    block_hashes = get_block_hashes(substrate, start_block, end_block)
+    columns = {block_hash: column for column, block_hash in enumerate(block_hashes)}
+    storage_key = _timestamp_storage_key(substrate, block_hashes[-1])
+
+    timestamps = np.zeros(len(block_hashes), dtype=np.int64)
+    changed = np.zeros(len(block_hashes), dtype=bool)
+    for start in range(0, len(block_hashes), BLOCK_TIME_CHUNK_SIZE):
+        chunk = block_hashes[start:start + BLOCK_TIME_CHUNK_SIZE]
+        response = substrate.rpc_request('state_queryStorage', [[storage_key], chunk[0], chunk[-1]])
+        if 'error' in response:
+            raise SubstrateRequestException(response['error']['message'])
+        for change_set in response['result']:
+            for _, data in change_set['changes']:
+                if data is not None:
+                    timestamps[columns[change_set['block']]] = _decode_timestamp(data)
+                    changed[columns[change_set['block']]] = True
+
+    # Blocks without a timestamp change keep the previous timestamp
+    for column in range(1, len(block_hashes)):
+        if not changed[column]:
+            timestamps[column] = timestamps[column - 1]
+
+    return BlockTimes(np.arange(start_block, end_block + 1), timestamps, np.diff(timestamps))
+
+
+def get_recent_block_times(substrate, block_traverse_num) -> BlockTimes:
+    """Reads the creation times of the latest block_traverse_num blocks"""
+    latest_height = get_block_height(substrate)
+    if latest_height <= block_traverse_num:
+        raise IOError(f'Please wait longer, current block height {latest_height} <= {block_traverse_num}')
+    return get_block_times(substrate, latest_height - block_traverse_num, latest_height - 1)
 
 
 def get_block_timestamp(substrate, height):
-    current_block = substrate.get_block(block_number=height)
-    create_time = int(str(current_block['extrinsics'][0]['call']['call_args'][0]['value']))
-    return create_time
+    return int(get_block_times(substrate, height, height).timestamps[0])
 
 
 def get_block_creation_times(substrate, block_traverse_num):
-    latest_height = get_block_height(substrate)
-    if latest_height < block_traverse_num:
-        raise IOError(f'Please wait longer, current block height {latest_height} < {block_traverse_num}')
-    create_times = [get_block_timestamp(substrate, height)
-                    for height in range(latest_height - block_traverse_num, latest_height)]
-    diff_times = [x - y for x, y in zip(create_times[1:], create_times)]
-    ave_time = sum(diff_times) / len(diff_times)
-    return ave_time
+    """Returns the average block time in milliseconds of the latest block_traverse_num blocks"""
+    return get_recent_block_times(substrate, block_traverse_num).mean
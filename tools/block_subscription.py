@@ -0,0 +1,108 @@
+import sys
+sys.path.append('.')
+
+import threading
+import time
+
+from substrateinterface.exceptions import SubstrateRequestException
+from websocket import WebSocketException
+from tools.substrate_pool import SUBSTRATE_POOL
+
+RECONNECT_WAIT = 1
+
+
+class BlockSubscription:
+    """
+    Follows the new heads of one chain with a single chain_subscribeNewHeads
+    subscription, running on a background thread with its own connection.
+
+    Every listener is called on that thread as listener(substrate, number, hash)
+    for each new block; substrate is the subscription's connection and can be
+    used for further requests inside the listener only. The subscription is
+    resumed automatically if the connection drops, e.g. after a restart.
+    The latest block number is kept in height, see wait_for_height().
+    """
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+        self._head = threading.Condition()
+        self.substrate = None
+        self.height = None
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+        self.start()
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def start(self):
+        with self._lock:
+            self._stopped.clear()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f'BlockSubscription@{self.url}', daemon=True)
+            self._thread.start()
+
+    def wait_for_height(self, height, timeout=None) -> bool:
+        """Waits until a block with at least the given height has been seen"""
+        self.start()
+        with self._head:
+            return self._head.wait_for(
+                lambda: self.height is not None and self.height >= height, timeout)
+
+    def stop(self):
+        """Stops the subscription with the next block"""
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._head:
+                self.height = None
+            try:
+                with SUBSTRATE_POOL.lease(self.url, **self._kwargs) as substrate:
+                    self.substrate = substrate
+                    substrate.rpc_request('chain_subscribeNewHeads', [], result_handler=self._on_head)
+            except (WebSocketException, SubstrateRequestException, OSError) as e:
+                print(f'Block subscription on {self.url} dropped, resubscribe: {e}')
+                time.sleep(RECONNECT_WAIT)
+
+    def _on_head(self, message, update_nr, subscription_id):
+        if self._stopped.is_set():
+            self.substrate.rpc_request('chain_unsubscribeNewHeads', [subscription_id])
+            return True
+
+        number = int(message['params']['result']['number'], 16)
+        with self._head:
+            self.height = number
+            self._head.notify_all()
+        block_hash = self.substrate.get_block_hash(number)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self.substrate, number, block_hash)
+            except Exception as e:
+                print(f'Block listener {listener} failed at #{number}: {e}')
+
+
+_SUBSCRIPTIONS = {}
+_SUBSCRIPTIONS_LOCK = threading.Lock()
+
+
+def get_block_subscription(url, **kwargs) -> BlockSubscription:
+    """Returns the process-wide BlockSubscription of the given url"""
+    key = (url, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+    with _SUBSCRIPTIONS_LOCK:
+        if key not in _SUBSCRIPTIONS:
+            _SUBSCRIPTIONS[key] = BlockSubscription(url, **kwargs)
+        return _SUBSCRIPTIONS[key]
@@ -0,0 +1,108 @@
+import sys
+sys.path.append('.')
+
+from collections import namedtuple
+
+from scalecodec.base import ScaleBytes
+from substrateinterface.storage import StorageKey
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.account_info import decode_account_info, decode_tokens_account, has_fixed_layout
+
+AccountBalance = namedtuple('AccountBalance', ['free', 'reserved', 'frozen'])
+EMPTY_BALANCE = AccountBalance(0, 0, 0)
+
+
+def create_balance_storage_keys(substrate, addrs, currency_id):
+    """
+    Computes the System.Account/Tokens.Accounts storage keys locally, without RPCs
+    Returns {storage_key_hex: (addr, StorageKey)}
+    """
+    if currency_id is None:
+        pallet, storage_function = 'System', 'Account'
+        params = [[addr] for addr in addrs]
+    else:
+        pallet, storage_function = 'Tokens', 'Accounts'
+        params = [[addr, currency_id] for addr in addrs]
+    storage_keys = {}
+    for addr, param in zip(addrs, params):
+        storage_key = StorageKey.create_from_storage_function(
+            pallet, storage_function, param,
+            runtime_config=substrate.runtime_config, metadata=substrate.metadata)
+        storage_keys[storage_key.to_hex()] = (addr, storage_key)
+    return storage_keys
+
+
+def decode_balance(storage_key, data, fixed_layout=False):
+    """
+    Decodes a raw System.Account/Tokens.Accounts value into an AccountBalance,
+    with the fast decoder if fixed_layout, see has_fixed_layout()
+    """
+    if data is None:
+        return EMPTY_BALANCE
+    if fixed_layout and storage_key.pallet == 'System':
+        info = decode_account_info(bytes.fromhex(data[2:]))
+        return AccountBalance(info.free, info.reserved, info.frozen)
+    if fixed_layout:
+        return AccountBalance(*decode_tokens_account(bytes.fromhex(data[2:])))
+
+    value = storage_key.decode_scale_value(ScaleBytes(data)).value
+    if storage_key.pallet == 'System':
+        value = value['data']
+    return AccountBalance(int(value['free']), int(value['reserved']), int(value['frozen']))
+
+
+def is_fixed_layout(substrate, currency_id) -> bool:
+    """Checks whether the balances of the currency can be read with the fast decoder"""
+    if currency_id is None:
+        return has_fixed_layout(substrate, 'System', 'Account')
+    return has_fixed_layout(substrate, 'Tokens', 'Accounts')
+
+
+def _init_runtime_at(substrate, block_hash=None):
+    """
+    Loads the runtime of the block (None: the head), unless it is loaded already,
+    which costs one state_getRuntimeVersion instead of a header and a version request.
+    The block which enacts a runtime upgrade is read with the upgraded runtime then.
+    """
+    version = substrate.get_block_runtime_version(block_hash)
+    if substrate.metadata is None or version.get('specVersion') != substrate.runtime_version:
+        substrate.init_runtime(block_hash=block_hash)
+
+
+def _query_balances(substrate, addrs, block_hash, currency_id) -> dict:
+    _init_runtime_at(substrate, block_hash)
+    storage_keys = create_balance_storage_keys(substrate, addrs, currency_id)
+    fixed_layout = is_fixed_layout(substrate, currency_id)
+    params = [list(storage_keys.keys())] if block_hash is None else [list(storage_keys.keys()), block_hash]
+    response = substrate.rpc_request('state_queryStorageAt', params)
+    if 'error' in response:
+        raise SubstrateRequestException(response['error']['message'])
+
+    balances = {addr: EMPTY_BALANCE for addr in addrs}
+    for result_group in response['result']:
+        for key_hex, data in result_group['changes']:
+            addr, storage_key = storage_keys[key_hex]
+            balances[addr] = decode_balance(storage_key, data, fixed_layout)
+    return balances
+
+
+def get_account_balances_at(substrate, addrs, block_hashes, currency_id=None) -> dict:
+    """
+    Reads the balances of many accounts with one state_queryStorageAt per block
+    Parameters:
+    - addrs:        list of ss58 addresses
+    - block_hashes: list of block hashes to read at
+    - currency_id:  read Tokens.Accounts of this currency instead of System.Account,
+                    e.g. {'Token': 'DOT'}
+    Returns {block_hash: {addr: AccountBalance(free, reserved, frozen)}}
+    """
+    return {block_hash: _query_balances(substrate, addrs, block_hash, currency_id) for block_hash in block_hashes}
+
+
+def get_account_balances(substrate, addrs, block_hash=None, currency_id=None) -> dict:
+    """
+    Reads the balances of many accounts in one round trip, see get_account_balances_at(),
+    at the head of the chain if block_hash is None
+    Returns {addr: AccountBalance(free, reserved, frozen)}
+    """
+    return _query_balances(substrate, addrs, block_hash, currency_id)
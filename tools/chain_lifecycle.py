@@ -0,0 +1,71 @@
+import sys
+sys.path.append('.')
+
+from tools.restart import restart_parachain_launch, get_parachain_launch_docker
+from tools.runtime_upgrade import do_runtime_upgrade, get_runtime_upgrade_path
+from tools.chain_snapshot import CHAIN_SNAPSHOT, ChainSnapshot
+
+# The state of the chain is not known, before it was restarted by this process
+UNKNOWN_STATE = 'unknown state'
+
+
+def restart_chain():
+    """
+    Restarts the parachain-launch stack, and applies RUNTIME_UPGRADE_PATH if set.
+    With CHAIN_SNAPSHOT, the restarted (and upgraded) chain is archived once
+    and later restarts restore the archive instead.
+    """
+    runtime_upgrade_path = get_runtime_upgrade_path()
+    snapshot = ChainSnapshot(get_parachain_launch_docker(), runtime_upgrade_path) if CHAIN_SNAPSHOT else None
+    if snapshot and snapshot.restore():
+        return
+    restart_parachain_launch()
+    if runtime_upgrade_path is not None:
+        do_runtime_upgrade(runtime_upgrade_path)
+    if snapshot:
+        snapshot.take()
+
+
+class ChainLifecycle:
+    """
+    Restarts the chain only when a test needs the genesis state and the chain is dirty.
+
+    Tests declare the chain configuration they change (e.g. 'BlockReward'),
+    which marks the chain dirty. require_pristine() restarts a dirty chain
+    (and re-applies the runtime upgrade), and reuses a clean one, so tests
+    which only read the genesis state share one restart.
+    In pytest, the markers pristine_chain and dirties_chain call these, see conftest.py.
+
+    Example:
+        CHAIN_LIFECYCLE.require_pristine('TokenEconomyTest')
+        CHAIN_LIFECYCLE.declare('BlockReward')
+    """
+
+    def __init__(self, restart=restart_chain):
+        self._restart = restart
+        self.dirty = {UNKNOWN_STATE}
+        self.restarts = 0
+        self.reuses = 0
+
+    def declare(self, *changes):
+        """Marks the chain dirty by the given configuration changes"""
+        self.dirty.update(changes)
+
+    def restart(self):
+        self._restart()
+        self.dirty = set()
+        self.restarts += 1
+
+    def require_pristine(self, requester=''):
+        """Makes sure that the chain has its genesis state (after the optional runtime upgrade)"""
+        if not self.dirty:
+            self.reuses += 1
+            return
+        print(f'Restart the chain for {requester}, changed: {", ".join(sorted(self.dirty))}')
+        self.restart()
+
+    def summary(self) -> str:
+        return f'{self.restarts} chain restarts, {self.reuses} pristine chains reused'
+
+
+CHAIN_LIFECYCLE = ChainLifecycle()
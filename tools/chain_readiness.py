@@ -0,0 +1,131 @@
+import sys
+sys.path.append('.')
+
+import json
+import os
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import websocket
+from tools.utils import RELAYCHAIN_WS_URL, PARACHAIN_WS_URL, BIFROST_WS_URL
+
+CHAIN_SERVICES = OrderedDict([
+    ('relay', RELAYCHAIN_WS_URL),
+    ('parachain', PARACHAIN_WS_URL),
+    ('bifrost', BIFROST_WS_URL),
+])
+READY_TIMEOUT = 120
+# Backoff between the probes of a service, doubled after each failed probe up to the maximum
+PROBE_BACKOFF = 0.2
+PROBE_BACKOFF_MAX = 1.0
+PROBE_TIMEOUT = 5
+# Appends the readiness report of every restart as a json line, e.g. for CI trends
+READINESS_LOG = os.environ.get('READINESS_LOG', '')
+
+ServiceReadiness = namedtuple(
+    'ServiceReadiness',
+    ['url', 'ready', 'connect_seconds', 'first_block_seconds', 'height', 'peers', 'attempts', 'error'])
+
+
+class ReadinessReport(namedtuple('ReadinessReport', ['started_at', 'services'])):
+    """
+    Startup timings of the chains, seconds are counted from started_at
+    - services:     {service name: ServiceReadiness}
+    """
+
+    @property
+    def ready(self) -> bool:
+        return all(service.ready for service in self.services.values())
+
+    def not_ready(self) -> list:
+        return [name for name, service in self.services.items() if not service.ready]
+
+    def show(self):
+        for name, service in self.services.items():
+            if service.ready:
+                print(f'{name} ({service.url}): connected after {service.connect_seconds:.1f}s, '
+                      f'block {service.height} after {service.first_block_seconds:.1f}s, '
+                      f'{service.peers} peers, {service.attempts} probes')
+            else:
+                print(f'{name} ({service.url}): not ready after {service.attempts} probes, {service.error}')
+
+    def log(self, path):
+        """Appends the report as a json line"""
+        with open(path, 'a') as f:
+            f.write(json.dumps({
+                'started_at': self.started_at,
+                'services': {name: service._asdict() for name, service in self.services.items()},
+            }) + '\n')
+
+
+def _rpc(conn, method, params=[]):
+    conn.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}))
+    response = json.loads(conn.recv())
+    if 'error' in response:
+        raise IOError(response['error'])
+    if 'result' not in response:
+        # E.g. a notification frame, the probe retries
+        raise ValueError(f'No result in the response to {method}: {response}')
+    return response['result']
+
+
+def probe_service(url, started_at, min_height=1, timeout=READY_TIMEOUT) -> ServiceReadiness:
+    """Probes the chain with chain_getHeader until it has produced the block min_height"""
+    connect_seconds, attempts, error, conn = None, 0, None, None
+    backoff = PROBE_BACKOFF
+    while time.time() - started_at < timeout:
+        attempts += 1
+        try:
+            if conn is None:
+                conn = websocket.create_connection(url, timeout=PROBE_TIMEOUT)
+                connect_seconds = time.time() - started_at
+            height = int(_rpc(conn, 'chain_getHeader')['number'], 16)
+            if height >= min_height:
+                peers = _rpc(conn, 'system_health')['peers']
+                conn.close()
+                return ServiceReadiness(url, True, connect_seconds, time.time() - started_at, height, peers, attempts, None)
+            error = f'at block {height}'
+        except (OSError, websocket.WebSocketException, ValueError, KeyError, TypeError) as e:
+            error = f'{type(e).__name__}: {e}'
+            conn = None
+        time.sleep(backoff)
+        backoff = min(backoff * 2, PROBE_BACKOFF_MAX)
+    if conn is not None:
+        conn.close()
+    return ServiceReadiness(url, False, connect_seconds, None, None, None, attempts, error)
+
+
+def wait_for_chains_ready(services=CHAIN_SERVICES, started_at=None, min_height=1, timeout=READY_TIMEOUT) -> ReadinessReport:
+    """
+    Probes all chains in parallel and returns as soon as each one has produced the block min_height
+    Parameters:
+    - services:     {service name: websocket url}
+    - started_at:   time of the (re)start, the timings are counted from it
+    Raises IOError if a chain is not ready within timeout seconds.
+    """
+    started_at = started_at or time.time()
+    with ThreadPoolExecutor(max_workers=len(services)) as executor:
+        futures = OrderedDict(
+            (name, executor.submit(probe_service, url, started_at, min_height, timeout))
+            for name, url in services.items())
+    report = ReadinessReport(started_at, OrderedDict((name, future.result()) for name, future in futures.items()))
+    report.show()
+    if READINESS_LOG:
+        report.log(READINESS_LOG)
+    if not report.ready:
+        raise IOError(f'Chains {report.not_ready()} are not ready after {timeout} seconds')
+    return report
+
+
+def compose_chain_services(compose_config, services=CHAIN_SERVICES) -> OrderedDict:
+    """Returns the chain services, whose websocket port is published by the compose project"""
+    published = set()
+    for service in compose_config.get('services', {}).values():
+        for port in service.get('ports', []):
+            if isinstance(port, dict) and port.get('published'):
+                published.add(int(port['published']))
+    return OrderedDict(
+        (name, url) for name, url in services.items()
+        if urlparse(url).port in published)
@@ -0,0 +1,175 @@
+import sys
+sys.path.append('.')
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from python_on_whales import docker
+from python_on_whales.exceptions import NoSuchImage
+from tools.restart import get_parachain_launch_docker, reset_chain_clients, wait_for_compose_chains
+from tools.runtime_upgrade import get_runtime_upgrade_path
+
+# Restarts restore the chain data volumes from a snapshot instead of syncing from genesis, if set
+CHAIN_SNAPSHOT = os.environ.get('CHAIN_SNAPSHOT', '') not in ['', '0', 'false']
+CHAIN_SNAPSHOT_DIR = os.environ.get(
+    'CHAIN_SNAPSHOT_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'snapshots'))
+# Small image with tar, which copies the volume content from and to the snapshot directory
+SNAPSHOT_IMAGE = 'busybox'
+MANIFEST = 'manifest.json'
+
+
+def _file_digest(path, digest):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+
+def service_image_ids(my_docker) -> list:
+    """Returns the image ids of the compose services, an image which is not built yet counts as missing"""
+    config = my_docker.compose.config(return_json=True)
+    image_ids = []
+    for name, service in sorted(config.get('services', {}).items()):
+        image = service.get('image') or f'{config["name"]}-{name}'
+        try:
+            image_ids.append(docker.image.inspect(image).id)
+        except NoSuchImage:
+            image_ids.append(f'{image}:missing')
+    return image_ids
+
+
+def snapshot_key(my_docker, runtime_upgrade_path=None, image_ids=()) -> str:
+    """Identifies the chain setup, i.e. the compose files, the service images and the optional upgrade runtime"""
+    digest = hashlib.sha256()
+    for compose_file in my_docker.client_config.compose_files:
+        _file_digest(compose_file, digest)
+    for image_id in image_ids:
+        digest.update(image_id.encode())
+    if runtime_upgrade_path:
+        _file_digest(os.path.expanduser(runtime_upgrade_path), digest)
+    return digest.hexdigest()[:16]
+
+
+def _project_volumes(my_docker) -> list:
+    project = my_docker.compose.config(return_json=True)['name']
+    return sorted(v.name for v in docker.volume.list(filters={'label': f'com.docker.compose.project={project}'}))
+
+
+def _tar(volume, snapshot_dir, command):
+    docker.run(
+        SNAPSHOT_IMAGE, ['sh', '-c', command],
+        volumes=[(volume, '/volume'), (snapshot_dir, '/snapshot')], remove=True)
+
+
+class ChainSnapshot:
+    """
+    Archives the chain data volumes of the parachain-launch project, and restores them.
+
+    After a clean start (and the optional runtime upgrade) take() stops the
+    containers, archives every volume of the compose project into the
+    snapshot directory, and starts the containers again. restore() recreates
+    the containers and volumes, unpacks the archives and starts the chains,
+    which then continue from the archived blocks. A snapshot belongs to the
+    compose files, the images and the upgrade runtime it was taken with, see
+    snapshot_key(), so restore() builds the images first.
+
+    Example:
+        snapshot = ChainSnapshot(get_parachain_launch_docker(), RUNTIME_UPGRADE_PATH)
+        if not snapshot.restore():
+            ... clean start ...
+            snapshot.take()
+    """
+
+    def __init__(self, my_docker, runtime_upgrade_path=None, snapshot_root=CHAIN_SNAPSHOT_DIR, image_ids=None):
+        self._docker = my_docker
+        self._runtime_upgrade_path = runtime_upgrade_path
+        self._snapshot_root = snapshot_root
+        self._image_ids = image_ids
+
+    @property
+    def path(self) -> str:
+        if self._image_ids is None:
+            self._image_ids = service_image_ids(self._docker)
+        return os.path.join(self._snapshot_root, snapshot_key(self._docker, self._runtime_upgrade_path, self._image_ids))
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, MANIFEST))
+
+    def _manifest(self) -> dict:
+        with open(os.path.join(self.path, MANIFEST)) as f:
+            return json.load(f)
+
+    def take(self):
+        """Archives all volumes of the compose project, the chains are stopped meanwhile"""
+        # The images may have been rebuilt since the last key
+        self._image_ids = None
+        path = self.path
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(tmp_path, exist_ok=True)
+        volumes = _project_volumes(self._docker)
+        self._docker.compose.stop()
+        reset_chain_clients()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(volumes))) as executor:
+                list(executor.map(
+                    lambda volume: _tar(volume, tmp_path, f'tar czf /snapshot/{volume}.tar.gz -C /volume .'),
+                    volumes))
+            with open(os.path.join(tmp_path, MANIFEST), 'w') as f:
+                json.dump({'volumes': volumes, 'created_at': time.time()}, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            started_at = time.time()
+            self._docker.compose.start()
+            wait_for_compose_chains(self._docker, started_at)
+        print(f'Chain snapshot of {len(volumes)} volumes in {path}')
+
+    def restore(self) -> bool:
+        """Replaces the chains by the snapshot, returns False if there is no snapshot of the current images"""
+        self._docker.compose.build()
+        self._image_ids = None
+        if not self.exists():
+            return False
+        path = self.path
+        volumes = self._manifest()['volumes']
+        self._docker.compose.down(volumes=True)
+        reset_chain_clients()
+        started_at = time.time()
+        self._docker.compose.create()
+        with ThreadPoolExecutor(max_workers=max(1, len(volumes))) as executor:
+            list(executor.map(
+                lambda volume: _tar(volume, path, f'tar xzf /snapshot/{volume}.tar.gz -C /volume'),
+                volumes))
+        self._docker.compose.start()
+        wait_for_compose_chains(self._docker, started_at)
+        print(f'Chain restored from {path} in {time.time() - started_at:.1f}s')
+        return True
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot the parachain-launch chain data')
+    parser.add_argument('action', choices=['take', 'restore', 'clear'], help='What to do with the snapshot')
+    parser.add_argument('-r', '--runtime', type=str, default=get_runtime_upgrade_path(),
+                        help='Runtime upgrade, which is part of the snapshot')
+
+    args = parser.parse_args()
+    snapshot = ChainSnapshot(get_parachain_launch_docker(), args.runtime)
+    if args.action == 'take':
+        snapshot.take()
+    elif args.action == 'restore' and not snapshot.restore():
+        print(f'No snapshot in {snapshot.path}')
+    elif args.action == 'clear':
+        snapshot.clear()
+
+
+if __name__ == '__main__':
+    main()
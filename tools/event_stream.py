@@ -0,0 +1,80 @@
+import sys
+sys.path.append('.')
+
+import threading
+
+from tools.block_subscription import get_block_subscription
+from tools.pinned_cache import cached_get_events
+
+
+class BlockEventStream:
+    """
+    Decodes the events of each new block of one chain exactly once, and hands
+    them out to any number of waiters, each filtering with its own predicate.
+
+    The stream only follows the chain while somebody waits; the events of the
+    latest block are also checked when a waiter registers. Decoded events are
+    shared through the pinned query cache.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._subscription = get_block_subscription(url)
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    def wait(self, substrate, predicate, timeout=30):
+        """
+        Waits for the first event with predicate(event) being True and returns it,
+        or None after the timeout. Exceptions of the predicate are re-raised.
+        """
+        waiter = {'predicate': predicate, 'done': threading.Event(), 'event': None, 'error': None}
+        with self._lock:
+            self._waiters.append(waiter)
+            if len(self._waiters) == 1:
+                self._subscription.add_listener(self._on_block)
+
+        block_hash = substrate.get_block_hash()
+        self._dispatch(cached_get_events(substrate, block_hash), [waiter])
+        waiter['done'].wait(timeout)
+
+        with self._lock:
+            self._waiters.remove(waiter)
+            if not self._waiters:
+                self._subscription.remove_listener(self._on_block)
+        if waiter['error'] is not None:
+            raise waiter['error']
+        return waiter['event']
+
+    def _on_block(self, substrate, number, block_hash):
+        with self._lock:
+            waiters = list(self._waiters)
+        if waiters:
+            self._dispatch(cached_get_events(substrate, block_hash), waiters)
+
+    @staticmethod
+    def _dispatch(events, waiters):
+        for waiter in waiters:
+            if waiter['done'].is_set():
+                continue
+            try:
+                match = next((e for e in events if waiter['predicate'](e)), None)
+            except Exception as e:
+                waiter['error'] = e
+                waiter['done'].set()
+                continue
+            if match is not None:
+                waiter['event'] = match
+                waiter['done'].set()
+
+
+_STREAMS = {}
+_STREAMS_LOCK = threading.Lock()
+
+
+def get_event_stream(url) -> BlockEventStream:
+    """Returns the process-wide BlockEventStream of the given url"""
+    with _STREAMS_LOCK:
+        if url not in _STREAMS:
+            _STREAMS[url] = BlockEventStream(url)
+        return _STREAMS[url]
@@ -0,0 +1,166 @@
+import sys
+sys.path.append('.')
+
+import threading
+from concurrent.futures import Future, wait
+from hashlib import blake2b
+
+from substrateinterface import ExtrinsicReceipt
+from tools.block_subscription import get_block_subscription
+from tools.nonce_manager import submit_with_nonce
+from tools.substrate_pool import get_substrate
+
+# Mortality of the extrinsics in blocks, afterwards an extrinsic cannot be included anymore
+MAX_PENDING_BLOCKS = 64
+
+
+class ExtrinsicSubmitter:
+    """
+    Submits signed extrinsics without blocking the calling thread.
+
+    Every submit returns a concurrent.futures.Future, which resolves to the
+    ExtrinsicReceipt on inclusion (or finalization). All in-flight
+    extrinsics of a chain are tracked by one shared block-header
+    subscription, which looks up the extrinsic hashes of each new block.
+    A rejection by the transaction pool is raised directly by submit.
+
+    Example:
+        with ExtrinsicSubmitter(WS_URL) as submitter:
+            futures = [submitter.submit_call(kp, call) for call in calls]
+            receipts = submitter.wait_all(futures)
+    """
+
+    def __init__(self, substrate_or_url, max_pending_blocks=MAX_PENDING_BLOCKS):
+        if isinstance(substrate_or_url, str):
+            self.url = substrate_or_url
+        else:
+            self.url = substrate_or_url.url
+        self._max_pending_blocks = max_pending_blocks
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._unfinalized = {}
+        self._height = None
+        self._subscription = get_block_subscription(self.url)
+        self._subscription.add_listener(self._on_block)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Stops tracking, the futures of in-flight extrinsics are cancelled"""
+        self._subscription.remove_listener(self._on_block)
+        with self._lock:
+            futures = [entry['future'] for entry in self._pending.values()]
+            futures += [entry['future'] for entry in self._unfinalized.values()]
+            self._pending = {}
+            self._unfinalized = {}
+        for future in futures:
+            future.cancel()
+
+    def submit(self, extrinsic, wait_for_finalization=False, substrate=None) -> Future:
+        """
+        Submits a signed extrinsic and returns the future of its receipt, substrate is
+        the connection for the submission and the receipt, by default the one of the calling thread
+        """
+        substrate = substrate or get_substrate(self.url)
+        extrinsic_hash = f'0x{extrinsic.extrinsic_hash.hex()}'
+        future = Future()
+        with self._lock:
+            self._pending[extrinsic_hash] = {
+                'future': future,
+                'substrate': substrate,
+                'height': self._height,
+                'finalization': wait_for_finalization,
+            }
+        try:
+            substrate.rpc_request('author_submitExtrinsic', [str(extrinsic.data)])
+        except Exception:
+            with self._lock:
+                self._pending.pop(extrinsic_hash, None)
+            raise
+        return future
+
+    def submit_call(self, keypair, call, wait_for_finalization=False, era={'period': 64}, tip=0, substrate=None) -> Future:
+        """
+        Signs the call with the next local nonce of the keypair and submits it,
+        substrate is the connection for signing, the submission and the receipt, see submit()
+        """
+        substrate = substrate or get_substrate(self.url)
+        return submit_with_nonce(
+            substrate, keypair, call, era=era, tip=tip,
+            submit=lambda extrinsic: self.submit(extrinsic, wait_for_finalization, substrate))
+
+    def submit_batch(self, keypair, batch, wait_for_finalization=False) -> Future:
+        """Like execute_extrinsic_batch, but returns the future of the receipt"""
+        call = get_substrate(self.url).compose_call(
+            call_module='Utility',
+            call_function='batch_all',
+            call_params={
+                'calls': batch,
+            })
+        return self.submit_call(keypair, call, wait_for_finalization)
+
+    @staticmethod
+    def wait_all(futures, timeout=None) -> list:
+        """Waits for all futures and returns their receipts"""
+        wait(futures, timeout=timeout)
+        return [future.result(timeout=0) for future in futures]
+
+    def _on_block(self, substrate, number, block_hash):
+        with self._lock:
+            self._height = number
+            if not self._pending and not self._unfinalized:
+                return
+        if self._pending:
+            self._check_inclusion(substrate, number, block_hash)
+        if self._unfinalized:
+            self._check_finalization(substrate)
+
+    def _check_inclusion(self, substrate, number, block_hash):
+        extrinsics = substrate.rpc_request('chain_getBlock', [block_hash])['result']['block']['extrinsics']
+        for idx, data in enumerate(extrinsics):
+            extrinsic_hash = '0x' + blake2b(bytes.fromhex(data[2:]), digest_size=32).hexdigest()
+            with self._lock:
+                entry = self._pending.pop(extrinsic_hash, None)
+            if entry is None:
+                continue
+            entry['receipt'] = ExtrinsicReceipt(
+                substrate=entry['substrate'],
+                extrinsic_hash=extrinsic_hash,
+                block_hash=block_hash,
+                block_number=number,
+                extrinsic_idx=idx,
+                finalized=False)
+            if entry['finalization']:
+                with self._lock:
+                    self._unfinalized[extrinsic_hash] = entry
+            else:
+                entry['future'].set_result(entry['receipt'])
+        self._expire_pending(number)
+
+    def _expire_pending(self, number):
+        with self._lock:
+            expired = [
+                (extrinsic_hash, entry) for extrinsic_hash, entry in self._pending.items()
+                if entry['height'] is not None and number - entry['height'] > self._max_pending_blocks]
+            for extrinsic_hash, _ in expired:
+                self._pending.pop(extrinsic_hash)
+        for extrinsic_hash, entry in expired:
+            entry['future'].set_exception(
+                TimeoutError(f'Extrinsic {extrinsic_hash} not included after {self._max_pending_blocks} blocks'))
+
+    def _check_finalization(self, substrate):
+        finalized_hash = substrate.rpc_request('chain_getFinalizedHead', [])['result']
+        finalized_number = substrate.get_block_number(finalized_hash)
+        with self._lock:
+            finalized = [
+                (extrinsic_hash, entry) for extrinsic_hash, entry in self._unfinalized.items()
+                if entry['receipt'].block_number <= finalized_number]
+            for extrinsic_hash, _ in finalized:
+                self._unfinalized.pop(extrinsic_hash)
+        for _, entry in finalized:
+            entry['receipt'].finalized = True
+            entry['future'].set_result(entry['receipt'])
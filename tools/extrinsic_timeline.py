@@ -0,0 +1,297 @@
+import sys
+sys.path.append('.')
+
+import atexit
+import csv
+import json
+import os
+import threading
+import time
+from hashlib import blake2b
+
+import numpy as np
+from substrateinterface import ExtrinsicReceipt
+from substrateinterface.exceptions import SubstrateRequestException
+from websocket import WebSocketTimeoutException
+from tools.block_subscription import get_block_subscription
+from tools.substrate_pool import get_substrate
+
+# Export path of the timeline (.csv, otherwise json lines), recording is off if not set
+EXTRINSIC_TIMELINE = os.environ.get('EXTRINSIC_TIMELINE', '')
+PHASES = ['started', 'signed', 'submitted', 'ready', 'in_block', 'finalized']
+FIELDS = [
+    'description', 'signer', 'nonce', 'extrinsic_hash', 'block_hash', 'block_number', 'extrinsic_idx', 'error',
+] + PHASES
+HISTOGRAM_BINS = 10
+# Seconds without a status update of a watched extrinsic, after which its submission counts as failed
+STATUS_TIMEOUT = float(os.environ.get('STATUS_TIMEOUT', '120'))
+# Pool statuses, after which the extrinsic is not included, a future one waits for a gap in the nonces
+FAILED_STATUSES = ['future', 'invalid', 'dropped', 'usurped']
+
+
+class ExtrinsicStatusError(SubstrateRequestException):
+    """The transaction pool reported a failed status of the extrinsic, or timeout if it reported none"""
+
+    def __init__(self, status, extrinsic_hash):
+        super().__init__(f'Extrinsic {extrinsic_hash} {status}')
+        self.status = status
+
+
+def _describe(call_value):
+    # tools.utils imports the nonce manager, which records into this module
+    from tools.utils import generate_call_description
+    try:
+        return generate_call_description(call_value)
+    except (KeyError, TypeError):
+        return f"{call_value['call_module']}.{call_value['call_function']}"
+
+
+class ExtrinsicTimeline:
+    """
+    Records the timeline of every extrinsic submitted by submit_with_nonce().
+
+    Per extrinsic the times of signing, submission, pool acceptance (ready),
+    inclusion and finalization are kept, together with the block and the
+    extrinsic index. Extrinsics which are not waited for, and the finalization
+    of included ones, are followed by the block subscription of the chain.
+    Recording is off, until enable() is called or EXTRINSIC_TIMELINE is set to
+    an export path, which is written when the process exits.
+
+    Example:
+        TIMELINE.enable()
+        ... run extrinsics ...
+        TIMELINE.export('timeline.csv')
+        TIMELINE.show_summary()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+        self._followed = set()
+        self._block_numbers = {}
+        self.enabled = False
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._records = []
+
+    def records(self) -> list:
+        with self._lock:
+            return [dict(record) for record in self._records]
+
+    def start(self, substrate, keypair, call):
+        """Opens the record of an extrinsic, returns None if recording is off"""
+        if not self.enabled:
+            return None
+        record = dict.fromkeys(FIELDS)
+        record.update({
+            'url': substrate.url,
+            'call': call.value,
+            'signer': keypair.ss58_address,
+            'started': time.time(),
+        })
+        with self._lock:
+            self._records.append(record)
+        return record
+
+    @staticmethod
+    def mark(record, phase, **fields):
+        """Sets the time of a phase once, with further fields of the record"""
+        if record is None:
+            return
+        if record[phase] is None:
+            record[phase] = time.time()
+        record.update(fields)
+
+    def signed(self, record, extrinsic):
+        if record is not None:
+            self.mark(
+                record, 'signed', nonce=extrinsic.value['nonce'],
+                extrinsic_hash=f'0x{extrinsic.extrinsic_hash.hex()}')
+
+    def failed(self, record, error):
+        if record is not None:
+            record['error'] = str(error)
+
+    def submitted(self, record):
+        self.mark(record, 'submitted')
+
+    def accepted(self, record):
+        """Marks the acceptance by the pool, inclusion and finalization are followed by the block subscription"""
+        if record is None:
+            return
+        self.mark(record, 'ready')
+        self._follow(record['url'])
+
+    def _on_status(self, record, message):
+        status = message['params']['result']
+        if isinstance(status, str):
+            status = {status: None}
+        status = {k.lower(): v for k, v in status.items()}
+        if 'ready' in status:
+            self.mark(record, 'ready')
+        if 'inblock' in status:
+            self.mark(record, 'in_block', block_hash=status['inblock'])
+        if 'finalized' in status:
+            self.mark(record, 'in_block', block_hash=status['finalized'])
+            self.mark(record, 'finalized')
+        for error in FAILED_STATUSES:
+            if error in status:
+                self.failed(record, error)
+        return status
+
+    def _watch(self, substrate, extrinsic, record, wait_for_finalization, timeout) -> dict:
+        """Submits and watches the extrinsic until inclusion or finalization, returns the last status"""
+        extrinsic_hash = f'0x{extrinsic.extrinsic_hash.hex()}'
+
+        def result_handler(message, update_nr, subscription_id):
+            if 'params' not in message:
+                return None
+            status = self._on_status(record, message)
+            if 'finalized' in status or ('inblock' in status and not wait_for_finalization):
+                substrate.rpc_request('author_unwatchExtrinsic', [subscription_id])
+                return status
+            if 'future' in status:
+                # The pool keeps a future extrinsic, which could still be included after a resubmission
+                substrate.rpc_request('author_unwatchExtrinsic', [subscription_id])
+            for error in FAILED_STATUSES:
+                if error in status:
+                    raise ExtrinsicStatusError(error, extrinsic_hash)
+            return None
+
+        websocket = substrate.websocket
+        previous_timeout = websocket.gettimeout()
+        websocket.settimeout(timeout)
+        try:
+            return substrate.rpc_request(
+                'author_submitAndWatchExtrinsic', [str(extrinsic.data)], result_handler=result_handler)
+        except WebSocketTimeoutException:
+            # The subscription is still open, the connection is dropped and reconnects on its next request
+            websocket.close()
+            self.failed(record, 'timeout')
+            raise ExtrinsicStatusError('timeout', extrinsic_hash)
+        finally:
+            websocket.settimeout(previous_timeout)
+
+    def submit_extrinsic(self, substrate, extrinsic, record, wait_for_inclusion, wait_for_finalization,
+                         timeout=STATUS_TIMEOUT):
+        """
+        substrate.submit_extrinsic(), which records the status updates of the transaction pool.
+        Raises an ExtrinsicStatusError on a failed status, or if no status update arrives within timeout seconds.
+        """
+        self.submitted(record)
+        if not (wait_for_inclusion or wait_for_finalization):
+            receipt = substrate.submit_extrinsic(extrinsic)
+            self.accepted(record)
+            return receipt
+        status = self._watch(substrate, extrinsic, record, wait_for_finalization, timeout)
+        if record is not None and not wait_for_finalization:
+            self._follow(substrate.url)
+        return ExtrinsicReceipt(
+            substrate=substrate,
+            extrinsic_hash=f'0x{extrinsic.extrinsic_hash.hex()}',
+            block_hash=status.get('finalized') or status['inblock'],
+            finalized='finalized' in status)
+
+    def _follow(self, url):
+        with self._lock:
+            if url in self._followed:
+                return
+            self._followed.add(url)
+        get_block_subscription(url).add_listener(self._on_block)
+
+    def _open(self, url, phase) -> list:
+        with self._lock:
+            return [
+                record for record in self._records
+                if record['url'] == url and record['submitted'] is not None
+                and record['error'] is None and record[phase] is None]
+
+    def _block_number(self, substrate, block_hash):
+        if block_hash not in self._block_numbers:
+            self._block_numbers[block_hash] = substrate.get_block_number(block_hash)
+        return self._block_numbers[block_hash]
+
+    def _on_block(self, substrate, number, block_hash):
+        self._block_numbers[block_hash] = number
+        pending = {record['extrinsic_hash']: record for record in self._open(substrate.url, 'in_block')}
+        if pending:
+            extrinsics = substrate.rpc_request('chain_getBlock', [block_hash])['result']['block']['extrinsics']
+            for data in extrinsics:
+                extrinsic_hash = '0x' + blake2b(bytes.fromhex(data[2:]), digest_size=32).hexdigest()
+                if extrinsic_hash in pending:
+                    self.mark(pending[extrinsic_hash], 'in_block', block_hash=block_hash)
+        unfinalized = [record for record in self._open(substrate.url, 'finalized') if record['in_block'] is not None]
+        if unfinalized:
+            finalized_number = self._block_number(substrate, substrate.get_chain_finalised_head())
+            for record in unfinalized:
+                if self._block_number(substrate, record['block_hash']) <= finalized_number:
+                    self.mark(record, 'finalized')
+
+    def _resolve_blocks(self, records):
+        """Fills in block number and extrinsic index, with one chain_getBlock per block"""
+        blocks = {(r['url'], r['block_hash']) for r in records if r['block_hash'] and r['extrinsic_idx'] is None}
+        for url, block_hash in blocks:
+            block = get_substrate(url).rpc_request('chain_getBlock', [block_hash])['result']['block']
+            idxs = {
+                '0x' + blake2b(bytes.fromhex(data[2:]), digest_size=32).hexdigest(): idx
+                for idx, data in enumerate(block['extrinsics'])}
+            for record in records:
+                if record['block_hash'] == block_hash:
+                    record['block_number'] = int(block['header']['number'], 16)
+                    record['extrinsic_idx'] = idxs.get(record['extrinsic_hash'])
+
+    def export(self, path):
+        """Writes the records as CSV (.csv) or json lines (otherwise)"""
+        with self._lock:
+            records = list(self._records)
+        self._resolve_blocks(records)
+        rows = [dict({k: record[k] for k in FIELDS}, description=_describe(record['call'])) for record in records]
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+        return rows
+
+    def summary(self) -> dict:
+        """Returns {'from->to': np.array of seconds} for the consecutive phases and the total"""
+        records = self.records()
+        steps = list(zip(PHASES, PHASES[1:])) + [('started', 'in_block')]
+        return {
+            f'{start}->{end}': np.array([
+                r[end] - r[start] for r in records if r[start] is not None and r[end] is not None])
+            for start, end in steps}
+
+    def show_summary(self, bins=HISTOGRAM_BINS):
+        print(f'Timeline of {len(self.records())} extrinsics')
+        for step, durations in self.summary().items():
+            if not len(durations):
+                continue
+            p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+            print(f'{step}: n={len(durations)}, p50={p50:.3f}s, p90={p90:.3f}s, p99={p99:.3f}s, max={durations.max():.3f}s')
+            counts, edges = np.histogram(durations, bins=bins)
+            for count, low, high in zip(counts, edges, edges[1:]):
+                print(f'    {low:8.3f}s - {high:8.3f}s {"#" * int(40 * count / counts.max())} {count}')
+
+
+TIMELINE = ExtrinsicTimeline()
+
+
+def _export_at_exit():
+    TIMELINE.export(EXTRINSIC_TIMELINE)
+    TIMELINE.show_summary()
+
+
+if EXTRINSIC_TIMELINE:
+    TIMELINE.enable()
+    atexit.register(_export_at_exit)
@@ -0,0 +1,143 @@
+import sys
+sys.path.append('.')
+
+import fcntl
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from substrateinterface import Keypair, KeypairType
+
+KEYPAIR_CACHE_DIR = os.environ.get(
+    'KEYPAIR_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'keypairs'))
+# Fresh keypairs derived at once when the stock on disk runs out
+FRESH_BATCH_SIZE = 256
+# Below this number, deriving in this process is cheaper than starting a process pool
+PROCESS_POOL_MIN = 64
+
+_CRYPTO_NAMES = {
+    KeypairType.SR25519: 'sr25519',
+    KeypairType.ECDSA: 'ecdsa',
+}
+
+
+def _derive_fresh(crypto_type):
+    # The entropy comes from os.urandom, because the RNG of Keypair.generate_mnemonic()
+    # is duplicated into forked workers and repeats the same mnemonics
+    seed = os.urandom(32)
+    if crypto_type == KeypairType.ECDSA:
+        kp = Keypair(private_key=seed, crypto_type=crypto_type)
+    else:
+        kp = Keypair.create_from_seed(seed.hex(), crypto_type=crypto_type)
+    return {'seed': seed.hex(), 'public_key': kp.public_key.hex(), 'private_key': kp.private_key.hex()}
+
+
+def _derive_uri(uri, crypto_type):
+    kp = Keypair.create_from_uri(uri, crypto_type=crypto_type)
+    return {'public_key': kp.public_key.hex(), 'private_key': kp.private_key.hex()}
+
+
+def _to_keypair(entry, crypto_type):
+    if crypto_type == KeypairType.ECDSA:
+        return Keypair(private_key=entry['private_key'], seed_hex=entry.get('seed'), crypto_type=crypto_type)
+    return Keypair(
+        public_key=entry['public_key'], private_key=entry['private_key'],
+        ss58_format=42, seed_hex=entry.get('seed'), crypto_type=crypto_type)
+
+
+class KeypairPool:
+    """
+    Hands out test keypairs without paying the sr25519/ECDSA derivation.
+
+    dev() derives the deterministic dev accounts (e.g. '//Alice') once and
+    keeps their keys on disk, later processes only rebuild the Keypair from
+    the stored keys. fresh() hands out accounts from a stock of random
+    keypairs on disk, which is refilled in batches by a process pool. Every
+    fresh account is handed out only once, also across processes (the stock
+    file is locked), so concurrent tests never share an account.
+
+    Example 1:    kp_sudo = KEYPAIR_POOL.dev('//Alice')
+    Example 2:    kp_user, kp_target = KEYPAIR_POOL.fresh_many(2)
+    """
+
+    def __init__(self, cache_dir=KEYPAIR_CACHE_DIR, batch_size=FRESH_BATCH_SIZE):
+        self._cache_dir = cache_dir
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._dev = {}
+
+    def _path(self, name):
+        return os.path.join(self._cache_dir, name)
+
+    @contextmanager
+    def _locked_json(self, name, default):
+        """Loads a json file under an exclusive file lock, and stores the updated content"""
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with self._lock, open(self._path(f'{name}.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with open(self._path(name)) as f:
+                    content = json.load(f)
+            except (OSError, ValueError):
+                content = default
+            yield content
+            tmp_path = self._path(f'{name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(content, f)
+            os.replace(tmp_path, self._path(name))
+
+    def dev(self, uri, crypto_type=KeypairType.SR25519) -> Keypair:
+        """Returns the keypair of a deterministic uri, e.g. '//Alice'"""
+        key = f'{_CRYPTO_NAMES[crypto_type]}:{uri}'
+        if key not in self._dev:
+            with self._locked_json('dev.json', {}) as entries:
+                if key not in entries:
+                    entries[key] = _derive_uri(uri, crypto_type)
+                entry = entries[key]
+            self._dev[key] = _to_keypair(entry, crypto_type)
+        return self._dev[key]
+
+    def is_dev(self, keypair) -> bool:
+        """Returns True if the keypair was handed out by dev() of this process"""
+        return any(kp.ss58_address == keypair.ss58_address for kp in list(self._dev.values()))
+
+    def prefill(self, n, crypto_type=KeypairType.SR25519) -> list:
+        """Derives n fresh keypair entries, in a process pool for large n"""
+        if n < PROCESS_POOL_MIN:
+            return [_derive_fresh(crypto_type) for _ in range(n)]
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(_derive_fresh, [crypto_type] * n, chunksize=16))
+
+    def fresh_many(self, n, crypto_type=KeypairType.SR25519) -> list:
+        """Hands out n unused random keypairs"""
+        with self._locked_json(f'fresh_{_CRYPTO_NAMES[crypto_type]}.json', []) as stock:
+            if len(stock) < n:
+                stock.extend(self.prefill(n - len(stock) + self._batch_size, crypto_type))
+            entries = stock[:n]
+            del stock[:n]
+        return [_to_keypair(entry, crypto_type) for entry in entries]
+
+    def fresh(self, crypto_type=KeypairType.SR25519) -> Keypair:
+        """Hands out one unused random keypair"""
+        return self.fresh_many(1, crypto_type)[0]
+
+
+KEYPAIR_POOL = KeypairPool()
+
+
+def dev_keypair(uri, crypto_type=KeypairType.SR25519) -> Keypair:
+    """Returns the cached keypair of a deterministic uri, see KeypairPool.dev()"""
+    return KEYPAIR_POOL.dev(uri, crypto_type)
+
+
+def fresh_keypair(crypto_type=KeypairType.SR25519) -> Keypair:
+    """Returns an unused random keypair, see KeypairPool.fresh()"""
+    return KEYPAIR_POOL.fresh(crypto_type)
+
+
+def fresh_keypairs(n, crypto_type=KeypairType.SR25519) -> list:
+    """Returns n unused random keypairs, see KeypairPool.fresh_many()"""
+    return KEYPAIR_POOL.fresh_many(n, crypto_type)
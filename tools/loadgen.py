@@ -0,0 +1,241 @@
+import sys
+sys.path.append('.')
+
+import argparse
+import itertools
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+from tools.extrinsic_submitter import ExtrinsicSubmitter
+from tools.keypair_pool import dev_keypair, fresh_keypairs
+from tools.pinned_cache import cached_get_events
+from tools.substrate_pool import get_substrate
+from tools.utils import WS_URL, TOKEN_NUM_BASE_DEV
+from tools.utils import fund_accounts, calculate_evm_addr, calculate_evm_account
+
+WORKLOADS = ['transfer', 'did', 'evm', 'mixed']
+# Free balance of every sender (and of its mapped EVM account)
+SENDER_BALANCE = 1000 * TOKEN_NUM_BASE_DEV
+TRANSFER_VALUE = 10 ** 9
+SINK_URI = '//Bob'
+EVM_TRANSFER_GAS = 21000
+EVM_MAX_FEE_PER_GAS = int('0xffffffff', 16)
+ETH_SINK_ADDR = '0x8eaf04151687736326c9fea17e25fc5287613693'
+# Threads signing and submitting, each on its own pooled connection
+SUBMIT_THREADS = 16
+# Seconds to wait for the inclusion of the last extrinsics
+DRAIN_TIMEOUT = 120
+
+Sample = namedtuple('Sample', ['workload', 'submitted_at', 'included_at', 'receipt', 'error'])
+
+
+class LoadReport(namedtuple('LoadReport', ['workload', 'target_rate', 'duration', 'samples', 'failed', 'block_counts'])):
+    """
+    Result of a LoadGenerator run
+    - samples:      one Sample per submitted extrinsic
+    - failed:       number of included extrinsics with a System.ExtrinsicFailed event
+    - block_counts: {block number: number of extrinsics of the run in the block}
+    """
+
+    @property
+    def included(self) -> list:
+        return [s for s in self.samples if s.receipt is not None]
+
+    @property
+    def rejected(self) -> list:
+        return [s for s in self.samples if s.error is not None]
+
+    @property
+    def pending(self) -> list:
+        return [s for s in self.samples if s.receipt is None and s.error is None]
+
+    @property
+    def achieved_tps(self) -> float:
+        included = self.included
+        if not included:
+            return 0.0
+        span = max(s.included_at for s in included) - min(s.submitted_at for s in self.samples)
+        return len(included) / span if span > 0 else 0.0
+
+    def latency_percentiles(self, percentiles=(50, 90, 99, 100)) -> dict:
+        """Returns {percentile: seconds from submission to inclusion}"""
+        latencies = [s.included_at - s.submitted_at for s in self.included]
+        if not latencies:
+            return {}
+        return dict(zip(percentiles, np.percentile(latencies, percentiles)))
+
+    def show(self):
+        print(f'Workload {self.workload}: target {self.target_rate} tx/s for {self.duration}s')
+        print(f'Submitted: {len(self.samples)}, rejected: {len(self.rejected)}, '
+              f'included: {len(self.included)}, not included: {len(self.pending)}, failed: {self.failed}')
+        print(f'Achieved: {self.achieved_tps:.1f} tx/s')
+        for percentile, latency in self.latency_percentiles().items():
+            print(f'Inclusion latency p{percentile}: {latency:.2f}s')
+        for number, count in sorted(self.block_counts.items()):
+            print(f'Block {number}: {count} extrinsics')
+        for error, count in Counter(str(s.error) for s in self.rejected).most_common(5):
+            print(f'Rejected {count}x: {error}')
+
+
+def compose_transfer(substrate, keypair, seq):
+    return substrate.compose_call(
+        call_module='Balances',
+        call_function='transfer',
+        call_params={
+            'dest': dev_keypair(SINK_URI).ss58_address,
+            'value': TRANSFER_VALUE,
+        })
+
+
+def compose_did(substrate, keypair, seq):
+    return substrate.compose_call(
+        call_module='PeaqDid',
+        call_function='add_attribute',
+        call_params={
+            'did_account': keypair.ss58_address,
+            'name': f'load-{seq}',
+            'value': f'value-{seq}',
+            'valid_for': None,
+        })
+
+
+def compose_evm(substrate, keypair, seq):
+    return substrate.compose_call(
+        call_module='EVM',
+        call_function='call',
+        call_params={
+            'source': calculate_evm_addr(keypair.ss58_address),
+            'target': ETH_SINK_ADDR,
+            'input': '0x',
+            'value': 1,
+            'gas_limit': EVM_TRANSFER_GAS,
+            'max_fee_per_gas': EVM_MAX_FEE_PER_GAS,
+            'max_priority_fee_per_gas': None,
+            'nonce': None,
+            'access_list': []
+        })
+
+
+COMPOSERS = {
+    'transfer': compose_transfer,
+    'did': compose_did,
+    'evm': compose_evm,
+}
+
+
+class LoadGenerator:
+    """
+    Drives sustained traffic at a target rate against a node.
+
+    The extrinsics are sent round-robin by a set of funded fresh senders. The
+    nonces are tracked locally and the extrinsics are signed offline, so a
+    submission costs one author_submitExtrinsic. The inclusion is tracked by
+    the shared block subscription of the ExtrinsicSubmitter.
+    A 'mixed' workload cycles through transfer, did and evm.
+
+    Example:
+        generator = LoadGenerator(WS_URL, 'transfer', senders=32)
+        generator.prepare()
+        generator.run(rate=100, duration=60).show()
+    """
+
+    def __init__(self, url, workload, senders=32, tip=0, threads=SUBMIT_THREADS):
+        if workload not in WORKLOADS:
+            raise ValueError(f'Unknown workload {workload}, choose one of {WORKLOADS}')
+        self.url = url
+        self.workload = workload
+        self.tip = tip
+        self.threads = threads
+        self.senders = fresh_keypairs(senders)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _workload_cycle(self):
+        if self.workload == 'mixed':
+            return list(COMPOSERS.keys())
+        return [self.workload]
+
+    def prepare(self):
+        """Funds the senders, and their mapped EVM accounts for EVM calls"""
+        targets = {kp.ss58_address: SENDER_BALANCE for kp in self.senders}
+        if 'evm' in self._workload_cycle():
+            targets.update({
+                calculate_evm_account(calculate_evm_addr(kp.ss58_address)): SENDER_BALANCE
+                for kp in self.senders})
+        fund_accounts(get_substrate(self.url), targets)
+
+    def _send(self, submitter, workload, keypair, samples):
+        substrate = get_substrate(self.url)
+        with self._lock:
+            seq = next(self._seq)
+        call = COMPOSERS[workload](substrate, keypair, seq)
+        submitted_at = time.time()
+        try:
+            future = submitter.submit_call(keypair, call, tip=self.tip)
+        except Exception as e:
+            samples.append(Sample(workload, submitted_at, None, None, e))
+            return None
+        future.add_done_callback(
+            lambda f: samples.append(Sample(
+                workload, submitted_at, time.time(),
+                None if f.cancelled() or f.exception() else f.result(),
+                f.exception() if not f.cancelled() else None)))
+        return future
+
+    def _count_failed(self, samples) -> int:
+        substrate = get_substrate(self.url)
+        ours = {}
+        for sample in samples:
+            if sample.receipt is not None:
+                ours.setdefault(sample.receipt.block_hash, set()).add(sample.receipt.extrinsic_idx)
+        return sum(
+            1 for block_hash, idxs in ours.items()
+            for event in cached_get_events(substrate, block_hash)
+            if event.value['extrinsic_idx'] in idxs
+            and (event.value['module_id'], event.value['event_id']) == ('System', 'ExtrinsicFailed'))
+
+    def run(self, rate, duration, drain_timeout=DRAIN_TIMEOUT) -> LoadReport:
+        """Submits rate extrinsics per second for duration seconds and waits for their inclusion"""
+        samples = []
+        workloads = itertools.cycle(self._workload_cycle())
+        senders = itertools.cycle(self.senders)
+        with ExtrinsicSubmitter(self.url) as submitter:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                started_at = time.time()
+                sends = []
+                for i in range(int(rate * duration)):
+                    delay = started_at + i / rate - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                    sends.append(executor.submit(self._send, submitter, next(workloads), next(senders), samples))
+                futures = [send.result() for send in sends]
+            wait([future for future in futures if future is not None], timeout=drain_timeout)
+
+        samples = list(samples)
+        block_counts = Counter(s.receipt.block_number for s in samples if s.receipt is not None)
+        return LoadReport(
+            self.workload, rate, duration, samples,
+            self._count_failed(samples), dict(block_counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate transaction load against a node')
+    parser.add_argument('-w', '--workload', choices=WORKLOADS, default='transfer', help='Kind of extrinsics')
+    parser.add_argument('-r', '--rate', type=float, default=50, help='Target extrinsics per second')
+    parser.add_argument('-d', '--duration', type=float, default=60, help='Seconds of load')
+    parser.add_argument('-s', '--senders', type=int, default=32, help='Number of funded senders')
+    parser.add_argument('-t', '--tip', type=int, default=0, help='Tip of every extrinsic')
+    parser.add_argument('-u', '--url', type=str, default=WS_URL, help='Websocket url of the node')
+    parser.add_argument('--threads', type=int, default=SUBMIT_THREADS, help='Submitting threads')
+
+    args = parser.parse_args()
+    generator = LoadGenerator(args.url, args.workload, args.senders, args.tip, args.threads)
+    generator.prepare()
+    generator.run(args.rate, args.duration).show()
+
+
+if __name__ == '__main__':
+    main()
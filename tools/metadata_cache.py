@@ -0,0 +1,76 @@
+import sys
+sys.path.append('.')
+
+import os
+import threading
+
+from scalecodec.base import ScaleBytes
+
+METADATA_CACHE_DIR = os.environ.get(
+    'METADATA_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'metadata'))
+
+# Decoded metadata, shared by all connections of this process
+_DECODED = {}
+_DECODED_LOCK = threading.Lock()
+
+
+class MetadataCache:
+    """
+    Metadata cache for a SubstrateInterface, plugged in as its cache_region.
+
+    SubstrateInterface asks the cache_region for 'METADATA_<specVersion>'
+    before it downloads and decodes the runtime metadata. This cache adds the
+    genesis hash to that key, keeps the decoded metadata for all connections
+    of the process, and persists the SCALE-encoded metadata in the cache
+    directory, so that a new process only decodes it locally. A runtime
+    upgrade changes the specVersion and therefore misses the cache.
+    """
+
+    def __init__(self, substrate, cache_dir=METADATA_CACHE_DIR):
+        self._substrate = substrate
+        self._genesis_hash = substrate.get_block_hash(0)
+        self._cache_dir = cache_dir
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, f'{self._genesis_hash}_{key}.scale')
+
+    def get(self, key):
+        with _DECODED_LOCK:
+            if (self._genesis_hash, key) in _DECODED:
+                return _DECODED[(self._genesis_hash, key)]
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = f.read()
+        try:
+            metadata = self._substrate.runtime_config.create_scale_object(
+                'MetadataVersioned', data=ScaleBytes(data))
+            metadata.decode()
+        except Exception as e:
+            print(f'Drop the broken metadata cache {path}: {e}')
+            os.remove(path)
+            return None
+
+        with _DECODED_LOCK:
+            _DECODED[(self._genesis_hash, key)] = metadata
+        return metadata
+
+    def set(self, key, metadata):
+        with _DECODED_LOCK:
+            _DECODED[(self._genesis_hash, key)] = metadata
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(metadata.data))
+        os.replace(tmp_path, path)
+
+
+def attach_metadata_cache(substrate):
+    """Lets the connection warm-start its runtime metadata from the MetadataCache"""
+    substrate.cache_region = MetadataCache(substrate)
+    return substrate
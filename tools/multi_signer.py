@@ -0,0 +1,113 @@
+import sys
+sys.path.append('.')
+
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.extrinsic_submitter import ExtrinsicSubmitter
+from tools.offline_signer import plain_value
+from tools.pinned_cache import cached_get_events
+from tools.substrate_pool import SUBSTRATE_POOL
+from tools.utils import into_substrate, into_keypair, compose_call, compose_sudo_call
+from tools.utils import show_extrinsic, generate_call_description, generate_batch_description
+
+# Threads signing and submitting the groups, each on its own pooled connection
+MAX_SIGNER_THREADS = 8
+ERROR_EVENTS = [
+    ('System', 'ExtrinsicFailed'),
+    ('Utility', 'BatchInterrupted'),
+    ('Utility', 'ItemFailed'),
+]
+
+SignerResult = namedtuple('SignerResult', ['receipt', 'error_events'])
+
+
+class MultiSignerBatch:
+    """
+    Executes the calls of several signers together, one extrinsic per signer.
+
+    The calls of each signer are wrapped into a Utility.batch_all (a single
+    call is sent as is). All extrinsics are signed and submitted concurrently
+    and waited for together, so independent signers land in the same block.
+
+    Example:
+        batch = MultiSignerBatch(substrate)
+        batch.compose_call(kp_bob, 'Council', 'vote', {...})
+        batch.compose_call(kp_eve, 'Council', 'vote', {...})
+        results = batch.execute()
+        results[kp_bob.ss58_address].receipt.is_success
+    """
+
+    def __init__(self, substrate_or_url):
+        self.substrate = into_substrate(substrate_or_url)
+        self.groups = OrderedDict()
+
+    def add(self, keypair_or_uri, calls):
+        """Appends composed calls to the group of the signer"""
+        keypair = into_keypair(keypair_or_uri)
+        if keypair.ss58_address not in self.groups:
+            self.groups[keypair.ss58_address] = (keypair, [])
+        self.groups[keypair.ss58_address][1].extend(calls)
+
+    def add_batch(self, batch):
+        """Appends the calls of an ExtrinsicBatch to the group of its signer"""
+        self.add(batch.keypair, batch.batch)
+
+    def compose_call(self, keypair_or_uri, module, extrinsic, params):
+        """Composes an extrinsic call and appends it to the group of the signer"""
+        self.add(keypair_or_uri, [compose_call(self.substrate, module, extrinsic, params)])
+
+    def compose_sudo_call(self, keypair_or_uri, module, extrinsic, params):
+        """Composes a sudo call and appends it to the group of the signer"""
+        self.add(keypair_or_uri, [compose_sudo_call(self.substrate, module, extrinsic, params)])
+
+    def clear(self):
+        self.groups = OrderedDict()
+
+    def _submit_group(self, submitter, keypair, calls, wait_for_finalization):
+        # The executor threads end with execute(), so they lease pooled connections
+        # instead of opening thread-local ones
+        with SUBSTRATE_POOL.lease(self.substrate.url) as substrate:
+            calls = [substrate.compose_call(c['call_module'], c['call_function'], c['call_args']) for c in calls]
+            if len(calls) == 1:
+                call = calls[0]
+            else:
+                call = substrate.compose_call('Utility', 'batch_all', {'calls': calls})
+            return submitter.submit_call(keypair, call, wait_for_finalization, substrate=substrate)
+
+    def _error_events(self, receipt):
+        return [
+            event for event in cached_get_events(self.substrate, receipt.block_hash)
+            if event.value['extrinsic_idx'] == receipt.extrinsic_idx
+            and (event.value['module_id'], event.value['event_id']) in ERROR_EVENTS]
+
+    def execute(self, wait_for_finalization=False) -> dict:
+        """
+        Signs and submits the extrinsics of all signers at once
+        Returns {ss58_address: SignerResult(receipt, error_events)}
+        """
+        groups = list(self.groups.values())
+        if not groups:
+            return {}
+        plain_groups = [(keypair, [plain_value(call) for call in calls]) for keypair, calls in groups]
+        with ExtrinsicSubmitter(self.substrate) as submitter:
+            with ThreadPoolExecutor(max_workers=min(len(groups), MAX_SIGNER_THREADS)) as executor:
+                futures = list(executor.map(
+                    lambda group: self._submit_group(submitter, *group, wait_for_finalization),
+                    plain_groups))
+            receipts = submitter.wait_all(futures)
+
+        results = OrderedDict()
+        for (keypair, calls), receipt in zip(groups, receipts):
+            if len(calls) == 1:
+                show_extrinsic(receipt, generate_call_description(calls[0]))
+            else:
+                show_extrinsic(receipt, generate_batch_description(calls))
+            results[keypair.ss58_address] = SignerResult(receipt, self._error_events(receipt))
+        return results
+
+    def execute_n_clear(self, wait_for_finalization=False) -> dict:
+        """Combination of execute() and clear()"""
+        results = self.execute(wait_for_finalization)
+        self.clear()
+        return results
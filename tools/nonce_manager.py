@@ -0,0 +1,136 @@
+import sys
+sys.path.append('.')
+
+import threading
+
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.extrinsic_timeline import TIMELINE, ExtrinsicStatusError
+from tools.offline_signer import OFFLINE_SIGNER, is_stale_context_error
+from tools.parallel_workers import shared_submission
+
+NONCE_RETRIES = 3
+# Pool rejections which mean, that the local nonce is out of sync with the chain
+NONCE_ERRORS = ['outdated', 'Priority is too low', 'Stale']
+# Pool statuses of a watched extrinsic, after which it cannot be included anymore, so it is re-signed
+RESUBMIT_STATUSES = ['invalid', 'dropped', 'usurped']
+
+
+class NonceManager:
+    """
+    Tracks the next nonce of each signer locally, so that a signer can submit
+    several extrinsics back-to-back without waiting for their inclusion.
+
+    The first nonce of a signer is read by system_accountNextIndex, which also
+    counts the signer's extrinsics in the transaction pool. Afterwards nonces
+    are handed out locally, until resync() is called because the pool rejected
+    an extrinsic (Stale/Future), forget() after a failed submission, or reset()
+    after a chain restart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nonces = {}
+
+    @staticmethod
+    def _key(substrate, addr):
+        return (substrate.url, addr)
+
+    @staticmethod
+    def _chain_nonce(substrate, addr) -> int:
+        return substrate.rpc_request('system_accountNextIndex', [addr]).get('result', 0)
+
+    def next_nonce(self, substrate, keypair) -> int:
+        """Hands out the next nonce for the keypair on the given chain"""
+        key = self._key(substrate, keypair.ss58_address)
+        with self._lock:
+            if key not in self._nonces:
+                self._nonces[key] = self._chain_nonce(substrate, keypair.ss58_address)
+            nonce = self._nonces[key]
+            self._nonces[key] = nonce + 1
+            return nonce
+
+    def resync(self, substrate, keypair) -> int:
+        """Re-reads the nonce of the keypair from the chain"""
+        key = self._key(substrate, keypair.ss58_address)
+        with self._lock:
+            self._nonces[key] = self._chain_nonce(substrate, keypair.ss58_address)
+            return self._nonces[key]
+
+    def forget(self, substrate, keypair):
+        """Drops the nonce of the keypair, the next one is read from the chain again"""
+        with self._lock:
+            self._nonces.pop(self._key(substrate, keypair.ss58_address), None)
+
+    def reset(self, urls=None):
+        """Forgets all tracked nonces, or those on the given urls, e.g. after the chain was restarted"""
+        with self._lock:
+            if urls is None:
+                self._nonces = {}
+            else:
+                self._nonces = {key: nonce for key, nonce in self._nonces.items() if key[0] not in set(urls)}
+
+
+NONCE_MANAGER = NonceManager()
+
+
+def is_nonce_error(error) -> bool:
+    return any(msg in str(error) for msg in NONCE_ERRORS)
+
+
+def _on_rejection(substrate, keypair, record, nonce, error):
+    """Resyncs the nonce after the submission failed, returns if the call should be re-signed, raises otherwise"""
+    NONCE_MANAGER.resync(substrate, keypair)
+    if is_stale_context_error(error):
+        OFFLINE_SIGNER.invalidate(substrate)
+        print(f'Signing context of {substrate.url} outdated, reload: {error}')
+        return
+    if isinstance(error, ExtrinsicStatusError) and error.status in RESUBMIT_STATUSES:
+        print(f'Extrinsic with nonce {nonce} of {keypair.ss58_address} {error.status}, resubmit')
+        return
+    # A future or timed out extrinsic may still be included, so it is not re-signed
+    if isinstance(error, ExtrinsicStatusError) or not is_nonce_error(error):
+        TIMELINE.failed(record, error)
+        raise error
+    print(f'Nonce {nonce} of {keypair.ss58_address} rejected, resync: {error}')
+
+
+def submit_with_nonce(substrate, keypair, call, wait_for_inclusion=True, wait_for_finalization=False,
+                      era={'period': 64}, tip=0, submit=None):
+    """
+    Signs the call with the next local nonce of the keypair and submits it.
+    The signature is built offline from the cached signing context of the chain.
+    On a nonce related rejection, or an invalid, dropped or usurped extrinsic, the nonce
+    is resynced and the call re-signed, on an outdated signing context (e.g. after a runtime
+    upgrade) the context is reloaded. A future or timed out extrinsic raises an ExtrinsicStatusError
+    after the resync, any other failure drops the local nonce of the keypair.
+    With wait_for_inclusion=False the returned receipt only has the extrinsic hash.
+    An alternative submit(extrinsic) function can replace substrate.submit_extrinsic.
+    The phases of the extrinsic are recorded by the TIMELINE, if it is enabled.
+    In parallel test runs, the dev accounts shared by the workers submit one at a time, see shared_submission().
+    """
+    record = TIMELINE.start(substrate, keypair, call)
+    for _ in range(NONCE_RETRIES):
+        with shared_submission(keypair) as shared:
+            if shared:
+                NONCE_MANAGER.resync(substrate, keypair)
+            nonce = NONCE_MANAGER.next_nonce(substrate, keypair)
+            try:
+                extrinsic = OFFLINE_SIGNER.sign(
+                    substrate, keypair, call, nonce, era=dict(era) if era else None, tip=tip)
+                TIMELINE.signed(record, extrinsic)
+                if submit is not None:
+                    TIMELINE.submitted(record)
+                    result = submit(extrinsic)
+                    TIMELINE.accepted(record)
+                    return result
+                return TIMELINE.submit_extrinsic(
+                    substrate, extrinsic, record, wait_for_inclusion, wait_for_finalization)
+            except SubstrateRequestException as e:
+                _on_rejection(substrate, keypair, record, nonce, e)
+            except Exception as e:
+                # The nonce may be used or not, e.g. after a dropped connection
+                NONCE_MANAGER.forget(substrate, keypair)
+                TIMELINE.failed(record, e)
+                raise
+    TIMELINE.failed(record, 'no valid nonce')
+    raise IOError(f'Cannot submit with a valid nonce for {keypair.ss58_address}')
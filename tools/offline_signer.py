@@ -0,0 +1,201 @@
+import sys
+sys.path.append('.')
+
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from scalecodec.types import GenericCall
+from substrateinterface import SubstrateInterface
+from tools.block_subscription import get_block_subscription
+from tools.substrate_pool import get_substrate
+
+# Mortality of the signed extrinsics in blocks
+ERA_PERIOD = 64
+# Blocks after which the era checkpoint is moved forward, which leaves at least
+# ERA_PERIOD - ERA_REFRESH_BLOCKS blocks of validity to every signed extrinsic
+ERA_REFRESH_BLOCKS = 16
+# Fallback to count blocks by time, if no block subscription of the chain is running
+EXPECTED_BLOCK_TIME = 12
+# Pool rejections which mean, that the signing context is outdated (runtime upgrade, old era)
+STALE_CONTEXT_ERRORS = ['bad signature', 'ancient birth block', 'AncientBirthBlock', 'BadProof']
+
+SigningContext = namedtuple(
+    'SigningContext',
+    ['spec_version', 'transaction_version', 'genesis_hash',
+     'era_period', 'era_current', 'era_birth', 'era_block_hash', 'created_at'])
+
+
+def plain_value(value):
+    """Turns composed calls back into plain values, so another connection can compose them"""
+    if isinstance(value, GenericCall):
+        return plain_value(value.value)
+    if isinstance(value, dict):
+        return {k: plain_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(plain_value(v) for v in value)
+    return value
+
+
+class _OfflineSubstrate:
+    """
+    Stands in for the SubstrateInterface in its signing methods, so that their
+    payload and extrinsic encoding is reused, but the node queries are answered
+    from the SigningContext
+    """
+
+    generate_signature_payload = SubstrateInterface.generate_signature_payload
+    create_signed_extrinsic = SubstrateInterface.create_signed_extrinsic
+
+    def __init__(self, substrate, context):
+        self.runtime_config = substrate.runtime_config
+        self.metadata = substrate.metadata
+        self.runtime_version = context.spec_version
+        self.transaction_version = context.transaction_version
+        self._context = context
+
+    def init_runtime(self):
+        pass
+
+    def get_block_hash(self, block_id):
+        if block_id == 0:
+            return self._context.genesis_hash
+        if block_id == self._context.era_birth:
+            return self._context.era_block_hash
+        raise ValueError(f'Block {block_id} is not in the signing context')
+
+
+def sign_with_context(substrate, context, keypair, call, nonce, era={'period': ERA_PERIOD}, tip=0):
+    """
+    Signs the call without any RPC, the runtime of the substrate must be initialised
+    with the runtime of the context. era=None signs an immortal extrinsic.
+    """
+    if era is not None:
+        if era.get('period', ERA_PERIOD) != context.era_period:
+            raise ValueError(f'The signing context has an era period of {context.era_period}, not {era}')
+        era = {'period': context.era_period, 'current': context.era_current}
+    return _OfflineSubstrate(substrate, context).create_signed_extrinsic(
+        call=call, keypair=keypair, era=era, nonce=nonce, tip=tip)
+
+
+# State of a signing worker process, see OfflineSigner.sign_many()
+_WORKER = {}
+
+
+def _init_worker(url):
+    substrate = get_substrate(url)
+    substrate.init_runtime()
+    _WORKER['substrate'] = substrate
+
+
+def _sign_task(task):
+    context, keypair, call_value, nonce, era, tip = task
+    substrate = _WORKER['substrate']
+    if substrate.runtime_version != context.spec_version:
+        substrate.init_runtime()
+    call = substrate.runtime_config.create_scale_object('Call', metadata=substrate.metadata)
+    call.encode(call_value)
+    extrinsic = sign_with_context(substrate, context, keypair, call, nonce, era, tip)
+    return str(extrinsic.data)
+
+
+class OfflineSigner:
+    """
+    Signs extrinsics without querying the node for every signature.
+
+    substrate.create_signed_extrinsic() asks the node for the runtime version,
+    the finalized head, the genesis hash and the era birth block on every call.
+    Here these are read once per chain into a SigningContext, whose era
+    checkpoint is moved forward every ERA_REFRESH_BLOCKS blocks. Nonces are
+    passed in, e.g. from the NONCE_MANAGER. After a runtime upgrade the pool
+    rejects the signatures, invalidate() makes the next signature reload the
+    context.
+
+    Example 1:    extrinsic = OFFLINE_SIGNER.sign(substrate, kp, call, nonce)
+    Example 2:    hex_extrinsics = OFFLINE_SIGNER.sign_many(WS_URL, kp, calls, nonces)
+    """
+
+    def __init__(self, era_period=ERA_PERIOD, refresh_blocks=ERA_REFRESH_BLOCKS):
+        self._era_period = era_period
+        self._refresh_blocks = refresh_blocks
+        self._lock = threading.Lock()
+        self._contexts = {}
+
+    def _is_stale(self, url, context) -> bool:
+        height = get_block_subscription(url).height
+        if height is not None:
+            return height - context.era_current >= self._refresh_blocks
+        return time.time() - context.created_at >= self._refresh_blocks * EXPECTED_BLOCK_TIME
+
+    def _load(self, substrate, previous) -> SigningContext:
+        substrate.init_runtime()
+        if previous is not None:
+            genesis_hash = previous.genesis_hash
+        else:
+            genesis_hash = substrate.get_block_hash(0)
+        era_current = substrate.get_block_number(substrate.get_chain_finalised_head())
+        era = substrate.runtime_config.create_scale_object('Era')
+        era.encode({'period': self._era_period, 'current': era_current})
+        era_birth = era.birth(era_current)
+        return SigningContext(
+            substrate.runtime_version, substrate.transaction_version, genesis_hash,
+            self._era_period, era_current, era_birth, substrate.get_block_hash(era_birth), time.time())
+
+    def context(self, substrate) -> SigningContext:
+        """Returns the signing context of the chain, (re)loaded with the given substrate if needed"""
+        with self._lock:
+            context = self._contexts.get(substrate.url)
+            if context is None or self._is_stale(substrate.url, context):
+                context = self._load(substrate, context)
+                self._contexts[substrate.url] = context
+            return context
+
+    def invalidate(self, substrate):
+        """Reloads the signing context of the chain on the next signature"""
+        with self._lock:
+            self._contexts.pop(substrate.url, None)
+
+    def reset(self, urls=None):
+        """Forgets all signing contexts, or those of the given urls, e.g. after the chain was restarted"""
+        with self._lock:
+            if urls is None:
+                self._contexts = {}
+            else:
+                for url in urls:
+                    self._contexts.pop(url, None)
+
+    def sign(self, substrate, keypair, call, nonce, era={'period': ERA_PERIOD}, tip=0):
+        """Signs the call with the cached signing context of the chain"""
+        context = self.context(substrate)
+        if substrate.runtime_version != context.spec_version:
+            # Another connection loaded the context after a runtime upgrade
+            substrate.init_runtime()
+        if era is not None and era.get('period', self._era_period) != self._era_period:
+            return substrate.create_signed_extrinsic(call=call, keypair=keypair, era=dict(era), nonce=nonce, tip=tip)
+        return sign_with_context(substrate, context, keypair, call, nonce, era, tip)
+
+    def sign_many(self, url, keypair, calls, nonces, era={'period': ERA_PERIOD}, tip=0, processes=None) -> list:
+        """
+        Signs many calls of one signer in a process pool, e.g. for load generation
+        Parameters:
+        - calls:    composed calls, or their plain values
+                    {'call_module': ..., 'call_function': ..., 'call_args': ...}
+        - nonces:   one nonce per call
+        Returns the signed extrinsics as hex strings for author_submitExtrinsic
+        """
+        context = self.context(get_substrate(url))
+        tasks = [(context, keypair, plain_value(call), nonce, era, tip) for call, nonce in zip(calls, nonces)]
+        # The workers are spawned, because forked workers would share the websockets of this process
+        with ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(url,)) as executor:
+            return list(executor.map(_sign_task, tasks, chunksize=64))
+
+
+OFFLINE_SIGNER = OfflineSigner()
+
+
+def is_stale_context_error(error) -> bool:
+    return any(msg in str(error) for msg in STALE_CONTEXT_ERRORS)
@@ -0,0 +1,105 @@
+import sys
+sys.path.append('.')
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+
+from substrateinterface import KeypairType
+from tools.keypair_pool import KEYPAIR_POOL, dev_keypair
+
+# Set by pytest-xdist in its worker processes, e.g. 'gw0'
+WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', '')
+WORKER_COUNT = int(os.environ.get('PYTEST_XDIST_WORKER_COUNT', '1'))
+WORKER_INDEX = int(WORKER_ID[2:]) if WORKER_ID.startswith('gw') else 0
+PARALLEL = bool(WORKER_ID)
+LOCK_DIR = os.environ.get(
+    'WORKER_LOCK_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'locks'))
+# Dev accounts, which the independent tests use as senders, each worker gets its own copy
+WORKER_SENDER_URIS = ['//Alice', '//Bob', '//Bob//stash', '//Dave', '//Eve']
+WORKER_FUNDS = 10 ** 6 * 10 ** 18
+
+
+class WorkerLock:
+    """
+    Lock across the pytest-xdist workers (and the threads of a worker) by a
+    lock file. It is reentrant in a process, so a test which holds it can call
+    helpers which take it again.
+    """
+
+    def __init__(self, name, lock_dir=LOCK_DIR):
+        self._path = os.path.join(lock_dir, f'{name}.lock')
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            self._file = open(self._path, 'w')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+# Held by tests which change the global chain configuration by sudo, e.g. BlockReward
+GLOBAL_CONFIG_LOCK = WorkerLock('global_config')
+_ACCOUNT_LOCKS = {}
+_ACCOUNT_LOCKS_LOCK = threading.Lock()
+
+
+def worker_uri(uri) -> str:
+    """Returns the uri of the worker's own copy of a dev account, e.g. '//Alice//gw0'"""
+    return f'{uri}//{WORKER_ID}' if PARALLEL else uri
+
+
+def worker_keypair(uri, crypto_type=KeypairType.SR25519):
+    """Returns the worker's own copy of a dev account, or the dev account itself when running serially"""
+    return dev_keypair(worker_uri(uri), crypto_type)
+
+
+def worker_keypairs(uris=WORKER_SENDER_URIS) -> list:
+    return [worker_keypair(uri) for uri in uris]
+
+
+def is_shared_keypair(keypair) -> bool:
+    """Dev accounts are shared by all workers, except for the workers' own copies"""
+    worker_addresses = {kp.ss58_address for kp in worker_keypairs()} if PARALLEL else set()
+    return KEYPAIR_POOL.is_dev(keypair) and keypair.ss58_address not in worker_addresses
+
+
+def account_lock(keypair) -> WorkerLock:
+    with _ACCOUNT_LOCKS_LOCK:
+        if keypair.ss58_address not in _ACCOUNT_LOCKS:
+            _ACCOUNT_LOCKS[keypair.ss58_address] = WorkerLock(f'account_{keypair.ss58_address}')
+        return _ACCOUNT_LOCKS[keypair.ss58_address]
+
+
+@contextmanager
+def shared_submission(keypair):
+    """
+    Serializes the submissions of a shared account across the workers, and yields
+    True if the local nonce has to be resynced, because other workers may have used it
+    """
+    if not PARALLEL or not is_shared_keypair(keypair):
+        yield False
+        return
+    with account_lock(keypair):
+        yield True
@@ -1,8 +1,11 @@
 from functools import wraps
+from tools.nonce_manager import submit_with_nonce
 
 
 def _show_extrinsic(receipt, info_type):
-    if receipt.is_success:
+    if receipt.block_hash is None:
+        print(f'📨 {info_type}, Submitted: {receipt.extrinsic_hash}')
+    elif receipt.is_success:
         print(f'✅ {info_type}, Success: {receipt.get_extrinsic_identifier()}')
     else:
         print(f'⚠️  {info_type}, Extrinsic Failed: {receipt.error_message} {receipt.get_extrinsic_identifier()}')
@@ -30,12 +33,11 @@ def sudo_extrinsic_send(sudo_keypair):
         @wraps(func)
         def wrapper(*args, **kwargs):
             substrate = args[0]
+            wait_for_inclusion = kwargs.pop('wait_for_inclusion', True)
             call = func(*args, **kwargs)
-            extrinsic = substrate.create_signed_extrinsic(
-                call=call,
-                keypair=sudo_keypair,
-            )
-            receipt = substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+            receipt = submit_with_nonce(
+                substrate, sudo_keypair, call,
+                wait_for_inclusion=wait_for_inclusion, era=None)
             _show_extrinsic(receipt, func.__name__)
             return receipt
         return wrapper
@@ -47,17 +49,12 @@ def user_extrinsic_send(func):
     def wrapper(*args, **kwargs):
         substrate = args[0]
         kp_src = args[1]
-        nonce = substrate.get_account_nonce(kp_src.ss58_address)
+        wait_for_inclusion = kwargs.pop('wait_for_inclusion', True)
 
         call = func(*args, **kwargs)
 
-        extrinsic = substrate.create_signed_extrinsic(
-            call=call,
-            keypair=kp_src,
-            era={'period': 64},
-            nonce=nonce
-        )
-        receipt = substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+        receipt = submit_with_nonce(
+            substrate, kp_src, call, wait_for_inclusion=wait_for_inclusion)
         _show_extrinsic(receipt, func.__name__)
         return receipt
     return wrapper
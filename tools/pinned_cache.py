@@ -0,0 +1,88 @@
+import sys
+sys.path.append('.')
+
+import threading
+from collections import OrderedDict
+
+PINNED_CACHE_SIZE = 1024
+
+
+class PinnedQueryCache:
+    """
+    Bounded LRU cache for chain reads pinned to a block hash.
+
+    The state of a given block hash never changes, so query, get_events,
+    get_block and get_constant at an explicit block_hash are decoded only
+    once. Reads without a block_hash follow the chain head and are never
+    cached. hits/misses count the lookups, see stats().
+    """
+
+    def __init__(self, maxsize=PINNED_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """Returns the cached value of key, or stores the result of load()"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+
+PINNED_CACHE = PinnedQueryCache()
+
+
+def _pinned(substrate, key, block_hash, load):
+    if block_hash is None:
+        return load()
+    return PINNED_CACHE.get((substrate.url, block_hash) + key, load)
+
+
+def cached_query(substrate, module, storage_function, params=None, block_hash=None):
+    """substrate.query(), cached if block_hash is given"""
+    return _pinned(
+        substrate, ('query', module, storage_function, repr(params)), block_hash,
+        lambda: substrate.query(module, storage_function, params, block_hash=block_hash))
+
+
+def cached_get_events(substrate, block_hash=None):
+    """substrate.get_events(), cached if block_hash is given"""
+    return _pinned(
+        substrate, ('get_events',), block_hash,
+        lambda: substrate.get_events(block_hash))
+
+
+def cached_get_block(substrate, block_hash=None):
+    """substrate.get_block(), cached if block_hash is given"""
+    return _pinned(
+        substrate, ('get_block',), block_hash,
+        lambda: substrate.get_block(block_hash))
+
+
+def cached_get_constant(substrate, module, constant, block_hash=None):
+    """substrate.get_constant(), cached if block_hash is given"""
+    return _pinned(
+        substrate, ('get_constant', module, constant), block_hash,
+        lambda: substrate.get_constant(module, constant, block_hash))
@@ -7,38 +7,49 @@ sys.path.append('.')
 
 import time
 from python_on_whales import docker, DockerClient
-from substrateinterface import SubstrateInterface
 from tools.utils import WS_URL
-from websocket import WebSocketConnectionClosedException
+from tools.substrate_pool import SUBSTRATE_POOL
+from tools.nonce_manager import NONCE_MANAGER
+from tools.offline_signer import OFFLINE_SIGNER
+from python_on_whales.exceptions import DockerException
+from tools.chain_readiness import CHAIN_SERVICES, compose_chain_services, wait_for_chains_ready
 
 
-def restart_parachain_launch():
+def get_parachain_launch_docker() -> DockerClient:
+    """Returns the docker client of the running parachain-launch compose project"""
     projects = docker.compose.ls()
     project = [p for p in projects if 'parachain-launch' in str(p.config_files[0])]
     if len(project) == 0 or len(project) > 1:
-        return IOError(f'Found {len(project)} parachain-launch projects, {project}')
+        raise IOError(f'Found {len(project)} parachain-launch projects, {project}')
 
     compose_file = str(project[0].config_files[0])
-    my_docker = DockerClient(compose_files=[compose_file])
+    return DockerClient(compose_files=[compose_file])
+
+
+def reset_chain_clients(urls=None):
+    """Drops the connections, nonces and signing contexts of the previous chain, by default of all urls"""
+    SUBSTRATE_POOL.reset(urls)
+    NONCE_MANAGER.reset(urls)
+    OFFLINE_SIGNER.reset(urls)
+
 
+def wait_for_compose_chains(my_docker, started_at):
+    """Waits until the chains of the compose project have produced their first block"""
+    try:
+        services = compose_chain_services(my_docker.compose.config(return_json=True))
+    except DockerException as e:
+        print(f'Cannot read the compose config, probe all chains: {e}')
+        services = CHAIN_SERVICES
+    return wait_for_chains_ready(services or {'parachain': WS_URL}, started_at)
+
+
+def restart_parachain_launch():
+    my_docker = get_parachain_launch_docker()
     my_docker.compose.down(volumes=True)
+    reset_chain_clients()
+    started_at = time.time()
     my_docker.compose.up(detach=True, build=True)
-    count_down = 0
-    wait_time = 60
-    while count_down < wait_time:
-        try:
-            SubstrateInterface(
-                url=WS_URL,
-            )
-            return
-        except (ConnectionResetError, WebSocketConnectionClosedException) as e:
-            print(f'Cannot connect to {WS_URL}, {e}')
-            count_down += 5
-            time.sleep(5)
-            continue
-        except Exception:
-            raise IOError(f'Cannot connect to {WS_URL}')
-    raise IOError(f'Cannot connect to {WS_URL} after {wait_time} seconds')
+    return wait_for_compose_chains(my_docker, started_at)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,166 @@
+import sys
+sys.path.append('.')
+
+import json
+import threading
+import time
+from collections import defaultdict
+
+from substrateinterface import SubstrateInterface
+from web3 import HTTPProvider
+
+# Rows of the report tables
+REPORT_TOP = 20
+NO_TEST = '-'
+
+
+class RpcStats:
+    __slots__ = ['calls', 'errors', 'bytes_sent', 'bytes_received', 'seconds', 'max_seconds']
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, other):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _json_size(value) -> int:
+    try:
+        return len(json.dumps(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class RpcProfiler:
+    """
+    Counts the RPC calls of all SubstrateInterface and Web3 HTTP connections.
+
+    install() wraps SubstrateInterface.rpc_request and HTTPProvider.make_request,
+    afterwards the calls, errors, bytes of the JSON payloads and the latency
+    are summed per (test, transport, method). current_test is set by the pytest
+    hooks in conftest.py, RPCs of helper threads count for the running test.
+    Subscriptions (e.g. author_submitAndWatchExtrinsic) count until the
+    result handler returns.
+
+    Example:    pytest --rpc-profile=rpc_profile.json tests/pallet_rbac_test.py
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(RpcStats)
+        self._originals = {}
+        self.current_test = NO_TEST
+
+    @property
+    def installed(self) -> bool:
+        return bool(self._originals)
+
+    def record(self, transport, method, seconds, bytes_sent, bytes_received, error=False):
+        with self._lock:
+            stats = self._stats[(self.current_test, transport, method)]
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def _wrap(self, transport, original, request_size):
+        profiler = self
+
+        def wrapper(self, method, params, *args, **kwargs):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = original(self, method, params, *args, **kwargs)
+                return response
+            finally:
+                profiler.record(
+                    transport, method, time.perf_counter() - start,
+                    request_size(self, method, params), _json_size(response),
+                    error=response is None or (isinstance(response, dict) and 'error' in response))
+        wrapper.__wrapped__ = original
+        return wrapper
+
+    def install(self):
+        """Starts counting, the wrappers apply to existing and new connections"""
+        if self.installed:
+            return
+        self._originals = {
+            (SubstrateInterface, 'rpc_request'): SubstrateInterface.rpc_request,
+            (HTTPProvider, 'make_request'): HTTPProvider.make_request,
+        }
+        SubstrateInterface.rpc_request = self._wrap(
+            'substrate', SubstrateInterface.rpc_request,
+            lambda substrate, method, params: _json_size({'jsonrpc': '2.0', 'method': method, 'params': params, 'id': 0}))
+        HTTPProvider.make_request = self._wrap(
+            'web3', HTTPProvider.make_request,
+            lambda provider, method, params: len(provider.encode_rpc_request(method, params)))
+
+    def uninstall(self):
+        for (cls, name), original in self._originals.items():
+            setattr(cls, name, original)
+        self._originals = {}
+
+    def reset(self):
+        with self._lock:
+            self._stats = defaultdict(RpcStats)
+
+    def stats(self) -> dict:
+        """Returns {(test, transport, method): RpcStats}"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _grouped(self, key) -> dict:
+        grouped = defaultdict(RpcStats)
+        for (test, transport, method), stats in self.stats().items():
+            grouped[key(test, transport, method)].add(stats)
+        return grouped
+
+    def by_method(self) -> dict:
+        """Returns {(transport, method): RpcStats} over all tests"""
+        return self._grouped(lambda test, transport, method: (transport, method))
+
+    def by_test(self) -> dict:
+        """Returns {test: RpcStats} over all methods"""
+        return self._grouped(lambda test, transport, method: test)
+
+    def dump(self, path):
+        """Writes all counters as json"""
+        rows = [
+            dict(stats.as_dict(), test=test, transport=transport, method=method)
+            for (test, transport, method), stats in self.stats().items()]
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+    def report(self, top=REPORT_TOP) -> str:
+        """Returns the methods and tests with the most RPC time as text tables"""
+        lines = [f'{"RPC method":<48} {"calls":>8} {"errors":>6} {"sent kB":>9} {"recv kB":>9} {"total s":>9} {"max s":>7}']
+        methods = sorted(self.by_method().items(), key=lambda item: -item[1].seconds)
+        for (transport, method), stats in methods[:top]:
+            lines.append(
+                f'{transport + ":" + method:<48} {stats.calls:>8} {stats.errors:>6} '
+                f'{stats.bytes_sent / 1024:>9.1f} {stats.bytes_received / 1024:>9.1f} '
+                f'{stats.seconds:>9.2f} {stats.max_seconds:>7.2f}')
+        lines.append('')
+        lines.append(f'{"Test":<90} {"calls":>8} {"total s":>9}')
+        tests = sorted(self.by_test().items(), key=lambda item: -item[1].seconds)
+        for test, stats in tests[:top]:
+            lines.append(f'{test[-90:]:<90} {stats.calls:>8} {stats.seconds:>9.2f}')
+        return '\n'.join(lines)
+
+
+RPC_PROFILER = RpcProfiler()
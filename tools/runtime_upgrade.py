@@ -3,11 +3,11 @@ sys.path.append('./')
 import os
 import time
 
-from substrateinterface import SubstrateInterface
-from tools.utils import show_extrinsic, WS_URL, KP_GLOBAL_SUDO, RELAYCHAIN_WS_URL, get_block_height, funds
+from tools.substrate_pool import get_substrate
+from tools.utils import show_extrinsic, WS_URL, KP_GLOBAL_SUDO, RELAYCHAIN_WS_URL, funds
 from substrateinterface.utils.hasher import blake2_256
 from tools.payload import sudo_call_compose, sudo_extrinsic_send
-from tools.utils import wait_for_n_blocks
+from tools.utils import wait_for_n_blocks, wait_until_block_heights
 from tools.restart import restart_parachain_launch
 import argparse
 
@@ -46,13 +46,12 @@ def send_ugprade_call(substrate, wasm_file):
 
 
 def wait_until_block_height(substrate, block_height):
-    current_block = get_block_height(substrate)
-    block_num = block_height - current_block + 1
-    wait_for_n_blocks(substrate, block_num)
+    """Waits until the block after block_height has been created"""
+    wait_until_block_heights({substrate: block_height + 1})
 
 
-def wait_relay_upgrade_block():
-    relay_substrate = SubstrateInterface(url=RELAYCHAIN_WS_URL, type_registry_preset='rococo')
+def wait_relay_upgrade_block(relay_url=None):
+    relay_substrate = get_substrate(relay_url or RELAYCHAIN_WS_URL, type_registry_preset='rococo')
     result = relay_substrate.query(
         'Paras',
         'UpcomingUpgrades',
@@ -65,19 +64,19 @@ def wait_relay_upgrade_block():
     wait_until_block_height(relay_substrate, int(result.value[0][1]))
 
 
-def upgrade(runtime_path):
-    substrate = SubstrateInterface(url=WS_URL)
+def upgrade(runtime_path, url=None, relay_url=None):
+    substrate = get_substrate(url or WS_URL)
     wait_for_n_blocks(substrate, 1)
 
     print(f'Global Sudo: {KP_GLOBAL_SUDO.ss58_address}')
     receipt = send_ugprade_call(substrate, runtime_path)
     show_extrinsic(receipt, 'upgrade?')
-    wait_relay_upgrade_block()
+    wait_relay_upgrade_block(relay_url)
 
 
-def fund_account():
+def fund_account(url=None):
     print('update the info')
-    substrate = SubstrateInterface(url=WS_URL)
+    substrate = get_substrate(url or WS_URL)
     funds(substrate, [
         '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY',
         '5GNJqTPyNqANBkUVMN1LPPrxXnFouWXoe2wNSmmEoLctxiZY',
@@ -90,14 +89,20 @@ def fund_account():
     ], 302231 * 10 ** 18)
 
 
-def do_runtime_upgrade(wasm_path):
+def get_runtime_upgrade_path():
+    """Returns the runtime, which is applied after each chain restart, or None"""
+    return os.environ.get('RUNTIME_UPGRADE_PATH')
+
+
+def do_runtime_upgrade(wasm_path, url=None, relay_url=None):
+    """Upgrades the parachain at url (default WS_URL), whose relay chain is at relay_url"""
     if not os.path.exists(wasm_path):
         raise IOError(f'Runtime not found: {wasm_path}')
 
-    upgrade(wasm_path)
-    substrate = SubstrateInterface(url=WS_URL)
+    upgrade(wasm_path, url, relay_url)
+    substrate = get_substrate(url or WS_URL)
     wait_for_n_blocks(substrate, 8)
-    fund_account()
+    fund_account(url)
 
 
 def main():
@@ -0,0 +1,226 @@
+import sys
+sys.path.append('.')
+
+import copy
+import json
+import os
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from python_on_whales import DockerClient
+from tools import utils
+from tools.chain_readiness import CHAIN_SERVICES, compose_chain_services, wait_for_chains_ready
+from tools.parallel_workers import PARALLEL, WORKER_INDEX
+from tools.restart import get_parachain_launch_docker, reset_chain_clients
+from tools.runtime_upgrade import do_runtime_upgrade, get_runtime_upgrade_path
+
+# Number of parachain-launch stacks, which boot in the background for the pristine_chain tests,
+# in parallel test runs per worker, which must not restart the chain of the other workers
+STANDBY_STACKS = int(os.environ.get('STANDBY_STACKS', '1' if PARALLEL else '0'))
+# The published ports of standby stack i are shifted by (i + 1) * STANDBY_PORT_STEP,
+# the stacks of worker w are numbered from w * STANDBY_STACKS
+STANDBY_PORT_STEP = int(os.environ.get('STANDBY_PORT_STEP', '1000'))
+STANDBY_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'standby')
+# Booting includes the build, the first blocks and the optional runtime upgrade
+STANDBY_BOOT_TIMEOUT = 900
+URL_NAMES = [
+    'WS_URL', 'ETH_URL',
+    'RELAYCHAIN_WS_URL', 'RELAYCHAIN_ETH_URL',
+    'PARACHAIN_WS_URL', 'PARACHAIN_ETH_URL',
+    'BIFROST_WS_URL', 'BIFROST_ETH_URL',
+]
+# Modules whose URL globals are replaced by inject_urls
+INJECT_MODULE_PREFIXES = ('tools.', 'tests.', 'features.')
+
+
+def shift_url(url, offset) -> str:
+    parsed = urlparse(url)
+    if parsed.port is None:
+        return url
+    return parsed._replace(netloc=f'{parsed.hostname}:{parsed.port + offset}').geturl()
+
+
+def shift_compose_config(compose_config, offset) -> dict:
+    """
+    Returns a copy of the compose config, which can run next to the original project:
+    the published ports are shifted by offset, and container, volume and network
+    names are left to the project name.
+    """
+    config = copy.deepcopy(compose_config)
+    config.pop('name', None)
+    for service in config.get('services', {}).values():
+        service.pop('container_name', None)
+        for port in service.get('ports', []):
+            if isinstance(port, dict) and port.get('published'):
+                port['published'] = str(int(port['published']) + offset)
+    for section in ['volumes', 'networks']:
+        for definition in (config.get(section) or {}).values():
+            if definition and not definition.get('external'):
+                definition.pop('name', None)
+    return config
+
+
+@contextmanager
+def inject_urls(urls, modules=()):
+    """
+    Replaces the URL globals of the loaded tools/tests modules (and of modules)
+    by the given {original url: new url}, and restores them afterwards.
+    Default arguments, which were bound to a URL at import time, keep it.
+    """
+    patched = []
+    targets = [
+        module for name, module in list(sys.modules.items())
+        if module is not None and name.startswith(INJECT_MODULE_PREFIXES)] + list(modules)
+    for module in targets:
+        for name, value in list(vars(module).items()):
+            if name in URL_NAMES and isinstance(value, str) and value in urls:
+                patched.append((module, name, value))
+                setattr(module, name, urls[value])
+    try:
+        yield
+    finally:
+        for module, name, value in reversed(patched):
+            setattr(module, name, value)
+
+
+class StandbyStack:
+    """One copy of the parachain-launch project, on ports shifted by offset"""
+
+    def __init__(self, index, compose_config, offset, root=STANDBY_DIR):
+        self.name = f'peaq-standby-{index}'
+        self.offset = offset
+        config = shift_compose_config(compose_config, offset)
+        os.makedirs(root, exist_ok=True)
+        compose_file = os.path.join(root, f'{self.name}.json')
+        with open(compose_file, 'w') as f:
+            json.dump(config, f, indent=1)
+        self.docker = DockerClient(compose_files=[compose_file], compose_project_name=self.name)
+        self.urls = OrderedDict((name, shift_url(getattr(utils, name), offset)) for name in URL_NAMES)
+        self.services = compose_chain_services(
+            config, OrderedDict((name, shift_url(url, offset)) for name, url in CHAIN_SERVICES.items()))
+        self.ready_at = None
+
+    def url_mapping(self) -> dict:
+        """Returns {default url: url of this stack}"""
+        return {getattr(utils, name): url for name, url in self.urls.items()}
+
+    def boot(self, runtime_upgrade_path=None):
+        """Starts the stack from genesis, and applies the runtime upgrade if given"""
+        self.ready_at = None
+        self.docker.compose.down(volumes=True)
+        started_at = time.time()
+        self.docker.compose.up(detach=True, build=True)
+        wait_for_chains_ready(self.services or {'parachain': self.urls['WS_URL']}, started_at)
+        if runtime_upgrade_path is not None:
+            do_runtime_upgrade(runtime_upgrade_path, self.urls['WS_URL'], self.urls['RELAYCHAIN_WS_URL'])
+        self.ready_at = time.time()
+        print(f'Standby stack {self.name} ready after {self.ready_at - started_at:.1f}s')
+
+    def down(self):
+        self.docker.compose.down(volumes=True)
+
+
+class StandbyPool:
+    """
+    Keeps fresh parachain-launch stacks booting in the background.
+
+    start() copies the compose project of the running parachain-launch
+    stack size times onto shifted ports and boots all copies. acquire()
+    returns the next stack, which is ready, so a test which needs the
+    genesis state does not wait for a restart; recycle() boots the used
+    stack again from genesis. Run a test against a stack with
+    inject_urls(stack.url_mapping()), see conftest.py.
+
+    Example:
+        STANDBY_POOL.start()
+        stack = STANDBY_POOL.acquire()
+        with inject_urls(stack.url_mapping()):
+            ...
+        STANDBY_POOL.recycle(stack)
+    """
+
+    def __init__(self, size=STANDBY_STACKS, port_step=STANDBY_PORT_STEP, first_index=WORKER_INDEX * STANDBY_STACKS,
+                 root=STANDBY_DIR):
+        self.size = size
+        self._root = root
+        self._port_step = port_step
+        self._first_index = first_index
+        self._runtime_upgrade_path = get_runtime_upgrade_path()
+        self._ready = queue.Queue()
+        self._executor = None
+        self._boots = []
+        self.stacks = []
+        self.acquired = 0
+        self.waited = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self, compose_config=None):
+        if self.started:
+            return
+        if compose_config is None:
+            compose_config = get_parachain_launch_docker().compose.config(return_json=True)
+        self.stacks = [
+            StandbyStack(i, compose_config, (i + 1) * self._port_step, self._root)
+            for i in range(self._first_index, self._first_index + self.size)]
+        self._executor = ThreadPoolExecutor(max_workers=self.size)
+        for stack in self.stacks:
+            self.recycle(stack)
+
+    def _boot(self, stack):
+        try:
+            stack.boot(self._runtime_upgrade_path)
+            self._ready.put((stack, None))
+        except Exception as e:
+            self._ready.put((stack, e))
+
+    def recycle(self, stack):
+        """Boots the stack again from genesis in the background"""
+        self._boots = [boot for boot in self._boots if not boot.done()]
+        self._boots.append(self._executor.submit(self._boot, stack))
+
+    def acquire(self, timeout=STANDBY_BOOT_TIMEOUT) -> StandbyStack:
+        """Returns the next ready stack, waits if all stacks are still booting"""
+        self.start()
+        waited_from = time.time()
+        try:
+            stack, error = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise IOError(f'No standby stack is ready after {timeout} seconds')
+        self.waited += time.time() - waited_from
+        if error is not None:
+            raise IOError(f'Standby stack {stack.name} failed to boot: {error}')
+        # The stack reuses the ports of its earlier chain, whose connections and contexts are stale,
+        # the clients of the stacks which are still booting stay
+        reset_chain_clients(stack.urls.values())
+        self.acquired += 1
+        return stack
+
+    def shutdown(self):
+        """Stops booting and removes all standby stacks"""
+        if not self.started:
+            return
+        # Boots which did not start yet are cancelled, running ones are waited for
+        for boot in self._boots:
+            boot.cancel()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._boots = []
+        for stack in self.stacks:
+            stack.down()
+
+    def summary(self) -> str:
+        return f'{self.acquired} fresh chains from {self.size} standby stacks, waited {self.waited:.1f}s for them'
+
+
+STANDBY_POOL = StandbyPool()
@@ -0,0 +1,141 @@
+import sys
+sys.path.append('.')
+
+import threading
+import time
+from contextlib import contextmanager
+
+from substrateinterface import SubstrateInterface
+from substrateinterface.exceptions import SubstrateRequestException
+from websocket import WebSocketException
+from tools.metadata_cache import attach_metadata_cache
+
+HEALTH_CHECK_INTERVAL = 30
+
+
+class SubstratePool:
+    """
+    Process-wide pool of SubstrateInterface connections, keyed by URL and
+    connection options (e.g. type_registry_preset).
+
+    get() hands out one connection per thread and key, so all helpers and
+    tests of a thread share the handshake and the metadata download.
+    lease() checks out an exclusive connection, e.g. for worker threads or
+    blocking subscriptions, and gives it back to the pool afterwards.
+    Connections are health-checked before they are handed out, and are
+    reconnected if the node went away (e.g. after a docker restart).
+    New connections warm-start their runtime metadata from the MetadataCache.
+
+    Example 1:    substrate = SUBSTRATE_POOL.get(WS_URL)
+    Example 2:    with SUBSTRATE_POOL.lease(WS_URL) as substrate: ...
+    """
+
+    def __init__(self, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle = {}
+        self._connections = []
+        self._last_check = {}
+        self._health_check_interval = health_check_interval
+
+    @staticmethod
+    def _key(url, kwargs):
+        return (url, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+    def _thread_connections(self):
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _connect(self, url, kwargs):
+        substrate = attach_metadata_cache(SubstrateInterface(url=url, **kwargs))
+        with self._lock:
+            self._connections.append(substrate)
+            self._last_check[id(substrate)] = time.time()
+        return substrate
+
+    def _discard(self, substrate):
+        with self._lock:
+            if substrate in self._connections:
+                self._connections.remove(substrate)
+            self._last_check.pop(id(substrate), None)
+        try:
+            substrate.close()
+        except (WebSocketException, OSError):
+            pass
+
+    def is_healthy(self, substrate) -> bool:
+        """Checks the websocket, and pings the node if it was idle for a while"""
+        if substrate.websocket is None or not substrate.websocket.connected:
+            return False
+        if time.time() - self._last_check.get(id(substrate), 0) < self._health_check_interval:
+            return True
+        try:
+            substrate.rpc_request('system_health', [])
+        except (WebSocketException, SubstrateRequestException, OSError):
+            return False
+        self._last_check[id(substrate)] = time.time()
+        return True
+
+    def get(self, url, **kwargs) -> SubstrateInterface:
+        """Returns the healthy connection of the calling thread for the given url"""
+        connections = self._thread_connections()
+        key = self._key(url, kwargs)
+        substrate = connections.get(key)
+        if substrate is not None and self.is_healthy(substrate):
+            return substrate
+        if substrate is not None:
+            self._discard(substrate)
+        substrate = self._connect(url, kwargs)
+        connections[key] = substrate
+        return substrate
+
+    @contextmanager
+    def lease(self, url, **kwargs):
+        """Checks out an exclusive connection for the given url, and returns it afterwards"""
+        key = self._key(url, kwargs)
+        substrate = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if idle:
+                substrate = idle.pop()
+        if substrate is not None and not self.is_healthy(substrate):
+            self._discard(substrate)
+            substrate = None
+        if substrate is None:
+            substrate = self._connect(url, kwargs)
+        try:
+            yield substrate
+        finally:
+            with self._lock:
+                if substrate in self._connections:
+                    self._idle[key].append(substrate)
+
+    def reset(self, urls=None):
+        """Closes all connections, or those of the given urls, e.g. after the chain was restarted"""
+        with self._lock:
+            if urls is None:
+                connections = self._connections
+                self._connections = []
+                self._idle = {}
+                self._last_check = {}
+            else:
+                urls = set(urls)
+                connections = [substrate for substrate in self._connections if substrate.url in urls]
+                self._connections = [substrate for substrate in self._connections if substrate.url not in urls]
+                self._idle = {key: idle for key, idle in self._idle.items() if key[0] not in urls}
+                for substrate in connections:
+                    self._last_check.pop(id(substrate), None)
+        for substrate in connections:
+            try:
+                substrate.close()
+            except (WebSocketException, OSError):
+                pass
+
+
+SUBSTRATE_POOL = SubstratePool()
+
+
+def get_substrate(url, **kwargs) -> SubstrateInterface:
+    """Returns a pooled SubstrateInterface for the given url, see SubstratePool.get()"""
+    return SUBSTRATE_POOL.get(url, **kwargs)
@@ -14,6 +14,13 @@ from scalecodec.utils.ss58 import ss58_encode
 from scalecodec.types import FixedLengthArray
 from tools.monkey_patch_scale_info import process_encode as new_process_encode
 from tools.payload import sudo_call_compose, sudo_extrinsic_send, user_extrinsic_send
+from tools.substrate_pool import get_substrate
+from tools.nonce_manager import submit_with_nonce
+from tools.event_stream import get_event_stream
+from tools.block_subscription import get_block_subscription
+from tools.bulk_balance import get_account_balances
+from tools.extrinsic_submitter import ExtrinsicSubmitter
+from tools.keypair_pool import dev_keypair
 FixedLengthArray.process_encode = new_process_encode
 
 TOKEN_NUM_BASE = pow(10, 3)
@@ -46,9 +53,17 @@ ETH_CHAIN_IDS = {
     'peaq-network-fork': 3338,
 }
 URI_GLOBAL_SUDO = '//Alice'
-KP_GLOBAL_SUDO = Keypair.create_from_uri(URI_GLOBAL_SUDO)
-KP_COLLATOR = Keypair.create_from_uri('//Ferdie')
+KP_GLOBAL_SUDO = dev_keypair(URI_GLOBAL_SUDO)
+KP_COLLATOR = dev_keypair('//Ferdie')
 BIFROST_PD_CHAIN_ID = 3000
+# Share of the block weight/length limits which one batch_all may use
+BATCH_FILL_RATIO = 0.75
+# Encoded length of an extrinsic around its call (signature, extra, length prefix)
+EXTRINSIC_OVERHEAD = 256
+# Batches with fewer calls and a shorter encoding than this share of the length limit
+# are submitted as one batch_all, without estimating the weights of their calls
+SPLIT_MIN_CALLS = 100
+SPLIT_MIN_LENGTH_RATIO = 0.5
 
 
 import pprint
@@ -87,7 +102,9 @@ def get_parachain_id(substrate):
 
 
 def show_extrinsic(receipt, info_type):
-    if receipt.is_success:
+    if receipt.block_hash is None:
+        print(f'📨 {info_type}, Submitted: {receipt.extrinsic_hash}')
+    elif receipt.is_success:
         print(f'🚀 {info_type}, Success: {receipt.get_extrinsic_identifier()}')
     else:
         print(f'💥 {info_type}, Extrinsic Failed: {receipt.error_message} {receipt.get_extrinsic_identifier()}')
@@ -317,16 +334,14 @@ def approve_refund_token(substrate, kp_consumer, provider_addr, threshold, refun
     _approve_token(substrate, kp_consumer, [provider_addr], threshold, refund_info)
 
 
-def transfer(substrate, kp_src, kp_dst_addr, token_num, token_base=0):
-    return transfer_with_tip(substrate, kp_src, kp_dst_addr, token_num, 0, token_base)
+def transfer(substrate, kp_src, kp_dst_addr, token_num, token_base=0, wait_for_inclusion=True):
+    return transfer_with_tip(substrate, kp_src, kp_dst_addr, token_num, 0, token_base, wait_for_inclusion)
 
 
-def transfer_with_tip(substrate, kp_src, kp_dst_addr, token_num, tip, token_base=0):
+def transfer_with_tip(substrate, kp_src, kp_dst_addr, token_num, tip, token_base=0, wait_for_inclusion=True):
     if not token_base:
         token_base = TOKEN_NUM_BASE
 
-    nonce = substrate.get_account_nonce(kp_src.ss58_address)
-
     call = substrate.compose_call(
         call_module='Balances',
         call_function='transfer',
@@ -335,15 +350,10 @@ def transfer_with_tip(substrate, kp_src, kp_dst_addr, token_num, tip, token_base
             'value': token_num * token_base
         })
 
-    extrinsic = substrate.create_signed_extrinsic(
-        call=call,
-        keypair=kp_src,
-        era={'period': 64},
-        tip=tip * token_base,
-        nonce=nonce
-    )
-
-    receipt = substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+    receipt = submit_with_nonce(
+        substrate, kp_src, call,
+        wait_for_inclusion=wait_for_inclusion,
+        tip=tip * token_base)
     show_extrinsic(receipt, 'transfer')
     return receipt
 
@@ -381,27 +391,56 @@ def fund(substrate, kp_dst, token_num):
     )
 
 
-@sudo_extrinsic_send(sudo_keypair=KP_GLOBAL_SUDO)
-@sudo_call_compose(sudo_keypair=KP_GLOBAL_SUDO)
 def funds(substrate, dsts, token_num):
-    payloads = [
-        substrate.compose_call(
-            call_module='Balances',
-            call_function='force_set_balance',
-            call_params={
-                'who': dst,
-                'new_free': token_num,
-                'new_reserved': 0
-            }
-        ) for dst in dsts]
+    """
+    Sets the free balance of all dsts to token_num, also of those with more,
+    see fund_accounts(). Returns the last block hash
+    """
+    return fund_accounts(substrate, {dst: token_num for dst in dsts}, exact=True)
 
-    batch_payload = substrate.compose_call(
-        call_module='Utility',
-        call_function='batch_all',
-        call_params={
-            'calls': payloads,
+
+def compose_fund_calls(batch, targets, min_balances=None, exact=False) -> int:
+    """
+    Composes sudo force_set_balance calls into the batch for the accounts, which are not funded yet
+    Parameters:
+    - batch:        ExtrinsicBatch of the sudo keypair
+    - targets:      {addr: free balance} or list of (addr, free balance), duplicates take the maximum
+    - min_balances: {addr: free balance} from which an account counts as funded,
+                    by default its target balance
+    - exact:        set the target balance of every account, without reading the balances
+    Returns the number of composed calls
+    """
+    wanted = {}
+    for addr, amount in (targets.items() if isinstance(targets, dict) else targets):
+        wanted[addr] = max(amount, wanted.get(addr, 0))
+    if not wanted:
+        return 0
+    min_balances = min_balances or {}
+    balances = {} if exact else get_account_balances(batch.substrate, list(wanted))
+    count = 0
+    for addr, amount in wanted.items():
+        if not exact and balances[addr].free >= min_balances.get(addr, amount):
+            continue
+        batch.compose_sudo_call('Balances', 'force_set_balance', {
+            'who': addr,
+            'new_free': amount,
+            'new_reserved': 0
         })
-    return batch_payload
+        count += 1
+    print(f'Fund {count} of {len(wanted)} accounts')
+    return count
+
+
+def fund_accounts(substrate, targets, min_balances=None, kp_sudo=KP_GLOBAL_SUDO, exact=False) -> str:
+    """
+    Funds many accounts at once, see compose_fund_calls(). The balances are
+    read in bulk, and the calls are executed as weight-chunked batches in
+    pipelined extrinsics, see ExtrinsicBatch.execute()
+    Returns the last block hash, or '' if all accounts were funded already
+    """
+    batch = ExtrinsicBatch(substrate, kp_sudo)
+    compose_fund_calls(batch, targets, min_balances, exact)
+    return batch.execute()
 
 
 def get_block_hash(substrate, block_num):
@@ -409,22 +448,18 @@ def get_block_hash(substrate, block_num):
 
 
 def get_account_balance(substrate, addr, block_hash=None):
-    result = substrate.query(
-        'System', 'Account', [addr], block_hash=block_hash)
-    return int(result['data']['free'].value)
+    return get_account_balances(substrate, [addr], block_hash)[addr].free
 
 
 def get_account_balance_locked(substrate, addr):
-    result = substrate.query('System', 'Account', [addr])
-    return int(result['data']['frozen'].value)
+    return get_account_balances(substrate, [addr])[addr].frozen
 
 
 def check_and_fund_account(substrate, addr, min_bal, req_bal):
-    if get_account_balance(substrate, addr.ss58_address) < min_bal:
-        print('Since sufficinet balance is not available in account: ', addr.ss58_address)
-        print('account will be fund with an amount equalt to :', req_bal)
-        fund(substrate, addr, req_bal)
-        print('account balance after funding: ', get_account_balance(substrate, addr.ss58_address))
+    fund_accounts(
+        substrate,
+        {addr.ss58_address: req_bal * TOKEN_NUM_BASE},
+        {addr.ss58_address: min_bal})
 
 
 def show_account(substrate, addr, out_str):
@@ -530,12 +565,13 @@ def get_collators(substrate, key):
 
 
 def get_block_height(substrate):
-    latest_block = substrate.get_block()
-    return latest_block['header']['number']
+    latest_header = substrate.rpc_request('chain_getHeader', [])['result']
+    return int(latest_header['number'], 16)
 
 
 def exist_pallet(substrate, pallet_name):
-    return substrate.get_block_metadata(decode=True).get_metadata_pallet(pallet_name)
+    substrate.init_runtime()
+    return substrate.metadata.get_metadata_pallet(pallet_name)
 
 
 @dataclass
@@ -581,14 +617,29 @@ class ExtrinsicBatch:
         self.batch.append(compose_sudo_call(
             self.substrate, module, extrinsic, params))
 
-    def execute(self, wait_for_finalization=False, alt_keypair=None) -> str:
-        """Executes the extrinsic-stack"""
+    def execute(self, wait_for_finalization=False, alt_keypair=None, wait_for_inclusion=True, atomic=False) -> str:
+        """
+        Executes the extrinsic-stack. A stack beyond the block weight or length
+        limit is split into several batch_all extrinsics, see split_batch(),
+        which are submitted back-to-back with consecutive nonces. Each of them
+        is atomic, but not the stack, so a stack which has to be atomic raises
+        instead of being split.
+        Returns the last block hash (or extrinsic hash)
+        """
         if not self.batch:
             return ''
         if alt_keypair is None:
             alt_keypair = self.keypair
-        return execute_extrinsic_batch(
-            self.substrate, alt_keypair, self.batch, wait_for_finalization)
+        chunks = split_batch(self.substrate, alt_keypair, self.batch)
+        if len(chunks) > 1 and atomic:
+            raise IOError(f'Atomic batch of {len(self.batch)} calls exceeds the limits of one extrinsic')
+        if len(chunks) == 1:
+            return execute_extrinsic_batch(
+                self.substrate, alt_keypair, self.batch, wait_for_finalization,
+                wait_for_inclusion)
+        return execute_extrinsic_batches(
+            self.substrate, alt_keypair, chunks, wait_for_finalization,
+            wait_for_inclusion)
 
     def execute_n_clear(self, alt_keypair=None, wait_for_finalization=False) -> str:
         """Combination of execute() and clear()"""
@@ -634,13 +685,15 @@ def compose_sudo_call(substrate, module, extrinsic, params):
 
 
 def execute_extrinsic_batch(substrate, kp_src, batch,
-                            wait_for_finalization=False) -> str:
+                            wait_for_finalization=False,
+                            wait_for_inclusion=True) -> str:
     """
     Executes a extrinsic-stack/batch-call on substrate
     Parameters:
       substrate:  SubstrateInterface
       kp_src:     Keypair
       batch:      list[compose_call(), compose_call(), ...]
+    Returns the block hash, or the extrinsic hash if wait_for_inclusion is False
     """
     # Wrap payload into a utility batch cal
     call = substrate.compose_call(
@@ -650,16 +703,9 @@ def execute_extrinsic_batch(substrate, kp_src, batch,
             'calls': batch,
         })
 
-    nonce = substrate.get_account_nonce(kp_src.ss58_address)
-    extrinsic = substrate.create_signed_extrinsic(
-        call=call,
-        keypair=kp_src,
-        era={'period': 64},
-        nonce=nonce
-    )
-
-    receipt = substrate.submit_extrinsic(
-        extrinsic, wait_for_inclusion=True,
+    receipt = submit_with_nonce(
+        substrate, kp_src, call,
+        wait_for_inclusion=wait_for_inclusion,
         wait_for_finalization=wait_for_finalization)
     if len(batch) == 1:
         description = generate_call_description(batch[0])
@@ -667,6 +713,8 @@ def execute_extrinsic_batch(substrate, kp_src, batch,
         description = generate_batch_description(batch)
     show_extrinsic(receipt, description)
 
+    if receipt.block_hash is None:
+        return receipt.extrinsic_hash
     if not receipt.is_success:
         print(substrate.get_events(receipt.block_hash))
         raise IOError(f'Extrinsic failed: {receipt.block_hash}, substrate.get_events(receipt.block_hash)')
@@ -674,22 +722,117 @@ def execute_extrinsic_batch(substrate, kp_src, batch,
         return receipt.block_hash
 
 
-def execute_call(substrate: SubstrateInterface, kp_src: Keypair, call,
-                 wait_for_finalization=False) -> str:
-    """Executes a single extrinsic call on substrate"""
-    nonce = substrate.get_account_nonce(kp_src.ss58_address)
-    extrinsic = substrate.create_signed_extrinsic(
-        call=call,
-        keypair=kp_src,
-        era={'period': 64},
-        nonce=nonce)
+def execute_extrinsic_batches(substrate, kp_src, chunks,
+                              wait_for_finalization=False, wait_for_inclusion=True) -> str:
+    """
+    Executes several batches as pipelined batch_all extrinsics with consecutive nonces
+    Returns the last block hash, or the last extrinsic hash if wait_for_inclusion is False
+    """
+    print(f'Split the batch into {len(chunks)} extrinsics, which are not atomic together')
+    if not wait_for_inclusion:
+        for chunk in chunks:
+            extrinsic_hash = execute_extrinsic_batch(substrate, kp_src, chunk, wait_for_inclusion=False)
+        return extrinsic_hash
+
+    with ExtrinsicSubmitter(substrate) as submitter:
+        futures = [submitter.submit_batch(kp_src, chunk, wait_for_finalization) for chunk in chunks]
+        receipts = submitter.wait_all(futures)
+    for chunk, receipt in zip(chunks, receipts):
+        show_extrinsic(receipt, generate_batch_description(chunk))
+        if not receipt.is_success:
+            print(substrate.get_events(receipt.block_hash))
+            raise IOError(f'Extrinsic failed: {receipt.block_hash}, substrate.get_events(receipt.block_hash)')
+    return max(receipts, key=lambda receipt: receipt.block_number).block_hash
+
+
+# (url, runtime version) -> (ref_time, proof_size, length) limits of one batch_all
+_BATCH_LIMITS = {}
+# (url, runtime version, call description, encoded length) -> (ref_time, proof_size) of one call
+_CALL_WEIGHTS = {}
+
+
+def _weight_tuple(weight):
+    if isinstance(weight, dict):
+        return int(weight['ref_time']), int(weight.get('proof_size') or 0)
+    return int(weight), 0
+
+
+def get_batch_limits(substrate) -> tuple:
+    """
+    Returns the (ref_time, proof_size, length) one batch_all may use, i.e. the
+    BATCH_FILL_RATIO share of the normal dispatch class limits of the runtime
+    """
+    if substrate.metadata is None:
+        substrate.init_runtime()
+    key = (substrate.url, substrate.runtime_version)
+    if key not in _BATCH_LIMITS:
+        block_weights = substrate.get_constant('System', 'BlockWeights').value
+        normal = block_weights['per_class']['normal']
+        max_weight = normal['max_extrinsic'] or normal['max_total'] or block_weights['max_block']
+        ref_time, proof_size = _weight_tuple(max_weight)
+        length = substrate.get_constant('System', 'BlockLength').value['max']['normal']
+        _BATCH_LIMITS[key] = (
+            int(ref_time * BATCH_FILL_RATIO),
+            int(proof_size * BATCH_FILL_RATIO),
+            int(length * BATCH_FILL_RATIO))
+    return _BATCH_LIMITS[key]
+
+
+def estimate_call_weight(substrate, keypair, call) -> tuple:
+    """
+    Returns the (ref_time, proof_size) of the call by payment_queryInfo, cached per
+    call type, e.g. Sudo.sudo(Balances.force_set_balance), and encoded length
+    """
+    key = (substrate.url, substrate.runtime_version, generate_call_description(call), len(call.data))
+    if key not in _CALL_WEIGHTS:
+        _CALL_WEIGHTS[key] = _weight_tuple(substrate.get_payment_info(call, keypair)['weight'])
+    return _CALL_WEIGHTS[key]
 
-    receipt = substrate.submit_extrinsic(
-        extrinsic, wait_for_inclusion=True,
+
+def split_batch(substrate, keypair, batch) -> list:
+    """
+    Splits the calls into as few batches as possible, which each stay within
+    the weight and length limits of one extrinsic, see get_batch_limits().
+    A batch below SPLIT_MIN_CALLS and SPLIT_MIN_LENGTH_RATIO stays whole.
+    """
+    if len(batch) < 2:
+        return [batch]
+    max_ref_time, max_proof_size, max_length = get_batch_limits(substrate)
+    if len(batch) < SPLIT_MIN_CALLS and \
+            EXTRINSIC_OVERHEAD + sum(len(call.data) for call in batch) < max_length * SPLIT_MIN_LENGTH_RATIO:
+        return [batch]
+    chunks = [[]]
+    ref_time, proof_size, length = 0, 0, EXTRINSIC_OVERHEAD
+    for call in batch:
+        call_ref_time, call_proof_size = estimate_call_weight(substrate, keypair, call)
+        call_length = len(call.data)
+        if chunks[-1] and (ref_time + call_ref_time > max_ref_time
+                           or max_proof_size and proof_size + call_proof_size > max_proof_size
+                           or length + call_length > max_length):
+            chunks.append([])
+            ref_time, proof_size, length = 0, 0, EXTRINSIC_OVERHEAD
+        chunks[-1].append(call)
+        ref_time += call_ref_time
+        proof_size += call_proof_size
+        length += call_length
+    return chunks
+
+
+def execute_call(substrate: SubstrateInterface, kp_src: Keypair, call,
+                 wait_for_finalization=False, wait_for_inclusion=True) -> str:
+    """
+    Executes a single extrinsic call on substrate
+    Returns the block hash, or the extrinsic hash if wait_for_inclusion is False
+    """
+    receipt = submit_with_nonce(
+        substrate, kp_src, call,
+        wait_for_inclusion=wait_for_inclusion,
         wait_for_finalization=wait_for_finalization)
     description = generate_call_description(call)
     show_extrinsic(receipt, description)
 
+    if receipt.block_hash is None:
+        return receipt.extrinsic_hash
     if not receipt.is_success:
         print(substrate.get_events(receipt.block_hash))
         raise IOError
@@ -697,22 +840,42 @@ def execute_call(substrate: SubstrateInterface, kp_src: Keypair, call,
         return receipt.block_hash
 
 
+# Pallets whose calls wrap other calls, e.g. Sudo.sudo(call) or Utility.batch_all(calls)
+WRAPPER_PALLETS = ['Sudo', 'Utility', 'Multisig']
+
+
+def _call_value(call):
+    """Returns the call as dict, for a composed/decoded GenericCall or a plain dict"""
+    value = call if isinstance(call, dict) else getattr(call, 'value', None)
+    if not isinstance(value, dict) or 'call_module' not in value or 'call_function' not in value:
+        return None
+    return value
+
+
+def _nested_calls(value):
+    """Yields the calls wrapped by a Sudo/Utility/Multisig call, without formatting the payload"""
+    call_args = value.get('call_args') or {}
+    if isinstance(call_args, list):
+        call_args = {arg['name']: arg['value'] for arg in call_args}
+    for arg in call_args.values():
+        for inner in arg if isinstance(arg, list) else [arg]:
+            inner = _call_value(inner)
+            if inner is None:
+                break
+            yield inner
+
+
 def generate_call_description(call):
     """Generates a description for an arbitrary extrinsic call"""
-    # print(type(call), call)
-    # assert type(call) == "scalecodec.types.GenericCall"
-    module = call.call_module.name
-    function = call.call_function.name
-    if module == 'Sudo':
-        # I don't like this solution, but unfortunately I was not able to access
-        # call.call_args in that way to extract the module and function of the payload.
-        desc = call.__str__().split('{')[3]
-        desc = desc.split("'")
-        submodule = desc[3]
-        subfunction = desc[7]
-        return f'{module}.{function}({submodule}.{subfunction})'
-    else:
+    value = _call_value(call)
+    module = value['call_module']
+    function = value['call_function']
+    if module not in WRAPPER_PALLETS:
         return f'{module}.{function}'
+    inner = ', '.join(generate_call_description(c) for c in _nested_calls(value))
+    if not inner:
+        return f'{module}.{function}'
+    return f'{module}.{function}({inner})'
 
 
 def generate_batch_description(batch):
@@ -727,7 +890,7 @@ def generate_batch_description(batch):
 def into_keypair(keypair_or_uri) -> Keypair:
     """Takes either a Keypair, or transforms a given uri into one"""
     if isinstance(keypair_or_uri, str):
-        return Keypair.create_from_uri(keypair_or_uri)
+        return dev_keypair(keypair_or_uri)
     elif isinstance(keypair_or_uri, Keypair):
         return keypair_or_uri
     else:
@@ -735,9 +898,9 @@ def into_keypair(keypair_or_uri) -> Keypair:
 
 
 def into_substrate(substrate_or_url) -> SubstrateInterface:
-    """Takes a SubstrateInterface, or takes into one by given url"""
+    """Takes a SubstrateInterface, or takes a pooled one by given url"""
     if isinstance(substrate_or_url, str):
-        return SubstrateInterface(substrate_or_url)
+        return get_substrate(substrate_or_url)
     elif isinstance(substrate_or_url, SubstrateInterface):
         return substrate_or_url
     else:
@@ -752,21 +915,14 @@ def wait_for_event(substrate, module, event, attributes={}, timeout=30):
     - module:       name of the module to filter
     - event:        name of the event to filter
     - attributes:   dict with attributes and expected values to filter
+    The events of each new block are taken from the shared BlockEventStream
+    of the chain, so it returns as soon as the matching block arrives.
     """
-    stime = time.time()
-    cur_bl = None
-    nxt_bl = substrate.get_block_hash()
-    while not (time.time() - stime) > timeout:
-        if nxt_bl != cur_bl:
-            cur_bl = nxt_bl
-            events = substrate.get_events(cur_bl)
-            for e in events:
-                if _is_it_this_event(e, module, event, attributes):
-                    time.sleep(1)  # To make sure everything has been processed
-                    return e.value['event']
-        time.sleep(1)
-        nxt_bl = substrate.get_block_hash()
-    return None
+    found = get_event_stream(substrate.url).wait(
+        substrate, lambda e: _is_it_this_event(e, module, event, attributes), timeout)
+    if found is None:
+        return None
+    return found.value['event']
 
 
 def _is_it_this_event(e_obj, module, event, attributes) -> bool:
@@ -788,18 +944,30 @@ def _is_it_this_event(e_obj, module, event, attributes) -> bool:
 
 
 def wait_for_n_blocks(substrate, n=1):
-    """Waits until the next block has been created"""
+    """Waits until the next n blocks have been created"""
     height = get_block_height(substrate)
     wait_height = height + n
-    past = 0
-    while past < n:
-        next_height = get_block_height(substrate)
-        if height == next_height:
-            time.sleep(1)
-        else:
-            print(f'Current block: {height}, but waiting at {wait_height}')
-            height = next_height
-            past = past + 1
+    print(f'Current block: {height}, but waiting at {wait_height}')
+    wait_until_block_heights({substrate: wait_height})
+
+
+def wait_until_block_heights(heights, timeout=None) -> bool:
+    """
+    Waits until each chain has reached its block height, on all chains at once
+    Parameters:
+    - heights:      dict with SubstrateInterface and block height to wait for,
+                    e.g. {si_relay: 10, si_peaq: 20, si_bifrost: 20}
+    - timeout:      seconds to wait in total, None for forever
+    Returns False if the timeout expired before
+    """
+    stime = time.time()
+    for substrate, height in heights.items():
+        if get_block_height(substrate) >= height:
+            continue
+        remaining = None if timeout is None else max(0, timeout - (time.time() - stime))
+        if not get_block_subscription(substrate.url).wait_for_height(height, remaining):
+            return False
+    return True
 
 
 if __name__ == '__main__':